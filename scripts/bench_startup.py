@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+################################# Startup Benchmark ##########################################
+#
+# Measures the cold-start import cost of the entry points with `python -X importtime`.
+#
+# Each target is imported in a fresh interpreter (after one warm-up run that writes the
+# .pyc files) `--repeat` times. The median total import time of the entry module, the
+# process wall time and the slowest imports are reported. Nothing is executed beyond the
+# import, so no scan runs and no tray icon appears. Modules an entry point must only load
+# on first use (DEFERRED, e.g. PyMuPDF) are reported, and fail --check, if the import
+# pulled them in.
+#
+#   python scripts/bench_startup.py                 # all targets
+#   python scripts/bench_startup.py tray_app --top 20
+#   python scripts/bench_startup.py --check         # exit 1 if a target exceeds its budget
+#
+##############################################################################################
+import argparse
+import os
+import re
+import site
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Entry point -> (module imported, budget in ms for --check)
+TARGETS = {
+    "annotes.py --scan": ("annotes", 400),
+    "start_watcher.py": ("start_watcher", 150),
+    "tray_app.py": ("tray_app", 200),
+}
+
+# Entry module -> modules it must not load at import time (they come with the first scan)
+DEFERRED = {
+    "tray_app": ("fitz", "pymupdf", "annotes", "jobs", "web_ui", "pystray", "PIL"),
+    "start_watcher": ("fitz", "pymupdf", "annotes"),
+}
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """-X importtime output -> list of (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def direct_imports(rows, module):
+    """(name, cumulative_us) of the imports `module` triggered itself, slowest first."""
+    end = next(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:  # children are printed before their parent
+        start -= 1
+    children = [(name, cum) for name, _, cum, depth in rows[start:end] if depth == 1]
+    return sorted(children, key=lambda child: child[1], reverse=True)
+
+
+def run_once(module, env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr)
+
+
+def loaded_early(module, env):
+    """The DEFERRED modules of `module` that importing it loaded anyway."""
+    deferred = DEFERRED.get(module, ())
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(','.join(m for m in {deferred!r} if m in sys.modules))"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def bench(module, repeat, env):
+    run_once(module, env)  # warm-up: compile .pyc files
+    walls, totals, rows_by_run = [], [], []
+    for _ in range(repeat):
+        wall, rows = run_once(module, env)
+        walls.append(wall)
+        totals.append(next(cum for name, _, cum, depth in rows if name == module and depth == 0))
+        rows_by_run.append(rows)
+    median_run = rows_by_run[totals.index(sorted(totals)[len(totals) // 2])]
+    return {
+        "import_ms": statistics.median(totals) / 1000,
+        "wall_ms": statistics.median(walls) * 1000,
+        "modules": len(median_run),
+        "slowest": direct_imports(median_run, module),
+        "loaded_early": loaded_early(module, env),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark of the Annotes entry points")
+    parser.add_argument("targets", nargs="*", help=f"Modules to measure (default: {', '.join(m for m, _ in TARGETS.values())})")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports listed per target")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if a target exceeds its budget or loads a deferred module")
+    args = parser.parse_args(argv)
+
+    selected = {label: spec for label, spec in TARGETS.items() if not args.targets or spec[0] in args.targets}
+    selected.update({m: (m, None) for m in args.targets if m not in {spec[0] for spec in TARGETS.values()}})
+
+    failures = []
+    # A throwaway home keeps the benchmark away from the real ~/.annotes
+    with tempfile.TemporaryDirectory(prefix="annotes-bench-") as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home,
+                   PYSTRAY_BACKEND=os.environ.get("PYSTRAY_BACKEND", "dummy"))
+        env.setdefault("PYTHONUSERBASE", site.getuserbase())  # user-installed packages stay visible
+        for label, (module, budget) in selected.items():
+            result = bench(module, args.repeat, env)
+            verdict = ""
+            if budget is not None:
+                verdict = f"  budget {budget} ms " + ("OK" if result["import_ms"] <= budget else "EXCEEDED")
+                if result["import_ms"] > budget:
+                    failures.append(f"{label} over budget")
+            print(f"{label}: import {result['import_ms']:.1f} ms, process {result['wall_ms']:.1f} ms, "
+                  f"{result['modules']} modules{verdict}")
+            for name, cumulative_us in result["slowest"][:args.top]:
+                print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+            if result["loaded_early"]:
+                print(f"    loaded at import but should be deferred: {', '.join(result['loaded_early'])}")
+                failures.append(f"{label} loads {', '.join(result['loaded_early'])}")
+            if os.listdir(home):
+                print(f"    note: importing {module} wrote {os.listdir(home)} to the home directory")
+
+    if args.check and failures:
+        print(f"Failed: {'; '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
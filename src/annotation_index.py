@@ -0,0 +1,294 @@
+################################ Annotation Index Module #####################################
+#
+# Library-wide full-text search over highlights and comments.
+#
+# The "index" connector upserts every parsed annotation into a local SQLite database
+# with an FTS5 index (pdf, page, type, text, comment, colour, modDate). Each document is
+# written in its own transaction and only changed annotations are touched: rows are
+# keyed by a digest of their content, so re-syncing a PDF inserts new highlights,
+# deletes removed ones and leaves the rest alone. PDFs the watcher sees deleted or moved
+# away are dropped from the index, and after each full library scan documents whose PDF
+# no longer exists are pruned in the background. web_ui serves ranked, paginated results from it at /search.
+#
+# Configured as a connector entry, e.g.:
+#   connectors:
+#   - file
+#   - {type: index, db_path: "~/.annotes/annotations.db"}
+#
+##############################################################################################
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import events
+import settings
+from connectors import NoteConnector
+from workers import get_pool, PRIORITY_IDLE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    pdf_path TEXT NOT NULL UNIQUE,
+    title TEXT,
+    note_path TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS annotations (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    digest TEXT NOT NULL,
+    page INTEGER,
+    type TEXT,
+    text TEXT,
+    comment TEXT,
+    color TEXT,
+    mod_date TEXT,
+    UNIQUE (document_id, digest)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS annotations_fts USING fts5(
+    text, comment, content='annotations', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS annotations_ai AFTER INSERT ON annotations BEGIN
+    INSERT INTO annotations_fts(rowid, text, comment) VALUES (new.id, new.text, new.comment);
+END;
+CREATE TRIGGER IF NOT EXISTS annotations_ad AFTER DELETE ON annotations BEGIN
+    INSERT INTO annotations_fts(annotations_fts, rowid, text, comment) VALUES ('delete', old.id, old.text, old.comment);
+END;
+"""
+
+
+def default_db_path():
+    return settings.USER_DATA_DIR / "annotations.db"
+
+
+def _color(colors):
+    """annot.colors {"stroke": (r, g, b), ...} -> "#rrggbb"."""
+    rgb = (colors or {}).get("stroke") or (colors or {}).get("fill")
+    if not rgb or len(rgb) < 3:
+        return None
+    return "#" + "".join(f"{round(max(0.0, min(1.0, c)) * 255):02x}" for c in rgb[:3])
+
+
+def _row(annot):
+    """Parsed annotation (pdfutils) -> (digest, page, type, text, comment, color, mod_date)."""
+    mod_date = annot.get("modDate")
+    values = (
+        annot.get("page"),
+        annot.get("type", "Highlight"),
+        (annot.get("highlight_text") or "").strip(),
+        (annot.get("comment") or "").strip(),
+        _color(annot.get("colors")),
+        mod_date.isoformat() if hasattr(mod_date, "isoformat") else mod_date,
+    )
+    key = json.dumps([values, list(annot.get("rect") or ())], default=str)
+    return (hashlib.sha1(key.encode("utf-8")).hexdigest(),) + values
+
+
+def fts_query(query):
+    """
+    Turns free text into an FTS5 query: every word must match, in any column.
+    A trailing * keeps prefix search ("optim*"); FTS syntax characters are escaped.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class AnnotationIndex:
+    """SQLite + FTS5 store of annotations; safe to share between threads."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()  # one writer; WAL lets readers proceed meanwhile
+        self.readers = threading.local()  # one read connection per searching thread
+        self.conn = self._connect()
+        with self.lock:
+            self.conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self.readers, "conn", None)
+        if conn is None:
+            conn = self.readers.conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def index_document(self, pdf_path, annotations, title=None, note_path=None):
+        """
+        Replaces the indexed annotations of one PDF in a single transaction, touching
+        only rows that were added or removed.
+
+        Returns:
+            dict: {"added", "removed", "unchanged"} row counts.
+        """
+        pdf_path = os.path.abspath(str(pdf_path))
+        rows = {}
+        for annot in annotations:
+            row = _row(annot)
+            rows[row[0]] = row
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute(
+                    "INSERT INTO documents (pdf_path, title, note_path, indexed_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(pdf_path) DO UPDATE SET title=excluded.title, note_path=excluded.note_path, "
+                    "indexed_at=excluded.indexed_at",
+                    (pdf_path, title, note_path, time.time()),
+                )
+                document_id = cur.execute("SELECT id FROM documents WHERE pdf_path = ?", (pdf_path,)).fetchone()[0]
+                existing = {digest: row_id for row_id, digest in cur.execute(
+                    "SELECT id, digest FROM annotations WHERE document_id = ?", (document_id,))}
+                removed = [(row_id,) for digest, row_id in existing.items() if digest not in rows]
+                added = [(document_id,) + row for digest, row in rows.items() if digest not in existing]
+                cur.executemany("DELETE FROM annotations WHERE id = ?", removed)
+                cur.executemany(
+                    "INSERT INTO annotations (document_id, digest, page, type, text, comment, color, mod_date) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    added,
+                )
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+        return {"added": len(added), "removed": len(removed), "unchanged": len(rows) - len(added)}
+
+    def remove_document(self, pdf_path):
+        with self.lock:
+            self.conn.execute("DELETE FROM documents WHERE pdf_path = ?", (os.path.abspath(str(pdf_path)),))
+
+    def prune_missing(self):
+        """Removes documents whose PDF no longer exists; returns how many."""
+        paths = [path for (path,) in self._reader().execute("SELECT pdf_path FROM documents")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        if missing:
+            with self.lock:
+                cur = self.conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                try:
+                    cur.executemany("DELETE FROM documents WHERE pdf_path = ?", missing)
+                    cur.execute("COMMIT")
+                except BaseException:
+                    cur.execute("ROLLBACK")
+                    raise
+        return len(missing)
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Ranked (bm25) full-text search over highlight text and comments.
+
+        Returns:
+            dict: {"results": [...], "has_more": bool}. Each result carries pdf_path,
+            title, note_path, page, type, text, comment, color, mod_date and a `snippet`
+            with the matches wrapped in <mark>.
+        """
+        match = fts_query(query)
+        if not match:
+            return {"results": [], "has_more": False}
+        # Fetch one extra row instead of counting every match, so deep result sets stay cheap
+        cur = self._reader().execute(
+            """
+            SELECT d.pdf_path, d.title, d.note_path, a.page, a.type, a.text, a.comment, a.color,
+                   a.mod_date, snippet(annotations_fts, -1, '<mark>', '</mark>', '…', 16)
+            FROM annotations_fts
+            JOIN annotations a ON a.id = annotations_fts.rowid
+            JOIN documents d ON d.id = a.document_id
+            WHERE annotations_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+            """,
+            (match, limit + 1, offset),
+        )
+        rows = cur.fetchall()
+        keys = ("pdf_path", "title", "note_path", "page", "type", "text", "comment", "color", "mod_date", "snippet")
+        return {"results": [dict(zip(keys, row)) for row in rows[:limit]], "has_more": len(rows) > limit}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(db_path=None):
+    """Shared AnnotationIndex for a database file (default: ~/.annotes/annotations.db)."""
+    path = Path(db_path or default_db_path()).expanduser().resolve()
+    with _INDEXES_LOCK:
+        if path not in _INDEXES:
+            _INDEXES[path] = AnnotationIndex(path)
+        return _INDEXES[path]
+
+
+class IndexConnector(NoteConnector):
+    """Upserts the parsed annotations of each synced PDF into the search index."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.index = get_index(db_path)
+        self.pruning = None  # Future of the running prune
+        events.subscribe("pdf.deleted", self._on_pdf_deleted)
+        events.subscribe("scan.finished", self._on_scan_finished)
+
+    def _on_pdf_deleted(self, payload):
+        # Editors that save by replacing the file report a delete of a PDF that still exists
+        if not os.path.exists(payload["path"]):
+            self.index.remove_document(payload["path"])
+            logging.info(f"Removed {os.path.basename(payload['path'])} from the search index")
+
+    def _on_scan_finished(self, payload):
+        # Catches PDFs deleted while nothing was watching. Stats every indexed PDF, so only
+        # after full library scans, and on the pool rather than the scan's own thread.
+        if not payload.get("full") or (self.pruning is not None and not self.pruning.done()):
+            return
+        self.pruning = get_pool().submit(self._prune, priority=PRIORITY_IDLE)
+
+    def _prune(self):
+        pruned = self.index.prune_missing()
+        if pruned:
+            logging.info(f"Pruned {pruned} deleted PDF(s) from the search index")
+        return pruned
+
+    def close(self):
+        events.unsubscribe("pdf.deleted", self._on_pdf_deleted)
+        events.unsubscribe("scan.finished", self._on_scan_finished)
+        if self.pruning is not None:
+            # Let a CLI scan finish its prune before the process exits
+            try:
+                self.pruning.result(timeout=30)
+            except Exception as e:
+                logging.error(f"Pruning the search index failed: {e}")
+
+    def push_note(self, title: str, content: str, output_path: Optional[str] = None):
+        # The index needs the parsed annotations, which only push_notes receives
+        logging.debug(f"Index connector: nothing to index for '{title}' without annotations")
+        return "skipped"
+
+    def push_notes(self, batch: List[dict]) -> list:
+        outcomes = []
+        for note in batch:
+            if note.get("pdf_path") is None or note.get("annotations") is None:
+                outcomes.append(self.push_note(note["title"], note["content"], note.get("output_path")))
+                continue
+            counts = self.index.index_document(note["pdf_path"], note["annotations"],
+                                               title=note["title"], note_path=note.get("output_path"))
+            logging.info(f"Indexed '{note['title']}': {counts['added']} added, {counts['removed']} removed")
+            outcomes.append("indexed")
+        return outcomes
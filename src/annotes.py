@@ -1,193 +1,589 @@
 import os
+import sys
+import contextlib
+import time
+import threading
 import logging
+from concurrent.futures import wait
 from pathlib import Path
 import settings
 from utils import get_datetime_str, get_pdf_files, annotation_filename
 from pdfutils import PdfUtils as pdfutils
 from mdutils import MarkdownBuilder as mdb
 from formatter import render_page_annotations
-from connectors import ConnectorFactory
+from connectors import ConnectorFactory, push_to_connectors, push_batch_to_connectors
+from ledger import record_io
+import events
+from workers import PRIORITY_SCAN
+import metrics
+import logfiles
+import render_cache
+import runconfig
+import writebehind
+import eventlog
+import profiling
 
-# Initialize settings if not already done
-if not settings.CONFIG:
-    settings.initialize()
+# Set up in logfiles so tray_app can log before (or without) loading the pipeline
+from logfiles import LOG_BUFFER, setup_logging, get_recent_logs
 
-from collections import deque
-import logging
-
-# In-memory log buffer for the dashboard (keeps last 50 events)
-LOG_BUFFER = deque(maxlen=50)
-
-def setup_logging():
-    """Configures logging to file and memory buffer."""
-    # Reset handlers if re-initializing
-    root = logging.getLogger()
-    if root.handlers:
-        for handler in root.handlers:
-            root.removeHandler(handler)
-
-    # 1. File Handler (app.log)
-    # Use persistent log path from settings
-    log_file = settings.USER_DATA_DIR / "app.log"
-    file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    
-    # 2. Memory Handler (for Dashboard)
-    class DequeHandler(logging.Handler):
-        def emit(self, record):
-            log_entry = self.format(record)
-            LOG_BUFFER.append(log_entry)
-            
-    mem_handler = DequeHandler()
-    mem_handler.setLevel(logging.INFO)
-    mem_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-
-    logging.basicConfig(
-        level=logging.INFO,
-        handlers=[file_handler, mem_handler]
-    )
-
-def get_recent_logs():
-    """Returns list of recent log entries from memory."""
-    return list(LOG_BUFFER)
-
-def write_notes_log(message: str, notes_folder: str = None) -> None:
+def write_notes_log(message: str, notes_folder: str = None, run_config=None) -> None:
     """Append a timestamped message to the notes-folder log file (Permanent History)."""
+    run_config = run_config or runconfig.current()
     if not notes_folder:
-        notes_folder = settings.CONFIG.get("notes_folder")
+        notes_folder = run_config.notes_folder
         
     try:
         # Also log to main app log so it shows in dashboard
         logging.info(f"Synced: {message}")
         
         if notes_folder:
-            log_path = Path(notes_folder) / "annotes.log"
-            with open(log_path, "a", encoding="utf-8") as nf:
-                nf.write(f"{get_datetime_str()} - {message}\n")
+            # Kept open and flushed every few seconds (see logfiles.NotesLog)
+            logfiles.NOTES_LOG.write(Path(notes_folder) / "annotes.log", f"{get_datetime_str(run_config)} - {message}\n")
     except Exception:
         pass # Logging failure shouldn't crash app
 
-def process_pdf(pdf_path: str):
+# (PDF, notes folder) being processed right now -> "re-run requested". A scan that gave
+# up waiting on a slow PDF leaves its run going; a later scan or watcher event must not
+# start a second, concurrent run writing the same note, so it is skipped and the owner
+# re-reads the PDF once when it finishes if the file changed meanwhile.
+_IN_FLIGHT = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+BUSY_STATUS = "skipped: already being processed"
+
+def _claim(pdf_path, run_config):
+    """True if the caller may process `pdf_path`, False if another run owns it."""
+    key = (os.path.abspath(str(pdf_path)), run_config.notes_folder)
+    with _IN_FLIGHT_LOCK:
+        if key in _IN_FLIGHT:
+            _IN_FLIGHT[key] = True
+            return False
+        _IN_FLIGHT[key] = False
+        return True
+
+def _release(pdf_path, run_config, report):
+    """Ends a claim. True if another run asked for the PDF meanwhile and it has changed since."""
+    key = (os.path.abspath(str(pdf_path)), run_config.notes_folder)
+    with _IN_FLIGHT_LOCK:
+        requested = _IN_FLIGHT.pop(key, False)
+    if not requested:
+        return False
+    try:
+        st = os.stat(key[0])
+    except OSError:
+        return False
+    return report.get("fingerprint") != f"{st.st_size}:{st.st_mtime_ns}"
+
+def process_pdf(pdf_path: str, run_config=None, report=None):
     """
     Main entry point to process a single PDF file.
     Triggers parsing, image extraction, formatting, and connector output.
+
+    The whole run reads the given RunConfig (default: the current configuration) and no
+    global settings, so concurrent calls with different configs do not interfere.
+
+    Returns None when the note was synced, or a "skipped: ..."/"failed: ..." status.
+    The outcome is published on the "pipeline.result" event, together with the stage
+    `timings`, the per-connector `connectors` results and the document facts
+    (`fingerprint`, `pages`, `annotation_count`, `images`, `bytes_written`, `cached`);
+    pass a `report` dict to receive them as well.
+
+    A PDF that is already being processed into the same notes folder (e.g. by a scan
+    that timed out waiting for it) is not processed twice at once: the call returns BUSY_STATUS without publishing, and
+    the running call processes the PDF again when it ends if the file changed meanwhile.
     """
-    pdf_path = str(pdf_path) # Ensure string
-    pdf_basename = os.path.basename(pdf_path)
-    
-    # Reload config to ensure fresh settings (e.g. if user changed config)
-    # settings.initialize() # simple reload might be enough
-    
-    logging.info("Processing PDF: %s", pdf_basename)
-    
+    run_config = run_config or runconfig.current()
+    report = {} if report is None else report
+    if not _claim(pdf_path, run_config):
+        logging.info(f"{os.path.basename(str(pdf_path))} is already being processed; skipping")
+        return BUSY_STATUS
     try:
-        doc = pdfutils.open_pdf(pdf_path)
+        with profiling.profile_document(pdf_path, run_config):
+            status = _process_pdf(pdf_path, run_config, report)
+    except BaseException:
+        _release(pdf_path, run_config, report)
+        raise
+    if _release(pdf_path, run_config, report):
+        logging.info(f"{os.path.basename(str(pdf_path))} changed while it was processed; processing it again")
+        report.clear()
+        return process_pdf(pdf_path, run_config, report)
+    return status
+
+def _process_pdf(pdf_path, run_config, report):
+    try:
+        status, note = prepare_note(str(pdf_path), run_config, report)
+        if note is not None:
+            # Push to Connectors (concurrently, each with its own timeout and retries)
+            with note["timer"].stage("connector"):
+                results = push_to_connectors(
+                    run_config,
+                    title=note["title"],
+                    content=note["content"],
+                    output_path=note["output_path"],
+                    pdf_path=note["pdf_path"],
+                    annotations=note["annotations"],
+                )
+            status = finish_note(note, results, run_config, report)
     except Exception as e:
-        logging.exception("Failed to open PDF %s: %s", pdf_path, e)
-        return
+        _publish_result(pdf_path, f"failed: {e}", report)
+        raise
+    _publish_result(pdf_path, status, report)
+    return status
+
+def _publish_result(pdf_path, status, report):
+    if not status:
+        outcome = "synced"
+    elif status.startswith("failed"):
+        outcome = "failed"
+    else:
+        outcome = "skipped"
+    events.publish("pipeline.result", path=str(pdf_path), outcome=outcome, status=status, **report)
+
+def build_note_header(annotated_file_name, run_config):
+    """Front matter and title of a note; built per sync because they carry timestamps."""
+    header = mdb(run_config.markdown)
+    if run_config.include_front_matter:
+        fm = {}
+        keys = run_config.front_matter_keys
+        if "title" in keys: fm["title"] = annotated_file_name
+        if "created" in keys: fm["created"] = get_datetime_str(run_config)
+        if "modified" in keys: fm["modified"] = get_datetime_str(run_config)
+        if "tags" in keys: fm["tags"] = list(run_config.tags)
+        header.add_yaml_front_matter(fm)
+    header.add_heading(annotated_file_name, level=1)
+    return header
+
+def _render_doc(doc, pdf_basename, timer, run_config):
+    """Parses an open document and renders the note body (everything after the title)."""
+    rendered = {"status": None, "annotations": [], "page_count": len(doc), "body": ""}
 
     # 1. Parse Annotations
-    if not pdfutils.check_annotations(doc):
+    with timer.stage("parse"):
+        has_annotations = pdfutils.check_annotations(doc)
+    if not has_annotations:
         logging.info("No annotations found in %s", pdf_basename)
-        try: doc.close() 
-        except Exception as e: logging.warning(f"Error closing doc {pdf_basename}: {e}")
-        return "skipped: no annotations"
+        rendered["status"] = "skipped: no annotations"
+        return rendered
 
     # Use the new extraction logic
-    pdf_util_instance = pdfutils(doc) # This parses annotations in __init__
+    with timer.stage("parse"):
+        pdf_util_instance = pdfutils(doc) # This parses annotations in __init__
     parsed_annots = pdf_util_instance.annotations
     
     if not parsed_annots:
         logging.info("No annotations found (post-parse) in %s", pdf_basename)
-        doc.close()
-        return "skipped: parsed_annots empty"
-
-    notes_folder = settings.CONFIG.get("notes_folder")
-    if not os.path.exists(notes_folder):
-        os.makedirs(notes_folder)
-
-    # 2. Extract Images (Pre-processing)
-    # We need to extract images before rendering so we can link to them.
-    image_counter = 1
-    for annot_data in parsed_annots:
-        if annot_data.get("type") == "Image":
-            rect = annot_data.get("rect")
-            content = annot_data.get("comment")
-            page_num = annot_data.get("page")
-            
-            # Get actual page object
-            # Note: page_num in dict is 1-based, doc index is 0-based
-            page = doc[page_num - 1]
-            
-            # Call extract_image_from_annot
-            # It returns updated image_counter
-            image_counter = pdfutils.extract_image_from_annot(
-                rect, content, page, pdf_basename, notes_folder, image_counter
+        rendered["status"] = "skipped: parsed_annots empty"
+        return rendered
+    rendered["annotations"] = parsed_annots
+
+    # 2. Render Body
+    # Image annotations link to assets/<pdf>/<name>; the files are extracted at sync time.
+    with timer.stage("render"):
+        body = mdb(run_config.markdown)
+        # render_page_annotations filters the parsed annots by page number,
+        # so we can just iterate pages and pass ALL parsed_annots.
+        for page in doc:
+            render_page_annotations(
+                page.number + 1,
+                parsed_annots,
+                body,
+                run_config,
+                pdf_basename=pdf_basename
             )
+    rendered["body"] = body.content
+    return rendered
 
-    # 3. Build Markdown
-    annotated_doc = mdb()
-    
-    # Front Matter
-    annotated_file_name, annotated_file_path = annotation_filename(pdf_basename=pdf_basename)
-    # Note: annotated_file_path comes from utils which uses default notes_folder. 
-    # Connectors might override this, but FileConnector needs a path.
-    
-    fm_settings = settings.CONFIG["output_settings"].get("yaml_front_matter_settings", {})
-    if fm_settings.get("include_yaml_front_matter", False):
-        fm = {}
-        keys = fm_settings.get("yaml_front_matter_keys", [])
-        if "title" in keys: fm["title"] = annotated_file_name
-        if "created" in keys: fm["created"] = get_datetime_str()
-        if "modified" in keys: fm["modified"] = get_datetime_str()
-        if "tags" in keys: fm["tags"] = settings.CONFIG["output_settings"].get("annotated_file_tags", [])
-        annotated_doc.add_yaml_front_matter(fm)
+def _render(pdf_path: str, timer, run_config):
+    """
+    Returns (rendered, doc). `doc` is the open document when the PDF had to be read,
+    or None when the result came from the render cache; the caller closes it.
+    """
+    cache = render_cache.get_cache()
+    # Stat once, before reading: the ledger records this state as ours, so an edit made
+    # while we process the PDF still shows up as a change
+    try:
+        st = os.stat(pdf_path)
+        key = (render_cache.pdf_fingerprint(pdf_path, st), run_config.config_hash)
+    except OSError:
+        st = key = None
+    cached = cache.get(key) if key else None
+    fingerprint = f"{key[0][1]}:{key[0][2]}" if key else None  # size:mtime_ns
+    if cached is not None:
+        return dict(cached, cached=True, fingerprint=fingerprint, stat=st), None
 
-    # Title
-    annotated_doc.add_heading(annotated_file_name, level=1)
-    
-    # Render Body
-    # We group by page to use render_page_annotations which iterates over annots
-    # But render_page_annotations filters annots by page_num? Yes, I added that.
-    # So we can just iterate pages and pass ALL parsed_annots.
-    
-    for page in doc:
-        # render_page_annotations expects parsed dicts list
-        render_page_annotations(
-            page.number + 1,
-            parsed_annots,
-            annotated_doc,
-            settings.CONFIG,
-            pdf_basename=pdf_basename
-        )
-
-    # 4. Push to Connectors
-    full_markdown = annotated_doc.content
-    logging.info(f"Generated Markdown length: {len(full_markdown)} chars")
-    
-    connectors = ConnectorFactory.get_connectors(settings.CONFIG)
+    try:
+        with timer.stage("open"):
+            doc = pdfutils.open_pdf(pdf_path)
+    except Exception as e:
+        logging.exception("Failed to open PDF %s: %s", pdf_path, e)
+        failed = {"status": "failed: could not open PDF", "annotations": [], "page_count": 0, "body": ""}
+        return dict(failed, cached=False, fingerprint=fingerprint, stat=st), None
+
+    try:
+        rendered = _render_doc(doc, os.path.basename(pdf_path), timer, run_config)
+    except Exception:
+        _close(doc, pdf_path)
+        raise
+    if key:
+        cache.put(key, rendered)
+    return dict(rendered, cached=False, fingerprint=fingerprint, stat=st), doc
+
+def _close(doc, pdf_path):
+    try: doc.close()
+    except Exception as e: logging.warning(f"Error closing doc {os.path.basename(pdf_path)}: {e}")
+
+def render_pdf(pdf_path: str, run_config=None):
+    """
+    Parses and renders a PDF without extracting images or calling connectors.
+
+    Results are cached by PDF fingerprint and config hash (see render_cache), and the
+    next sync of the unchanged PDF reuses the entry.
+
+    Returns:
+        dict: status (None or a "skipped: ..."/"failed: ..." string), annotations,
+        page_count, body (markdown after the title) and whether it was `cached`.
+    """
+    rendered, doc = _render(str(pdf_path), metrics.StageTimer(), run_config or runconfig.current())
+    if doc is not None:
+        _close(doc, pdf_path)
+    return rendered
+
+def preview_pdf(pdf_path: str, run_config=None):
+    """
+    Returns (rendered, markdown) for the note a sync would write; markdown is None
+    when the PDF would be skipped or failed.
+    """
+    run_config = run_config or runconfig.current()
+    rendered = render_pdf(pdf_path, run_config)
+    if rendered["status"]:
+        return rendered, None
+    annotated_file_name, _ = annotation_filename(os.path.basename(pdf_path), run_config)
+    return rendered, build_note_header(annotated_file_name, run_config).content + rendered["body"]
+
+def prepare_note(pdf_path: str, run_config, report):
+    """
+    Runs the pipeline for one PDF up to the connectors: parse, render, extract images
+    and build the note. Fills `report` as it goes.
+
+    Returns:
+        tuple: (status, note). `note` is None when the PDF was skipped or failed (see
+        `status`); otherwise a dict with the connector arguments ("title", "content",
+        "output_path", "pdf_path", "annotations") plus what finish_note needs.
+    """
+    pdf_basename = os.path.basename(pdf_path)
     
-    for connector in connectors:
-        logging.info(f"Pushing to connector: {type(connector).__name__} OutputPath: {annotated_file_path}")
-        connector.push_note(
-            title=annotated_file_name,
-            content=full_markdown,
-            output_path=annotated_file_path 
-        )
+    logging.info("Processing PDF: %s", pdf_basename)
+    timer = metrics.StageTimer()
+    report["timings"] = timer.timings
     
-    write_notes_log(f"Synced: {pdf_basename} -> {annotated_file_path}", notes_folder)
-    doc.close()
+    # 1. Parse and render (served from the render cache when unchanged since a preview)
+    rendered, doc = _render(pdf_path, timer, run_config)
+    report.update(fingerprint=rendered["fingerprint"], cached=rendered["cached"], pages=rendered["page_count"],
+                  annotation_count=len(rendered["annotations"]))
+    try:
+        if rendered["status"]:
+            if not rendered["status"].startswith("failed"):
+                record_io(pdf_path, rendered["stat"])
+            return rendered["status"], None
+        parsed_annots = rendered["annotations"]
+
+        notes_folder = run_config.notes_folder
+        if not os.path.exists(notes_folder):
+            os.makedirs(notes_folder)
+
+        # 2. Extract Images
+        # The rendered body links to these files by name.
+        image_annots = [a for a in parsed_annots if a.get("type") == "Image"]
+        report["images"] = len(image_annots)
+        if image_annots and doc is None:
+            with timer.stage("open"):
+                doc = pdfutils.open_pdf(pdf_path)
+        image_counter = 1
+        with timer.stage("image"):
+            for annot_data in image_annots:
+                rect = annot_data.get("rect")
+                content = annot_data.get("comment")
+                page_num = annot_data.get("page")
+                
+                # Get actual page object
+                # Note: page_num in dict is 1-based, doc index is 0-based
+                page = doc[page_num - 1]
+                
+                # Call extract_image_from_annot
+                # It returns updated image_counter
+                image_counter = pdfutils.extract_image_from_annot(
+                    rect, content, page, pdf_basename, notes_folder, image_counter
+                )
+
+        # 3. Build Markdown: fresh front matter and title around the cached body
+        with timer.stage("render"):
+            annotated_file_name, annotated_file_path = annotation_filename(pdf_basename, run_config)
+            # Note: annotated_file_path comes from utils which uses default notes_folder. 
+            # Connectors might override this, but FileConnector needs a path.
+            full_markdown = build_note_header(annotated_file_name, run_config).content + rendered["body"]
+        logging.info(f"Generated Markdown length: {len(full_markdown)} chars")
+    finally:
+        if doc is not None:
+            _close(doc, pdf_path)
+
+    return None, {
+        "title": annotated_file_name,
+        "content": full_markdown,
+        "output_path": annotated_file_path,
+        "pdf_path": pdf_path,
+        "page_count": rendered["page_count"],
+        "annotations": parsed_annots,
+        "annotation_count": len(parsed_annots),
+        "stat": rendered["stat"],
+        "timer": timer,
+    }
+
+def finish_note(note, results, run_config, report):
+    """
+    Records the connector `results` for a note from prepare_note.
+
+    Returns:
+        str or None: "failed: ..." if every connector failed, else None (synced).
+    """
+    report["connectors"] = results
+    if any(r["outcome"] == "written" for r in results if r["status"] == "ok"):
+        report["bytes_written"] = len(note["content"].encode("utf-8"))
+    if results and all(r["status"] != "ok" for r in results):
+        return "failed: " + "; ".join(f"{r['connector']}: {r['error']}" for r in results)
+
+    pdf_path = note["pdf_path"]
+    pdf_basename = os.path.basename(pdf_path)
+    # Identical notes are not rewritten; keep the notes-folder history quiet too
+    if any(r["outcome"] != "unchanged" for r in results if r["status"] == "ok"):
+        write_notes_log(f"Synced: {pdf_basename} -> {note['output_path']}", run_config.notes_folder, run_config)
+    else:
+        logging.info(f"Unchanged: {pdf_basename} -> {note['output_path']}")
+    metrics.record_document(note["page_count"], note["annotation_count"])
+    # Remember the PDF as we read it so sync clients touching it don't re-trigger us
+    record_io(pdf_path, note.get("stat"))
+
+def scan_library(pdf_folder=None, pool=None, pdf_timeout=None, on_result=None,
+                 priority=None, cancel_event=None, pdf_files=None, run_config=None):
+    """
+    Processes every PDF in the library folder.
+
+    Args:
+        pdf_folder (str or Path, optional): Folder to scan. Defaults to the configured pdf_folder.
+        pool (WorkerPool, optional): Run PDFs on this pool instead of the calling thread.
+        pdf_timeout (float, optional): Seconds a single PDF may run before the scan stops
+            waiting for it and moves on. Only applies when a pool is given. The abandoned
+            run finishes in the background while a new worker takes its pool slot; until then
+            other runs skip that PDF.
+        on_result (func, optional): Called with (pdf_path, status) for each finished PDF.
+        priority (int, optional): Pool priority for the per-PDF tasks (see workers).
+        cancel_event (threading.Event, optional): When set, PDFs not yet started are cancelled.
+        pdf_files (list, optional): Process exactly these files instead of listing the folder.
+        run_config (RunConfig, optional): Config for the whole scan. Defaults to the current
+            configuration, captured once so a mid-scan config edit applies to the next scan.
+            Its connector_batch_size sets how many rendered notes are handed to the
+            connectors at once (push_notes); 1 pushes every note as soon as it is ready.
+
+    Returns:
+        dict: Counts of files, synced, skipped, failed and timed_out PDFs, of note files
+        written, left unchanged and queued for a delayed write (notes_written,
+        notes_unchanged, notes_queued), plus the duration.
+    """
+    started = time.monotonic()
+    run_config = run_config or runconfig.current()
+    full = pdf_files is None
+    if full:
+        pdf_files = get_pdf_files(Path(pdf_folder or run_config.pdf_folder))
+    summary = {"files": len(pdf_files), "synced": 0, "skipped": 0, "failed": 0, "timed_out": 0,
+               "cancelled": 0, "notes_written": 0, "notes_unchanged": 0, "notes_queued": 0}
+    lock = threading.Lock()
+    batch_size = max(1, run_config.connector_batch_size)
+    batch = []  # (pdf_path, note, report) rendered and waiting for the connectors
+
+    def count_notes(report):
+        with lock:
+            for result in report.get("connectors", ()):
+                if result["outcome"] in ("written", "unchanged", "queued"):
+                    summary["notes_" + result["outcome"]] += 1
+
+    def process(pdf_path):
+        """Full run of one PDF, or only up to the connectors when batching."""
+        report = {}
+        if batch_size == 1:
+            try:
+                return process_pdf(pdf_path, run_config, report), None, report
+            finally:
+                count_notes(report)
+        # The claim is held until the note has been through the connectors (flush_batch)
+        if not _claim(pdf_path, run_config):
+            return BUSY_STATUS, None, report
+        try:
+            # Batched connectors are shared by several notes, so only this part is profiled
+            with profiling.profile_document(pdf_path, run_config):
+                status, note = prepare_note(str(pdf_path), run_config, report)
+        except Exception as e:
+            release(pdf_path, report)
+            _publish_result(pdf_path, f"failed: {e}", report)
+            raise
+        if note is None:
+            release(pdf_path, report)
+            _publish_result(pdf_path, status, report)
+        return status, note, report
+
+    def release(pdf_path, report):
+        if _release(pdf_path, run_config, report):
+            # Changed while we held it: a full run of its own picks up the new content
+            process_pdf(pdf_path, run_config)
+
+    def abandon(future):
+        """Done-callback of a timed-out task: its batched note is never pushed, so drop the claim."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        _, note, report = future.result()
+        if note is not None:
+            _release(note["pdf_path"], run_config, report)
+
+    def handle(pdf_path, processed):
+        status, note, report = processed
+        if note is None:
+            tally(pdf_path, status)
+            return
+        batch.append((pdf_path, note, report))
+        if len(batch) >= batch_size:
+            flush_batch()
+
+    def flush_batch():
+        notes = batch[:]
+        batch.clear()
+        if not notes:
+            return
+        pushed = time.perf_counter()
+        results = push_batch_to_connectors(run_config, [note for _, note, _ in notes])
+        # One push covers the whole batch; charge each note its share so per-note
+        # timings and the per-document histogram still add up to the wall time
+        share = (time.perf_counter() - pushed) / len(notes)
+        for (pdf_path, note, report), note_results in zip(notes, results):
+            note["timer"].timings["connector"] = share
+            metrics.STAGE_SECONDS.observe(share, stage="connector")
+            try:
+                status = finish_note(note, note_results, run_config, report)
+            except Exception as e:
+                _publish_result(pdf_path, f"failed: {e}", report)
+                tally(pdf_path, None, e)
+                release(pdf_path, report)
+                continue
+            _publish_result(pdf_path, status, report)
+            count_notes(report)
+            tally(pdf_path, status)
+            release(pdf_path, report)
+
+    def tally(pdf_path, status, error=None):
+        if error is not None:
+            summary["failed"] += 1
+            logging.error(f"Failed to process {pdf_path}: {error}")
+        elif status and status.startswith("failed"):
+            summary["failed"] += 1
+        elif status:
+            summary["skipped"] += 1
+        else:
+            summary["synced"] += 1
+        if on_result:
+            on_result(pdf_path, status if error is None else f"failed: {error}")
+
+    if pool is None:
+        for pdf_path in pdf_files:
+            if cancel_event is not None and cancel_event.is_set():
+                summary["cancelled"] += 1
+                continue
+            try:
+                handle(pdf_path, process(pdf_path))
+            except Exception as e:
+                tally(pdf_path, None, e)
+        flush_batch()
+    else:
+        started_at = {}
+
+        def run(pdf_path):
+            started_at[pdf_path] = time.monotonic()
+            return process(pdf_path)
+
+        futures = {
+            pool.submit(run, pdf_path, priority=PRIORITY_SCAN if priority is None else priority): pdf_path
+            for pdf_path in pdf_files
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1.0)
+            if cancel_event is not None and cancel_event.is_set():
+                for future in list(pending):
+                    if future.cancel():
+                        pending.discard(future)
+                        summary["cancelled"] += 1
+            for future in done:
+                if future.cancelled():
+                    continue
+                try:
+                    processed = future.result()
+                except Exception as e:
+                    tally(futures[future], None, e)
+                else:
+                    handle(futures[future], processed)
+            if not pdf_timeout:
+                continue
+            # Budget each PDF separately: a slow file is abandoned, the rest keep going
+            now = time.monotonic()
+            for future in list(pending):
+                t0 = started_at.get(futures[future])
+                if t0 is not None and now - t0 > pdf_timeout:
+                    # The task keeps running and holds its claim, so nothing else starts
+                    # the same PDF meanwhile (see _claim); a new worker takes its slot
+                    pending.discard(future)
+                    pool.abandon(future)
+                    if batch_size > 1:
+                        future.add_done_callback(abandon)
+                    summary["timed_out"] += 1
+                    logging.warning(f"Gave up waiting for {futures[future]} after {pdf_timeout}s")
+        flush_batch()
+
+    summary["duration"] = round(time.monotonic() - started, 3)
+    events.publish("scan.finished", files=[str(p) for p in pdf_files], summary=dict(summary), full=full)
+    return summary
 
 import argparse
 
+def export_jsonl(paths, output="-"):
+    """CLI --format jsonl: streams parsed annotations to `output`; progress goes to stderr."""
+    import jsonl_export
+    pdf_files = jsonl_export.collect_pdf_files(paths)
+    out = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    try:
+        summary = jsonl_export.export_files(pdf_files, out)
+    except BrokenPipeError:
+        # Reader closed the pipe (e.g. `| head`); silence the error on interpreter exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Exported {summary['records']} annotations from {summary['files']} PDFs "
+          f"({summary['failed']} failed).", file=sys.stderr)
+
 def main():
     parser = argparse.ArgumentParser(description="Annotes: PDF Annotation Extractor")
     parser.add_argument("--scan", action="store_true", help="Perform a manual scan and exit")
     parser.add_argument("--init", action="store_true", help="Initialize configuration and base folders")
+    parser.add_argument("--format", choices=("markdown", "jsonl"), default="markdown",
+                        help="markdown: sync notes (default); jsonl: stream parsed annotations as JSON Lines")
+    parser.add_argument("--output", default="-", help="File for --format jsonl ('-' for stdout, the default)")
+    parser.add_argument("--events", action="store_true",
+                        help="Summarize the per-document event log (slowest PDFs, throughput) and exit")
+    parser.add_argument("--since", help="With --events: only records newer than this, e.g. 7d, 12h or 2026-01-31")
+    parser.add_argument("--bucket", choices=("hour", "day"), default="day", help="With --events: trend granularity")
+    parser.add_argument("paths", nargs="*", help="PDFs or folders to export with --format jsonl "
+                                                 "(default: the configured PDF folder)")
     args = parser.parse_args()
 
-    setup_logging()
+    # With --format jsonl stdout carries the records, so first-run setup messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.format == "jsonl" else sys.stdout):
+        setup_logging()
     
     if args.init:
         print("🛠️  Annotes Initialization & Setup")
@@ -199,6 +595,15 @@ def main():
         print("🚀 Installation / Setup complete.")
         return
 
+    if args.events:
+        since = eventlog.parse_since(args.since) if args.since else None
+        print(eventlog.format_summary(eventlog.summarize(eventlog.iter_records(since=since), bucket=args.bucket)))
+        return
+
+    if args.format == "jsonl":
+        export_jsonl(args.paths or [settings.CONFIG.get("pdf_folder")], args.output)
+        return
+
     # Default behavior or --scan
     pdf_folder = Path(settings.CONFIG.get("pdf_folder"))
     
@@ -206,13 +611,18 @@ def main():
         logging.error(f"PDF folder '{pdf_folder}' does not exist. Run with --init or check config.")
         return
 
-    pdf_files = get_pdf_files(pdf_folder)
-    
-    print(f"Scanning {len(pdf_files)} PDF files in {pdf_folder}...")
-    for f in pdf_files:
-        status = process_pdf(f)
+    def report(pdf_path, status):
         if status:
-             print(f"Processed {f}: {status}")
+             print(f"Processed {pdf_path}: {status}")
+
+    print(f"Scanning PDF files in {pdf_folder}...")
+    summary = scan_library(pdf_folder, on_result=report)
+    writebehind.flush_all()
+    ConnectorFactory.close_all()
+    print(f"Scanned {summary['files']} PDFs: {summary['synced']} synced, "
+          f"{summary['skipped']} skipped, {summary['failed']} failed; "
+          f"{summary['notes_written']} notes written, {summary['notes_unchanged']} unchanged, "
+          f"{summary['notes_queued']} queued.")
 
 if __name__ == "__main__":
     main()
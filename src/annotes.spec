@@ -31,7 +31,10 @@ hiddenimports = [
     'uvicorn.lifespan',
     'uvicorn.lifespan.on',
     'fastapi',
-    'jinja2'
+    'jinja2',
+    'http_connector',  # loaded by name from ConnectorFactory.REGISTRY
+    'annotation_index',  # loaded by name from ConnectorFactory.REGISTRY
+    'jsonl_export',  # imported lazily by annotes --format jsonl
 ]
 
 a = Analysis(
@@ -0,0 +1,118 @@
+################################## Broadcaster Module #######################################
+#
+# Push-based fan-out of log lines (and other dashboard events) to Server-Sent Events
+# clients. Every message gets a monotonic sequence id so clients can resume with
+# `Last-Event-ID`; each client has a bounded asyncio queue and a client that cannot
+# keep up is dropped instead of ever blocking the publishing (logging) thread.
+#
+# asyncio is only imported once a client subscribes (on the web server's loop), so the
+# CLI, which publishes every log line here, does not pay for it.
+#
+##############################################################################################
+import threading
+from collections import deque
+
+HISTORY_SIZE = 1000  # messages kept for Last-Event-ID resume
+QUEUE_SIZE = 256  # per-client backlog before the client counts as slow
+
+
+class Subscription:
+    """One connected client. Created and consumed on the event loop thread."""
+
+    def __init__(self, broadcaster, loop, maxsize):
+        import asyncio
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def offer(self, item):
+        """Hands `item` to the client's loop; safe to call from any thread, never blocks."""
+        if self.dropped:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # Event loop already closed
+            self.dropped = True
+            self.broadcaster.unsubscribe(self)
+
+    def _put(self, item):
+        if self.dropped:
+            return
+        import asyncio
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.drop()
+
+    def drop(self):
+        """Disconnects a slow consumer and wakes it up so it can close its stream."""
+        self.dropped = True
+        self.broadcaster.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        """Returns the next (seq, event, data) item, None if dropped; raises TimeoutError when idle."""
+        import asyncio
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broadcaster:
+    """Thread-safe publisher with per-client asyncio queues."""
+
+    def __init__(self, history_size=HISTORY_SIZE, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.history = deque(maxlen=history_size)  # (seq, event, data)
+        self.subscribers = set()
+
+    def publish(self, data, event=None):
+        """
+        Publishes `data` to all clients.
+
+        Args:
+            data (str): Message body (a single line).
+            event (str, optional): SSE event name; None for the default "message" event.
+
+        Returns:
+            int: The sequence id assigned to the message.
+        """
+        with self.lock:
+            self.seq += 1
+            item = (self.seq, event, data)
+            self.history.append(item)
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.offer(item)
+        return item[0]
+
+    def subscribe(self, last_event_id=None):
+        """
+        Registers a client on the running event loop.
+
+        Args:
+            last_event_id (int, optional): Replay every retained message after this id.
+        """
+        import asyncio
+        subscription = Subscription(self, asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            backlog = []
+            if last_event_id is not None:
+                backlog = [item for item in self.history if item[0] > last_event_id]
+            self.subscribers.add(subscription)
+        # Backlog goes in before any live message scheduled via call_soon_threadsafe
+        for item in backlog[-self.queue_size:]:
+            subscription.queue.put_nowait(item)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+
+# Shared instance fed by the logging handler and read by the /events endpoint
+BROADCASTER = Broadcaster()
@@ -1,18 +1,57 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import List, Optional
 import os
+import json
+import hashlib
+import tempfile
+import time
 import logging
+import importlib
+import threading
 import sys
+import re
+import weakref
+from ledger import record_io
+from writebehind import WriteBehindQueue
+import events
+import metrics
 
-# Try to import pyperclip for clipboard support
-try:
-    import pyperclip
-    HAS_PYPERCLIP = True
-except ImportError:
-    HAS_PYPERCLIP = False
+# mkstemp creates files as 0600; notes get the mode a plain open() would give them.
+# The umask is read once here because os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Front-matter keys that carry the sync time (see annotes.build_note_header). They change
+# on every run, so FileConnector ignores them when deciding whether a note changed.
+VOLATILE_FRONT_MATTER = ("created", "modified")
+_FRONT_MATTER = re.compile(r"\A---\n(.*?\n)?---\n", re.S)
+
+def split_volatile(content: str):
+    """
+    Separates the volatile front-matter lines from a note.
+
+    Returns:
+        tuple: (content without those lines, {key: line} of the lines removed).
+    """
+    match = _FRONT_MATTER.match(content)
+    if not match:
+        return content, {}
+    kept, volatile = [], {}
+    for line in (match.group(1) or "").splitlines(keepends=True):
+        key = line.split(":", 1)[0].strip()
+        if key in VOLATILE_FRONT_MATTER:
+            volatile[key] = line
+        else:
+            kept.append(line)
+    return "---\n" + "".join(kept) + "---\n" + content[match.end():], volatile
 
 class NoteConnector(ABC):
     """Abstract base class for note output connectors."""
+
+    # True for connectors that retry transient failures themselves; the pipeline then
+    # calls them once instead of stacking its own retries on top (see _run_with_retries).
+    handles_retries = False
     
     @abstractmethod
     def push_note(self, title: str, content: str, output_path: Optional[str] = None):
@@ -23,40 +62,191 @@ class NoteConnector(ABC):
             title (str): Title of the note.
             content (str): The full markdown content of the note.
             output_path (str, optional): The suggested path for file-based connectors.
+
+        Returns:
+            str, optional: "written" or "unchanged" for connectors that can tell.
+
+        Raises:
+            Exception: On failure; the pipeline retries and reports it per connector.
         """
         pass
 
+    def push_notes(self, batch: List[dict]) -> list:
+        """
+        Push several notes at once. Override to amortize per-note work (one transaction,
+        one dump, ...); the default pushes them one by one.
+
+        Args:
+            batch (list): Dicts with the push_note arguments "title", "content" and
+                "output_path"; notes from the pipeline also carry "pdf_path" and the
+                parsed "annotations".
+
+        Returns:
+            list: One push_note return value per note, in order.
+
+        Raises:
+            Exception: On failure; the whole batch is retried and reported as failed.
+        """
+        return [self.push_note(note["title"], note["content"], note.get("output_path")) for note in batch]
+
+    def close(self):
+        """Releases connections and threads on shutdown; the default has none."""
+
 class FileConnector(NoteConnector):
-    """Writes notes to a file on the local filesystem."""
-    
+    """
+    Writes notes to a file on the local filesystem.
+
+    Notes that differ only in their created/modified timestamps are not rewritten, so
+    unchanged PDFs don't wake the vault indexer or sync clients; a rewritten note keeps
+    the `created` time it was first written with. Changed notes are written to a temp file next to the
+    target and renamed over it, so a crash never leaves a truncated note.
+    With write-behind enabled, notes are queued and only the latest content per path
+    is written once the delay expires (see writebehind).
+    """
+
+    def __init__(self, fsync: bool = False, write_behind_seconds: float = 0,
+                 write_behind_max_pending: int = 256):
+        """
+        Args:
+            fsync (bool): Flush each note to disk before the rename (slower, crash-safe).
+            write_behind_seconds (float): Delay and coalesce writes per path; 0 writes at once.
+            write_behind_max_pending (int): Notes held in the write-behind queue at most.
+        """
+        self.fsync = fsync
+        self.written = 0
+        self.skipped = 0
+        self.hashes = {}  # {path: (mtime_ns, size, sha256, volatile lines)} of the notes as we left them
+        self.lock = threading.Lock()
+        self.queue = None
+        if write_behind_seconds and float(write_behind_seconds) > 0:
+            self.queue = WriteBehindQueue(self.write_note, write_behind_seconds, write_behind_max_pending)
+
+    def _existing_note(self, path):
+        """(sha256 without volatile lines, volatile lines) of the note at `path`, or None if missing."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            known = self.hashes.get(path)
+        if known and known[:2] == (st.st_mtime_ns, st.st_size):
+            return known[2:]
+        with open(path, "rb") as f:
+            stable, volatile = split_volatile(f.read().decode("utf-8", errors="replace"))
+        return hashlib.sha256(stable.encode("utf-8")).hexdigest(), volatile
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".annotes-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                try:
+                    mode = os.stat(path).st_mode & 0o7777
+                except OSError:
+                    mode = 0o666 & ~_UMASK
+                os.chmod(f.fileno() if os.chmod in os.supports_fd else tmp_path, mode)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
     def push_note(self, title: str, content: str, output_path: Optional[str] = None):
         if not output_path:
-            logging.error("FileConnector requires an output_path")
-            return
+            raise ValueError("FileConnector requires an output_path")
+        if self.queue is not None:
+            self.queue.put(str(output_path), title, content)
+            return "queued"
+        return self.write_note(str(output_path), title, content)
+
+    def push_notes(self, batch: List[dict]) -> list:
+        """Pushes a batch; each target folder is created and listed once, not per note."""
+        if any(not note.get("output_path") for note in batch):
+            raise ValueError("FileConnector requires an output_path")
+        if self.queue is not None:
+            return super().push_notes(batch)
+
+        existing = {}  # {folder: names in it}
+        for folder in {os.path.dirname(os.path.abspath(str(note["output_path"]))) for note in batch}:
+            os.makedirs(folder, exist_ok=True)
+            existing[folder] = set(os.listdir(folder))
+        outcomes = []
+        for note in batch:
+            folder, name = os.path.split(os.path.abspath(str(note["output_path"])))
+            outcomes.append(self.write_note(str(note["output_path"]), note["title"], note["content"],
+                                            exists=name in existing[folder]))
+        return outcomes
 
+    def write_note(self, output_path: str, title: str, content: str, exists: Optional[bool] = None):
+        """
+        Writes one note now; returns "written" or "unchanged".
+
+        Args:
+            exists (bool, optional): Whether the file exists, if the caller already knows
+                (its folder then must exist too); checked here when None.
+        """
+        path = os.path.abspath(output_path)
+        stable, volatile = split_volatile(content)
+        digest = hashlib.sha256(stable.encode("utf-8")).hexdigest()
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            if exists is None:
+                # Ensure directory exists
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                exists = os.path.exists(path)
+            existing = self._existing_note(path) if exists else None
+            if existing and existing[0] == digest:
+                with self.lock:
+                    self.skipped += 1
+                metrics.NOTE_WRITES.inc(result="unchanged")
+                logging.info(f"Note unchanged, not rewritten: {output_path}")
+                return "unchanged"
+
+            if existing and "created" in existing[1] and "created" in volatile:
+                # Keep the time the note was first written
+                content = content.replace(volatile["created"], existing[1]["created"], 1)
+                volatile = dict(volatile, created=existing[1]["created"])
+            created = not exists
+            self._write_atomic(path, content.encode("utf-8"))
+            st = os.stat(path)
+            with self.lock:
+                self.hashes[path] = (st.st_mtime_ns, st.st_size, digest, volatile)
+                self.written += 1
+            record_io(path, st)
+            metrics.NOTE_WRITES.inc(result="written")
+            events.publish("note.written", path=str(output_path), created=created)
             logging.info(f"Note saved to file: {output_path}")
+            return "written"
         except Exception as e:
             logging.exception(f"Failed to save note to file: {e}")
+            raise
 
 class ClipboardConnector(NoteConnector):
     """Copies the note content to the system clipboard."""
+
+    def __init__(self):
+        # Imported here so pyperclip is only loaded when clipboard output is enabled
+        try:
+            import pyperclip
+            self.pyperclip = pyperclip
+        except ImportError:
+            self.pyperclip = None
     
     def push_note(self, title: str, content: str, output_path: Optional[str] = None):
-        if not HAS_PYPERCLIP:
+        if self.pyperclip is None:
             logging.warning("pyperclip not installed. Cannot copy to clipboard.")
             return
 
         try:
-            pyperclip.copy(content)
+            self.pyperclip.copy(content)
             logging.info(f"Note '{title}' copied to clipboard.")
         except Exception as e:
             logging.exception(f"Failed to copy note to clipboard: {e}")
+            raise
 
 class LogConnector(NoteConnector):
     """Prints the note content to the console/log."""
@@ -71,21 +261,221 @@ class LogConnector(NoteConnector):
 
 class ConnectorFactory:
     """Factory to get connectors based on configuration."""
+
+    # name -> "module:Class"; modules are imported on first use, so optional
+    # dependencies of unused connectors are never loaded.
+    REGISTRY = {
+        "file": "connectors:FileConnector",
+        "clipboard": "connectors:ClipboardConnector",
+        "log": "connectors:LogConnector",
+        "http": "http_connector:HttpConnector",
+        "index": "annotation_index:IndexConnector",
+    }
+    _instances = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def register(name, target):
+        """Registers a connector class or a "module:Class" path under `name`."""
+        ConnectorFactory.REGISTRY[name] = target
+
+    @staticmethod
+    def _load(target):
+        if not isinstance(target, str):
+            return target
+        module_name, _, class_name = target.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @staticmethod
+    def get_connector(spec) -> Optional[NoteConnector]:
+        """Returns the (reused) connector instance for a ConnectorSpec, or None if unknown."""
+        key = (spec.name, json.dumps(spec.options, sort_keys=True, default=str))
+        with ConnectorFactory._lock:
+            connector = ConnectorFactory._instances.get(key)
+            if connector is not None:
+                return connector
+            target = ConnectorFactory.REGISTRY.get(spec.name)
+            if target is None:
+                logging.warning(f"Unknown connector '{spec.name}' ignored")
+                return None
+            try:
+                connector = ConnectorFactory._load(target)(**spec.options)
+            except Exception as e:
+                logging.error(f"Could not create connector '{spec.name}': {e}")
+                return None
+            ConnectorFactory._instances[key] = connector
+            return connector
+
+    @staticmethod
+    def close_all():
+        """Closes every connector created so far (on quit); later pushes create new ones."""
+        with ConnectorFactory._lock:
+            connectors = list(ConnectorFactory._instances.values())
+            ConnectorFactory._instances.clear()
+        for connector in connectors:
+            with _LANES_LOCK:
+                lane = _LANES.pop(connector, None)
+            if lane is not None:
+                lane.executor.shutdown(wait=False)
+            try:
+                connector.close()
+            except Exception as e:
+                logging.error(f"Could not close connector {type(connector).__name__}: {e}")
     
     @staticmethod
-    def get_connectors(config: dict) -> List[NoteConnector]:
+    def get_connectors(run_config) -> List[NoteConnector]:
+        """Instantiates the connectors resolved in `run_config.connectors`."""
         connectors = []
-        # Default behavior matches "File" output
-        # In a real app, this would be parsed from config['connectors'] list
-        # For now, we assume FileConnector is always active if output_path is provided
-        connectors.append(FileConnector())
-        
-        # Check if clipboard is enabled in config (hypothetically)
-        if config.get("output_settings", {}).get("copy_to_clipboard", False):
-            connectors.append(ClipboardConnector())
-            
-        # Debug/Log connector
-        if config.get("debug_mode", False):
-            connectors.append(LogConnector())
-            
+        for spec in run_config.connectors:
+            connector = ConnectorFactory.get_connector(spec)
+            if connector is not None:
+                connectors.append(connector)
         return connectors
+
+
+# --- Concurrent fan-out ---
+DEFAULT_FANOUT_WORKERS = 4
+RETRY_DELAY = 0.5  # seconds before the first retry, doubled for each further attempt
+
+
+class ConnectorBusy(Exception):
+    """Every thread of the connector is still held by earlier pushes (see _Lane)."""
+
+class _Lane:
+    """
+    A connector's own threads. A push that timed out keeps its thread until it returns,
+    so a hung connector can only use up its own lane: once all `workers` are busy, further
+    pushes to it fail fast as "busy" while the other connectors carry on.
+    """
+
+    def __init__(self, name, workers):
+        self.workers = max(1, int(workers))
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"annotes-connector-{name}")
+        self.slots = threading.BoundedSemaphore(self.workers)
+
+    def submit(self, fn, *args):
+        """Runs fn(*args) on the lane; None if every thread is still busy."""
+        if not self.slots.acquire(blocking=False):
+            return None
+
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                self.slots.release()
+        try:
+            return self.executor.submit(run)
+        except BaseException:
+            self.slots.release()
+            raise
+
+
+# A dedicated lane per connector instance: the pipeline itself runs on the shared worker
+# pool and must not wait for tasks queued behind it there, nor behind another connector.
+_LANES = weakref.WeakKeyDictionary()  # {connector: _Lane}
+_LANES_LOCK = threading.Lock()
+
+
+def _get_lane(connector, name, workers=DEFAULT_FANOUT_WORKERS):
+    with _LANES_LOCK:
+        lane = _LANES.get(connector)
+        if lane is None or lane.workers != max(1, int(workers)):
+            # New connector, or connector_settings.max_workers changed since: rebuild.
+            # Pushes still running on the old lane finish there.
+            if lane is not None:
+                lane.executor.shutdown(wait=False)
+            lane = _LANES[connector] = _Lane(name, workers)
+        return lane
+
+
+def _run_with_retries(push, spec, deadline, retries=None):
+    retries = spec.retries if retries is None else retries
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            return attempts, push()
+        except Exception as e:
+            delay = RETRY_DELAY * 2 ** (attempts - 1)
+            if attempts > retries or time.monotonic() + delay >= deadline:
+                e.attempts = attempts
+                raise
+            logging.warning(f"Connector '{spec.name}' failed (attempt {attempts}), retrying: {e}")
+            time.sleep(delay)
+
+
+def push_to_connectors(run_config, title, content, output_path=None, **fields):
+    """
+    Pushes one note to every configured connector concurrently.
+
+    Each connector gets its own timeout (covering its retries) and its own threads, and
+    failures are isolated: one slow or broken connector never stops the others. A
+    connector that times out keeps running in the background; the pipeline just stops
+    waiting for it, and while all of that connector's threads are taken its pushes
+    report "busy" at once.
+    Extra `fields` (e.g. pdf_path, annotations) reach connectors that override push_notes.
+
+    Returns:
+        list: One dict per connector: {"connector", "status" ("ok"|"failed"|"timeout"|"busy"),
+        "duration", "attempts", "error", "outcome"}; "outcome" is what the connector
+        reported, e.g. "written", "unchanged" or "queued" for the file connector.
+    """
+    note = dict(fields, title=title, content=content, output_path=output_path)
+    return push_batch_to_connectors(run_config, [note])[0]
+
+
+def push_batch_to_connectors(run_config, batch):
+    """
+    Pushes a batch of notes to every configured connector concurrently, one push_notes
+    call per connector. Timeouts and retries apply to that call as a whole.
+
+    Args:
+        batch (list): Dicts with "title", "content" and "output_path".
+
+    Returns:
+        list: Per note, the connector result list described in push_to_connectors.
+    """
+    if not batch:
+        return []
+    started = time.monotonic()
+    pending = []
+    results = [[] for _ in batch]
+    for spec in run_config.connectors:
+        connector = ConnectorFactory.get_connector(spec)
+        if connector is None:
+            for note_results in results:
+                note_results.append({"connector": spec.name, "status": "failed", "duration": 0.0,
+                                     "attempts": 0, "error": "unavailable", "outcome": None})
+            continue
+        logging.info(f"Pushing {len(batch)} note(s) to connector: {type(connector).__name__}")
+        deadline = started + spec.timeout
+        push = (lambda connector=connector: connector.push_notes(batch))
+        retries = 0 if connector.handles_retries else spec.retries
+        lane = _get_lane(connector, spec.name, run_config.connector_workers)
+        future = lane.submit(_run_with_retries, push, spec, deadline, retries)
+        pending.append((spec, future, deadline))
+
+    titles = ", ".join(note["title"] for note in batch)
+    for spec, future, deadline in pending:
+        result = {"connector": spec.name, "status": "ok", "attempts": 1, "error": None}
+        outcomes = None
+        try:
+            if future is None:
+                raise ConnectorBusy(f"all {run_config.connector_workers} threads still busy with earlier pushes")
+            result["attempts"], outcomes = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except ConnectorBusy as e:
+            result.update(status="busy", error=str(e), attempts=0)
+            logging.error(f"Connector '{spec.name}' skipped for {titles}: {e}")
+        except FutureTimeout:
+            result.update(status="timeout", error=f"no result after {spec.timeout}s")
+            logging.error(f"Connector '{spec.name}' timed out after {spec.timeout}s for {titles}")
+        except Exception as e:
+            result.update(status="failed", error=str(e), attempts=getattr(e, "attempts", 1))
+            logging.error(f"Connector '{spec.name}' failed for {titles}: {e}")
+        result["duration"] = round(time.monotonic() - started, 4)
+        metrics.CONNECTOR_RESULTS.inc(connector=spec.name, status=result["status"])
+        metrics.CONNECTOR_SECONDS.observe(result["duration"], connector=spec.name)
+        outcomes = list(outcomes or ())
+        for i, note_results in enumerate(results):
+            note_results.append(dict(result, outcome=outcomes[i] if i < len(outcomes) else None))
+    return results
@@ -0,0 +1,228 @@
+################################### Event Log Module #########################################
+#
+# Machine-readable history of processed PDFs: one JSON line per document in
+# ~/.annotes/events.jsonl, written from the "pipeline.result" event and rotated into
+# gzip archives like app.log (logging_settings).
+#
+# Record: {"time", "path", "fingerprint", "outcome", "status", "seconds", "timings",
+#          "pages", "annotations", "images", "bytes_written", "cached", "connectors"}
+#
+# Summarize with:  annotes.py --events [--since 7d]  or  python eventlog.py [--top 10] [--bucket hour|day]
+#
+##############################################################################################
+import argparse
+import gzip
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import events
+import logfiles
+import settings
+
+EVENT_LOG_NAME = "events.jsonl"
+
+_LOGGER = logging.getLogger("annotes.events")
+_LOGGER.propagate = False  # records go to events.jsonl only, never to app.log
+_STATE = {"handler": None}
+_LOCK = threading.Lock()
+
+
+def event_log_path():
+    return settings.USER_DATA_DIR / EVENT_LOG_NAME
+
+
+def build_record(payload):
+    """pipeline.result payload -> event record."""
+    timings = {stage: round(seconds, 4) for stage, seconds in (payload.get("timings") or {}).items()}
+    return {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "path": payload.get("path"),
+        "fingerprint": payload.get("fingerprint"),
+        "outcome": payload.get("outcome"),
+        "status": payload.get("status"),
+        "seconds": round(sum(timings.values()), 4),
+        "timings": timings,
+        "pages": payload.get("pages", 0),
+        "annotations": payload.get("annotation_count", 0),
+        "images": payload.get("images", 0),
+        "bytes_written": payload.get("bytes_written", 0),
+        "cached": payload.get("cached"),
+        "connectors": [
+            {"connector": r.get("connector"), "status": r.get("status"), "outcome": r.get("outcome")}
+            for r in payload.get("connectors") or ()
+        ],
+    }
+
+
+def _on_pipeline_result(payload):
+    try:
+        _LOGGER.info(json.dumps(build_record(payload), ensure_ascii=False, default=str))
+    except Exception as e:
+        logging.error(f"Could not write event log record: {e}")
+
+
+def start(log_path=None, log_settings=None):
+    """
+    Starts recording pipeline results (idempotent; re-run to apply new settings).
+    Disabled with `logging_settings.event_log: false`.
+    """
+    log_settings = log_settings if log_settings is not None else (settings.CONFIG or {}).get("logging_settings") or {}
+    with _LOCK:
+        stop_locked()
+        if not log_settings.get("event_log", True):
+            return None
+        handler = logfiles.create_handler(log_path or event_log_path(), log_settings)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _LOGGER.addHandler(handler)
+        _LOGGER.setLevel(logging.INFO)
+        _STATE["handler"] = handler
+        events.subscribe("pipeline.result", _on_pipeline_result)
+        return handler
+
+
+def stop_locked():
+    handler = _STATE["handler"]
+    if handler is None:
+        return
+    events.unsubscribe("pipeline.result", _on_pipeline_result)
+    _LOGGER.removeHandler(handler)
+    handler.close()
+    _STATE["handler"] = None
+
+
+def stop():
+    with _LOCK:
+        stop_locked()
+
+
+# --- Reading and summarizing ---
+def iter_records(log_path=None, since=None):
+    """Yields event records from the rotated archives (oldest first) and the live log."""
+    log_path = Path(log_path or event_log_path())
+    paths = list(reversed(logfiles.archive_paths(log_path)))
+    if log_path.exists():
+        paths.append(log_path)
+    for path in paths:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and record.get("time", "") < since.isoformat():
+                    continue
+                yield record
+
+
+def _bucket_key(timestamp, bucket):
+    return timestamp[:13] + ":00" if bucket == "hour" else timestamp[:10]
+
+
+def summarize(records, top=10, bucket="day"):
+    """
+    Aggregates event records.
+
+    Returns:
+        dict: "totals" (per outcome and overall counts), "slowest" (the `top` slowest
+        documents), "stages" (total and mean seconds per stage) and "trend" (per hour
+        or day: documents, pages, failures, seconds, pages per second).
+    """
+    totals = defaultdict(int)
+    stages = defaultdict(lambda: [0.0, 0])
+    trend = defaultdict(lambda: {"documents": 0, "pages": 0, "failed": 0, "seconds": 0.0})
+    slowest = []
+    for record in records:
+        outcome = record.get("outcome") or "unknown"
+        totals["documents"] += 1
+        totals[outcome] += 1
+        totals["pages"] += record.get("pages") or 0
+        totals["annotations"] += record.get("annotations") or 0
+        totals["images"] += record.get("images") or 0
+        totals["bytes_written"] += record.get("bytes_written") or 0
+        for stage, seconds in (record.get("timings") or {}).items():
+            stages[stage][0] += seconds
+            stages[stage][1] += 1
+
+        point = trend[_bucket_key(record.get("time", ""), bucket)]
+        point["documents"] += 1
+        point["failed"] += outcome == "failed"
+        if outcome == "synced":
+            point["pages"] += record.get("pages") or 0
+            point["seconds"] += record.get("seconds") or 0.0
+
+        slowest.append((record.get("seconds") or 0.0, record))
+        if len(slowest) > top * 4:
+            slowest = sorted(slowest, key=lambda item: item[0], reverse=True)[:top]
+
+    for point in trend.values():
+        point["pages_per_second"] = round(point["pages"] / point["seconds"], 2) if point["seconds"] else None
+        point["seconds"] = round(point["seconds"], 3)
+    return {
+        "totals": dict(totals),
+        "slowest": [record for _, record in sorted(slowest, key=lambda item: item[0], reverse=True)[:top]],
+        "stages": {stage: {"total": round(total, 3), "mean": round(total / count, 4)}
+                   for stage, (total, count) in sorted(stages.items())},
+        "trend": dict(sorted(trend.items())),
+    }
+
+
+def parse_since(value):
+    """'7d', '12h', '30m' or an ISO date -> datetime."""
+    match = re.fullmatch(r"(\d+)([dhm])", value.strip())
+    if match:
+        unit = {"d": "days", "h": "hours", "m": "minutes"}[match.group(2)]
+        return datetime.now() - timedelta(**{unit: int(match.group(1))})
+    return datetime.fromisoformat(value)
+
+
+def format_summary(summary):
+    lines = []
+    totals = summary["totals"]
+    lines.append(
+        f"{totals.get('documents', 0)} documents: {totals.get('synced', 0)} synced, "
+        f"{totals.get('skipped', 0)} skipped, {totals.get('failed', 0)} failed; "
+        f"{totals.get('pages', 0)} pages, {totals.get('annotations', 0)} annotations, "
+        f"{totals.get('images', 0)} images, {totals.get('bytes_written', 0)} bytes written"
+    )
+    if summary["slowest"]:
+        lines.append("\nSlowest documents:")
+        for record in summary["slowest"]:
+            timings = record.get("timings") or {}
+            worst = max(timings, key=timings.get) if timings else "-"
+            lines.append(f"  {record.get('seconds', 0):8.3f}s  {record.get('pages', 0):5} pages  "
+                         f"{worst:<10} {record.get('outcome', ''):<8} {record.get('path')}")
+    if summary["stages"]:
+        lines.append("\nStages (total / mean seconds):")
+        for stage, numbers in summary["stages"].items():
+            lines.append(f"  {stage:<10} {numbers['total']:10.3f} {numbers['mean']:10.4f}")
+    if summary["trend"]:
+        lines.append("\nThroughput:")
+        for key, point in summary["trend"].items():
+            rate = point["pages_per_second"]
+            lines.append(f"  {key:<16} {point['documents']:6} docs {point['pages']:7} pages "
+                         f"{point['failed']:4} failed  {rate if rate is not None else '-':>8} pages/s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the Annotes per-document event log")
+    parser.add_argument("--log", help=f"Event log to read (default: ~/.annotes/{EVENT_LOG_NAME})")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest documents to list")
+    parser.add_argument("--bucket", choices=("hour", "day"), default="day", help="Throughput trend granularity")
+    parser.add_argument("--since", help="Only records newer than this, e.g. 7d, 12h or 2026-01-31")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    since = parse_since(args.since) if args.since else None
+    summary = summarize(iter_records(args.log, since), top=args.top, bucket=args.bucket)
+    print(json.dumps(summary, indent=2, default=str) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
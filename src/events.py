@@ -0,0 +1,49 @@
+##################################### Event Bus Module ########################################
+#
+# Minimal in-process publish/subscribe. The watcher and the pipeline publish what they
+# did; the dashboard (and anything else interested) subscribes instead of re-deriving
+# state from the file system.
+#
+# Topics:
+#   pdf.created / pdf.deleted   {"path"}                          watcher saw a PDF appear/vanish
+#   note.written                {"path", "created"}               a connector wrote a note file
+#   pipeline.result             {"path", "outcome", "status", ...} process_pdf finished (see eventlog)
+#   scan.finished               {"files", "summary", "full"}      scan_library went through its PDFs
+#                                                                  ("full": the whole library folder)
+#   config.changed              {"changed", "old", "new"}          config.yaml was reloaded with changes
+#
+##############################################################################################
+import logging
+import threading
+from collections import defaultdict
+
+_SUBSCRIBERS = defaultdict(list)
+_LOCK = threading.Lock()
+
+
+def subscribe(topic, callback):
+    """Registers `callback(payload: dict)` for `topic`."""
+    with _LOCK:
+        if callback not in _SUBSCRIBERS[topic]:
+            _SUBSCRIBERS[topic].append(callback)
+
+
+def unsubscribe(topic, callback):
+    with _LOCK:
+        if callback in _SUBSCRIBERS[topic]:
+            _SUBSCRIBERS[topic].remove(callback)
+
+
+def publish(topic, **payload):
+    """
+    Delivers `payload` to every subscriber of `topic` on the calling thread.
+
+    Subscribers must be quick; a failing subscriber is logged and never breaks the publisher.
+    """
+    with _LOCK:
+        callbacks = list(_SUBSCRIBERS.get(topic, ()))
+    for callback in callbacks:
+        try:
+            callback(payload)
+        except Exception as e:
+            logging.warning(f"Event subscriber for '{topic}' failed: {e}")
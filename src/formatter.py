@@ -1,11 +1,12 @@
 import re
 from typing import List, Tuple, Dict, Any
+from runconfig import RunConfig
 
 def render_page_annotations(
     page_num: int,
     annots: List[Dict[str, Any]],
     annotated_doc,
-    config: Dict[str, Any],
+    config,
     pdf_basename: str = None,
     ranNum=1,
 ):
@@ -14,12 +15,15 @@ def render_page_annotations(
     annots: List of annotation dicts (from pdfUtils._parse_annotations output)
             Keys: 'type', 'highlight_text', 'comment', 'rect', 'shape_type'
     annotated_doc: MarkdownBuilder object
-    config: full configuration dictionary
+    config: RunConfig with the resolved trigger tokens and page link settings
+            (a raw configuration dict is resolved on the fly)
     pdf_basename: optional PDF file basename used to build page links
     """
     
     output: List[Tuple[str, int, str]] = []
     # Tuple: (kind: 'heading'|'bullet'|'quote'|'task'|'image', level, text)
+    run_config = RunConfig.from_config(config) if isinstance(config, dict) else config
+    triggers = run_config.triggers
 
     for annot in annots:
         # Filter for the current page if not already filtered
@@ -47,20 +51,8 @@ def render_page_annotations(
             continue
 
         # --- 2. Syntax Parsing for Highlights ---
-        a_set = config.get("annotation_settings", {})
-        
-        def get_triggers(key, default):
-            val = a_set.get(key, default)
-            if isinstance(val, str):
-                return [t.strip() for t in val.split(",") if t.strip()]
-            return val if isinstance(val, list) else [default]
-
-        h_triggers = get_triggers("symbol_heading", ".h1")
-        q_triggers = get_triggers("symbol_quote", ">>")
-        t_triggers = get_triggers("symbol_todo", ".todo")
-
         # Rule: Headers
-        found_h = next((t for t in h_triggers if comment.startswith(t)), None)
+        found_h = triggers.match_heading(comment)
         if found_h:
             clean_comment = comment[len(found_h):].strip()
             text = clean_comment if clean_comment else highlight
@@ -68,7 +60,7 @@ def render_page_annotations(
             continue
         
         # Rule: Quotes
-        found_q = next((t for t in q_triggers if comment.startswith(t)), None)
+        found_q = triggers.match_quote(comment)
         if found_q or comment.startswith(".q"): # keep .q as hardcoded fallback or override?
             prefix = found_q if found_q else ".q"
             clean_comment = comment[len(prefix):].strip()
@@ -79,7 +71,7 @@ def render_page_annotations(
             continue
 
         # Rule: Tasks
-        found_t = next((t for t in t_triggers if comment.startswith(t)), None)
+        found_t = triggers.match_todo(comment)
         if found_t:
             clean_comment = comment[len(found_t):].strip()
             text = highlight
@@ -104,18 +96,11 @@ def render_page_annotations(
             annotated_doc.add_heading(text, level=level)
             
             # Page Link
-            try:
-                pl_conf = config.get("output_settings", {}).get("page_link_settings", {})
-                if pl_conf.get("include_page_links", True):
-                    link_text = f"[[{pdf_basename}#page={page_num}]]"
-                    visible_flag = pl_conf.get("visible_links", None)
-                    is_visible = bool(visible_flag) if visible_flag is not None else (pl_conf.get("link_style", "hidden") == "visible")
-                    
-                    if not is_visible:
-                         link_text = f"%%{link_text}%%"
-                    annotated_doc.content += f"{link_text}\n"
-            except Exception:
-                pass
+            if run_config.include_page_links:
+                link_text = f"[[{pdf_basename}#page={page_num}]]"
+                if not run_config.visible_page_links:
+                     link_text = f"%%{link_text}%%"
+                annotated_doc.content += f"{link_text}\n"
             annotated_doc.add_spacer(1)
             
         elif kind == "image":
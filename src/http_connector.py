@@ -0,0 +1,350 @@
+################################### HTTP Connector Module ####################################
+#
+# Pushes notes to a local note-server REST endpoint as JSON {"title", "content", "path"}.
+#
+# Requests go over persistent keep-alive connections from a small pool (stdlib
+# http.client, no extra dependency). Transient failures (connection errors, 408, 429,
+# 5xx) are retried with exponential backoff for at most `retry_budget_seconds`, which
+# stays below the pipeline's per-connector timeout (the pipeline does not retry this
+# connector itself); if the endpoint stays down the note goes to a bounded in-memory
+# backlog, which spills to disk when full and on exit, and a background thread delivers
+# the backlog once the endpoint is reachable again. close() runs on quit
+# (ConnectorFactory.close_all).
+#
+# Configured as a connector entry, e.g.:
+#   connectors:
+#   - {type: http, url: "http://127.0.0.1:8765/notes", concurrency: 4}
+#
+##############################################################################################
+import atexit
+import hashlib
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import settings
+from connectors import NoteConnector
+
+
+class TransientError(Exception):
+    """The endpoint could not take the note right now; worth retrying later."""
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, at most `size` in use at a time."""
+
+    def __init__(self, url, size=4, timeout=10.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported connector url: {url!r}")
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += "?" + parts.query
+        self.timeout = float(timeout)
+        self.idle = queue.LifoQueue()  # most recently used first, so idle extras time out server-side
+        self.slots = threading.BoundedSemaphore(max(1, int(size)))
+        self.created = 0
+
+    @contextmanager
+    def connection(self):
+        with self.slots:
+            try:
+                conn, reused = self.idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self.connection_class(self.host, self.port, timeout=self.timeout), False
+                self.created += 1
+            try:
+                yield conn, reused
+            except BaseException:
+                conn.close()
+                raise
+            self.idle.put(conn)
+
+    def request(self, method, body, headers):
+        """
+        Sends one request on a pooled connection.
+
+        Returns:
+            tuple: (status, response body bytes).
+        """
+        for attempt in (1, 2):
+            with self.connection() as (conn, reused):
+                try:
+                    conn.request(method, self.path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # The server closed an idle keep-alive connection; retry once on a fresh one
+                    if reused and attempt == 1:
+                        conn.close()
+                        continue
+                    raise
+                if response.will_close:
+                    conn.close()
+                return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HttpConnector(NoteConnector):
+    """Posts notes to an HTTP endpoint; see the module header."""
+
+    handles_retries = True
+
+    def __init__(self, url: str, method: str = "POST", headers: Optional[dict] = None,
+                 concurrency: int = 4, request_timeout: float = 10.0, max_retries: int = 3,
+                 backoff_seconds: float = 0.5, max_backoff_seconds: float = 60.0,
+                 retry_budget_seconds: float = 20.0, backlog_size: int = 1000,
+                 spill_folder: Optional[str] = None):
+        """
+        Args:
+            url (str): Endpoint the notes are sent to.
+            method (str): HTTP method, POST or PUT.
+            headers (dict, optional): Extra request headers, e.g. an Authorization token.
+            concurrency (int): Pooled connections, i.e. requests in flight at once.
+            request_timeout (float): Socket timeout of a single request.
+            max_retries (int): Retries of a transient failure before the note is backlogged.
+            backoff_seconds (float): First retry delay; doubled per attempt up to max_backoff_seconds.
+            retry_budget_seconds (float): Time a note may spend on attempts and backoff
+                before it is backlogged; no retry starts that could not finish within it.
+                Keep it below the connector's timeout_seconds (30 by default).
+            backlog_size (int): Notes kept in memory while the endpoint is down; older ones
+                spill to disk.
+            spill_folder (str, optional): Where spilled notes are kept. Defaults to a folder
+                per url under the app data directory.
+        """
+        self.url = url
+        self.method = method.upper()
+        self.headers = {"Content-Type": "application/json; charset=utf-8", **(headers or {})}
+        self.pool = ConnectionPool(url, concurrency, request_timeout)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(concurrency)), thread_name_prefix="annotes-http")
+        self.max_retries = int(max_retries)
+        self.backoff = float(backoff_seconds)
+        self.max_backoff = float(max_backoff_seconds)
+        self.retry_budget = float(retry_budget_seconds)
+        self.backlog_size = max(0, int(backlog_size))
+        url_key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        self.spill_folder = Path(spill_folder) if spill_folder else settings.USER_DATA_DIR / "http_backlog" / url_key
+
+        self.backlog = OrderedDict()  # {key: note}, oldest first; a newer note for a path replaces it
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.drainer = None
+        self.sent = 0
+        # Keys of the notes in the spill folder, oldest first: listed once here, then kept
+        # up to date (under self.lock) as notes are spilled and sent
+        self.spilled = OrderedDict((path.stem, None) for path in self._spilled_files())
+        _CONNECTORS.add(self)
+        if self.spilled:
+            self._start_drainer()  # left over from an earlier run
+
+    # --- Sending ---
+    def _send(self, note):
+        payload = {"title": note["title"], "content": note["content"], "path": note.get("output_path")}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            status, data = self.pool.request(self.method, body, dict(self.headers, **{"Content-Length": str(len(body))}))
+        except (OSError, http.client.HTTPException) as e:
+            raise TransientError(f"{self.url}: {e}") from e
+        if status in (408, 429) or status >= 500:
+            raise TransientError(f"{self.url} answered {status}")
+        if status >= 400:
+            raise RuntimeError(f"{self.url} rejected '{note['title']}' with {status}: {data[:200]!r}")
+        with self.lock:
+            self.sent += 1
+
+    def _send_with_retries(self, note):
+        deadline = time.monotonic() + self.retry_budget
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._send(note)
+            except TransientError as e:
+                # Only retry if another attempt (up to its socket timeout) fits the budget
+                if attempt == self.max_retries or time.monotonic() + delay + self.pool.timeout > deadline:
+                    raise
+                logging.warning(f"HTTP connector: {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def _deliver(self, note):
+        """Sends a note, or backlogs it if the endpoint stays unreachable."""
+        note = {"title": note["title"], "content": note["content"], "output_path": note.get("output_path")}
+        if self._backlog_pending():
+            # Keep order: while a backlog exists, new notes queue up behind it
+            self._enqueue(note)
+            return "backlogged"
+        try:
+            self._send_with_retries(note)
+            return "sent"
+        except TransientError as e:
+            logging.error(f"HTTP connector: endpoint unavailable, backlogging '{note['title']}': {e}")
+            self._enqueue(note)
+            return "backlogged"
+
+    def push_note(self, title: str, content: str, output_path: Optional[str] = None):
+        return self._deliver({"title": title, "content": content, "output_path": output_path})
+
+    def push_notes(self, batch: List[dict]) -> list:
+        """Sends the batch over up to `concurrency` connections at once."""
+        return list(self.executor.map(self._deliver, batch))
+
+    # --- Backlog ---
+    @staticmethod
+    def _key(note):
+        return hashlib.sha1(str(note.get("output_path") or note["title"]).encode("utf-8")).hexdigest()
+
+    def _backlog_pending(self):
+        with self.lock:
+            return bool(self.backlog) or bool(self.spilled)
+
+    # The in-memory backlog and the spill folder only change under self.lock, so the
+    # drainer always sees a note in exactly one of them.
+    def _enqueue(self, note):
+        key = self._key(note)
+        with self.lock:
+            self.backlog.pop(key, None)
+            self.backlog[key] = note
+            while len(self.backlog) > self.backlog_size:
+                self._spill(*self.backlog.popitem(last=False))
+        self._start_drainer()
+
+    def _spill(self, key, note):
+        self.spill_folder.mkdir(parents=True, exist_ok=True)
+        path = self.spill_folder / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(note, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.spilled.pop(key, None)
+        self.spilled[key] = None  # a respilled note moves to the back, as its mtime did
+
+    def _unspill(self, key):
+        """Deletes a spilled note; the caller holds self.lock."""
+        self.spilled.pop(key, None)
+        (self.spill_folder / f"{key}.json").unlink(missing_ok=True)
+
+    def _spilled_files(self):
+        """Spill folder listing, oldest first; only read at startup."""
+        try:
+            return sorted(self.spill_folder.glob("*.json"), key=lambda p: p.stat().st_mtime_ns)
+        except OSError:
+            return []
+
+    def spill(self):
+        """Moves the in-memory backlog to disk (on exit); it is sent on the next start."""
+        with self.lock:
+            items = list(self.backlog.items())
+            self.backlog.clear()
+            for key, note in items:
+                self._spill(key, note)
+        return len(items)
+
+    def _next_backlogged(self):
+        """Oldest backlogged note as (note, done callback), or None."""
+        with self.lock:
+            while self.spilled:
+                key = next(iter(self.spilled))
+                path = self.spill_folder / f"{key}.json"
+                # A newer version of the same note may be waiting in memory; send that instead
+                if key in self.backlog:
+                    self._unspill(key)
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        note = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.error(f"HTTP connector: dropping unreadable backlog file {path}: {e}")
+                    self._unspill(key)
+                    continue
+                return note, self._done_callback(key, note)
+            if not self.backlog:
+                return None
+            key, note = next(iter(self.backlog.items()))
+            return note, self._done_callback(key, note)
+
+    def _done_callback(self, key, note):
+        """Removes a sent note from the backlog, unless a newer version replaced it meanwhile."""
+        def done():
+            with self.lock:
+                if self.backlog.get(key) is note:
+                    del self.backlog[key]
+                    return
+                path = self.spill_folder / f"{key}.json"
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        same = json.load(f) == note
+                except (OSError, ValueError):
+                    return
+                if same:
+                    self._unspill(key)
+        return done
+
+    def _start_drainer(self):
+        with self.lock:
+            if self.drainer is None or not self.drainer.is_alive():
+                self.drainer = threading.Thread(target=self._drain, name="annotes-http-backlog", daemon=True)
+                self.drainer.start()
+        self.wakeup.set()
+
+    def _drain(self):
+        delay = self.backoff
+        while not self.stopped.is_set():
+            item = self._next_backlogged()
+            if item is None:
+                self.wakeup.clear()
+                if self._next_backlogged() is None:
+                    self.wakeup.wait(self.max_backoff)
+                continue
+            note, done = item
+            try:
+                self._send(note)
+            except TransientError as e:
+                logging.debug(f"HTTP connector: backlog still waiting ({e}), next try in {delay:.1f}s")
+                self.stopped.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            except Exception as e:
+                logging.error(f"HTTP connector: dropping backlogged '{note.get('title')}': {e}")
+            done()
+            delay = self.backoff
+
+    def close(self):
+        """Stops the backlog thread, spills what is left and closes the connections."""
+        self.stopped.set()
+        self.wakeup.set()
+        self.spill()
+        self.executor.shutdown(wait=False)
+        self.pool.close()
+
+
+_CONNECTORS = weakref.WeakSet()
+
+
+@atexit.register
+def _spill_all():
+    for connector in list(_CONNECTORS):
+        try:
+            connector.spill()
+        except Exception as e:
+            logging.error(f"HTTP connector: could not save backlog: {e}")
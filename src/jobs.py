@@ -0,0 +1,216 @@
+###################################### Jobs Module ###########################################
+#
+# On-demand processing requested from the dashboard or the tray ("Scan Now").
+# Single-PDF jobs go straight onto the shared worker pool at manual priority, so they
+# overtake the remaining files of a running library scan. Scan jobs are queued and
+# coordinated one at a time; their per-PDF work runs on the same pool at scan priority.
+# Every state change is pushed to dashboard clients as an SSE "job" event.
+#
+##############################################################################################
+import json
+import queue
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import annotes
+import runconfig
+from utils import get_pdf_files
+from broadcaster import BROADCASTER
+from workers import get_pool, PRIORITY_MANUAL, PRIORITY_SCAN
+
+JOB_HISTORY_LIMIT = 200  # finished jobs kept for GET /jobs/{id}
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """A unit of on-demand work: one PDF (`kind="pdf"`) or a library scan (`kind="scan"`)."""
+
+    def __init__(self, kind, path=None, priority=PRIORITY_MANUAL, source="dashboard"):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.path = path
+        self.priority = priority
+        self.source = source
+        self.status = QUEUED
+        self.progress = {"done": 0, "total": 1 if kind == "pdf" else None}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.future = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "path": self.path,
+            "priority": self.priority,
+            "source": self.source,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def wait(self, timeout=None):
+        """Blocks until the job finished; returns True if it did."""
+        return self.done_event.wait(timeout)
+
+
+class JobManager:
+    """Creates, runs, tracks and cancels jobs."""
+
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()  # {id: Job}, oldest first
+        self.scan_queue = queue.PriorityQueue()
+        self.scan_counter = 0
+        self.scan_thread = None
+
+    def get_pool(self):
+        return self.pool or get_pool()
+
+    # --- Bookkeeping ---
+    def _register(self, job):
+        with self.lock:
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.status in FINISHED]
+            for old in finished[:max(0, len(self.jobs) - JOB_HISTORY_LIMIT)]:
+                del self.jobs[old.id]
+        self._notify(job)
+
+    def _notify(self, job):
+        BROADCASTER.publish(json.dumps(job.to_dict(), default=str), event="job")
+
+    def _start(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._notify(job)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        self._notify(job)
+        job.done_event.set()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    # --- Single PDF jobs ---
+    def submit_pdf(self, path, priority=PRIORITY_MANUAL, source="dashboard"):
+        """Queues one PDF; an identical job that has not started yet is reused."""
+        with self.lock:
+            for job in self.jobs.values():
+                if job.kind == "pdf" and job.path == path and job.status == QUEUED:
+                    return job
+        job = Job("pdf", path=path, priority=priority, source=source)
+        job.future = self.get_pool().submit(self._run_pdf, job, priority=priority)
+        self._register(job)
+        return job
+
+    def _run_pdf(self, job):
+        self._start(job)
+        try:
+            status = annotes.process_pdf(job.path)
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed for {job.path}: {e}")
+            self._finish(job, FAILED, error=str(e))
+            return
+        job.progress["done"] = 1
+        if status and status.startswith("failed"):
+            self._finish(job, FAILED, result=status, error=status)
+        else:
+            self._finish(job, DONE, result=status or "synced")
+
+    # --- Scan jobs ---
+    def submit_scan(self, priority=PRIORITY_SCAN, source="dashboard"):
+        """Queues a full library scan; scans run one after another, never concurrently."""
+        job = Job("scan", priority=priority, source=source)
+        self._register(job)
+        with self.lock:
+            self.scan_counter += 1
+            self.scan_queue.put((priority, self.scan_counter, job))
+            if self.scan_thread is None or not self.scan_thread.is_alive():
+                self.scan_thread = threading.Thread(target=self._scan_loop, name="annotes-scan-jobs", daemon=True)
+                self.scan_thread.start()
+        return job
+
+    def _scan_loop(self):
+        while True:
+            try:
+                _, _, job = self.scan_queue.get(timeout=30)
+            except queue.Empty:
+                with self.lock:
+                    if self.scan_queue.empty():
+                        self.scan_thread = None
+                        return
+                continue
+            if job.status == CANCELLED:
+                continue
+            self._run_scan(job)
+
+    def _run_scan(self, job):
+        self._start(job)
+
+        def on_result(pdf_path, status):
+            job.progress["done"] += 1
+            self._notify(job)
+
+        try:
+            run_config = runconfig.current()  # one config for the whole scan
+            pdf_files = get_pdf_files(run_config.pdf_folder)
+            job.progress["total"] = len(pdf_files)
+            self._notify(job)
+            # The coordinator waits here while the per-PDF work runs on the pool
+            summary = annotes.scan_library(
+                pool=self.get_pool(), on_result=on_result, priority=job.priority,
+                cancel_event=job.cancel_event, pdf_files=pdf_files, run_config=run_config,
+            )
+        except Exception as e:
+            logging.exception(f"Scan job {job.id} failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+            return
+        self._finish(job, CANCELLED if job.cancel_event.is_set() else DONE, result=summary)
+
+    # --- Cancellation ---
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs never start; a running scan stops submitting files.
+        A single PDF that is already being processed runs to completion.
+
+        Returns:
+            bool: True if the job will not (fully) run.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_event.set()
+        if job.status == QUEUED:
+            if job.future is not None and not job.future.cancel():
+                return False
+            self._finish(job, CANCELLED)
+            return True
+        return job.kind == "scan"
+
+
+# Shared manager used by the dashboard and the tray
+MANAGER = JobManager()
@@ -0,0 +1,99 @@
+################################### JSONL Export Module ######################################
+#
+# Streams parsed annotations as JSON Lines, one object per annotation, for analytics
+# jobs that want the highlights themselves rather than the rendered markdown.
+#
+# Records are written as each page is parsed (PdfUtils.iter_page_annotations), so a
+# large PDF starts producing output immediately and memory stays flat. No markdown is
+# built. Used by `annotes.py --format jsonl [--output FILE] [PATH ...]`.
+#
+##############################################################################################
+import json
+import logging
+import os
+
+from pdfutils import PdfUtils
+
+
+def annotation_record(annot, pdf_path):
+    """Parsed annotation dict -> JSON-serializable record."""
+    mod_date = annot.get("modDate")
+    colors = annot.get("colors") or {}
+    return {
+        "pdf": str(pdf_path),
+        "page": annot.get("page"),
+        "type": annot.get("type"),
+        "highlight_text": annot.get("highlight_text", ""),
+        "comment": annot.get("comment", ""),
+        "modDate": mod_date.isoformat() if hasattr(mod_date, "isoformat") else mod_date,
+        "colors": {k: list(v) if v is not None else None for k, v in colors.items()},
+        "rect": list(annot.get("rect") or ()),
+        "shape_type": annot.get("shape_type"),
+        "info": annot.get("info") or {},
+    }
+
+
+def export_pdf(pdf_path, out):
+    """
+    Writes the annotations of one PDF to the text stream `out`, flushing after every page.
+
+    Returns:
+        int: Number of records written.
+    """
+    written = 0
+    document = PdfUtils.open_pdf(pdf_path)
+    try:
+        for _, page_annotations in PdfUtils().iter_page_annotations(document):
+            if not page_annotations:
+                continue
+            out.write("".join(
+                json.dumps(annotation_record(annot, pdf_path), ensure_ascii=False, default=str) + "\n"
+                for annot in page_annotations
+            ))
+            out.flush()
+            written += len(page_annotations)
+    finally:
+        document.close()
+    return written
+
+
+def export_files(pdf_files, out, on_result=None):
+    """
+    Exports several PDFs one after another; a broken PDF is logged and skipped.
+
+    Args:
+        on_result (func, optional): Called with (pdf_path, records, error) per PDF.
+
+    Returns:
+        dict: Counts of files, exported records and failed PDFs.
+    """
+    summary = {"files": 0, "records": 0, "failed": 0}
+    for pdf_path in pdf_files:
+        summary["files"] += 1
+        try:
+            records = export_pdf(pdf_path, out)
+        except BrokenPipeError:
+            raise  # the reader went away (e.g. `| head`); stop quietly upstream
+        except Exception as e:
+            logging.error(f"JSONL export of {pdf_path} failed: {e}")
+            summary["failed"] += 1
+            if on_result:
+                on_result(pdf_path, 0, e)
+            continue
+        summary["records"] += records
+        if on_result:
+            on_result(pdf_path, records, None)
+    return summary
+
+
+def collect_pdf_files(paths):
+    """Expands files and folders (their *.pdf, recursively) into a sorted list of PDFs."""
+    pdf_files = []
+    for path in paths:
+        path = os.path.expanduser(str(path))
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                pdf_files.extend(os.path.join(root, n) for n in names if n.lower().endswith(".pdf"))
+        elif path.lower().endswith(".pdf"):
+            pdf_files.append(path)
+    return sorted(pdf_files)
@@ -0,0 +1,74 @@
+################################### I/O Ledger Module #######################################
+#
+# Short-lived record of the files Annotes itself reads and writes (path, mtime, size).
+# The watcher consults it to drop file-system events caused by our own activity,
+# e.g. notes or assets written inside a watched tree, or a sync client touching a
+# PDF right after we read it without changing its content.
+#
+##############################################################################################
+import os
+import time
+import threading
+
+
+class IOLedger:
+    """Thread-safe ledger of recent self-performed file I/O."""
+
+    def __init__(self, ttl=30.0, max_entries=10000):
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid.
+            max_entries (int): Upper bound on remembered paths; oldest are evicted first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}  # {path: (mtime_ns, size, expires_at)}
+        self.lock = threading.Lock()
+
+    def record(self, path, st=None):
+        """Records that we just read or wrote `path`. Pass `st` to reuse an existing stat."""
+        path = os.path.abspath(str(path))
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+        with self.lock:
+            self.entries.pop(path, None)
+            self.entries[path] = (st.st_mtime_ns, st.st_size, time.monotonic() + self.ttl)
+            while len(self.entries) > self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+
+    def matches(self, path):
+        """
+        Checks whether the file at `path` is still exactly as we left it.
+
+        Returns:
+            bool: True if a live entry exists and the current mtime and size match it.
+        """
+        path = os.path.abspath(str(path))
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return False
+            if entry[2] < time.monotonic():
+                del self.entries[path]
+                return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == entry[:2]
+
+    def forget(self, path):
+        with self.lock:
+            self.entries.pop(os.path.abspath(str(path)), None)
+
+
+# Process-wide ledger shared by the pipeline, connectors and watcher
+LEDGER = IOLedger()
+
+
+def record_io(path, st=None):
+    """Records a read or write we performed on `path` in the shared ledger."""
+    LEDGER.record(path, st)
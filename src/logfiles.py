@@ -0,0 +1,491 @@
+#################################### Log Files Module ########################################
+#
+# Rotation and export of app.log. The log is rotated by size and age into gzip
+# archives (app.log.1.gz, app.log.2.gz, ...). Exports never load the log into memory:
+# `tail`, level and time filters walk the file backwards in fixed-size blocks and stop
+# as soon as enough records were found, and archive bundles are streamed as a tar.
+#
+# Logging itself is queued: the root logger only formats a record (once) and enqueues
+# it, and a single listener thread feeds the file and dashboard sinks, so workers never
+# wait on log I/O. setup_logging() wires this up for the apps without loading the PDF
+# pipeline, so the tray and watcher start before PyMuPDF is imported.
+#
+# The notes-folder history (annotes.log) stays open and is flushed periodically instead
+# of being reopened for every synced PDF.
+#
+##############################################################################################
+import os
+import re
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import tarfile
+import threading
+import logging.handlers
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import settings
+from ledger import record_io
+
+DEFAULT_MAX_SIZE_MB = 10
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_DAYS = 7
+BLOCK_SIZE = 64 * 1024
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# "2026-01-31 12:00:00,123 - WARNING - message"; other lines continue the previous record
+RECORD_RE = re.compile(rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3} - ([A-Z]+) - ")
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also rotates by age and gzips rotated files."""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_seconds=0, encoding="utf-8"):
+        super().__init__(filename, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.rotate_seconds = rotate_seconds
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        # Age counts from the log's first record, so restarting the app does not reset it
+        started = _first_record_time(self.baseFilename) or time.time()
+        self.rollover_at = started + rotate_seconds if rotate_seconds else None
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.rollover_at is None or time.time() < self.rollover_at:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        # Never archive an empty log just because time passed
+        return self.stream.tell() > 0
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rotate_seconds:
+            self.rollover_at = time.time() + self.rotate_seconds
+
+
+def _first_record_time(path):
+    """
+    Epoch seconds of the first record in a log (app.log header or events.jsonl "time"),
+    falling back to the file's creation time where the platform knows it. None if the
+    file is missing or empty.
+    """
+    try:
+        with open(path, "rb") as f:
+            first = f.readline(4096)
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not first.strip():
+        return None
+    when, _ = _parse_header(first)
+    if when is None:
+        try:
+            when = datetime.fromisoformat(json.loads(first)["time"])
+        except (ValueError, KeyError, TypeError):
+            when = None
+    if when is not None:
+        return when.timestamp()
+    return getattr(st, "st_birthtime", st.st_mtime)
+
+
+def create_handler(log_path, log_settings=None):
+    """Builds the app.log handler from the `logging_settings` config section."""
+    log_settings = log_settings or {}
+    return CompressingRotatingFileHandler(
+        log_path,
+        max_bytes=int(float(log_settings.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024),
+        backup_count=int(log_settings.get("backup_count", DEFAULT_BACKUP_COUNT)),
+        rotate_seconds=float(log_settings.get("rotate_days", DEFAULT_ROTATE_DAYS)) * 86400,
+    )
+
+
+# --- Queued logging ---
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class LogListener(logging.handlers.QueueListener):
+    """QueueListener that can confirm everything queued so far reached the sinks."""
+
+    def handle(self, record):
+        if isinstance(record, _FlushMarker):
+            record.done.set()
+            return
+        super().handle(record)
+
+    def flush(self, timeout=1.0):
+        if self._thread is None:
+            return False
+        marker = _FlushMarker()
+        self.queue.put_nowait(marker)
+        return marker.done.wait(timeout)
+
+
+_LISTENER = None
+
+
+def start_queue_logging(handlers, level=logging.INFO, fmt=LOG_FORMAT):
+    """
+    Routes root logging through a queue drained by one background thread.
+
+    The record is formatted once, by the QueueHandler (`fmt`); `handlers` receive the
+    finished line as the message and must not format it again, so they get a plain
+    "%(message)s" formatter. Handler levels are respected.
+    """
+    global _LISTENER
+    stop_queue_logging()
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter(fmt))
+    passthrough = logging.Formatter("%(message)s")
+    for handler in handlers:
+        handler.setFormatter(passthrough)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _LISTENER = LogListener(log_queue, *handlers, respect_handler_level=True)
+    _LISTENER.queue_handler = queue_handler
+    _LISTENER.start()
+    return _LISTENER
+
+
+def flush_logging(timeout=1.0):
+    """Waits until records logged so far were handed to the sinks."""
+    return _LISTENER.flush(timeout) if _LISTENER else False
+
+
+def stop_queue_logging():
+    """Drains the queue and closes the sinks (on exit or before reconfiguring)."""
+    global _LISTENER
+    listener, _LISTENER = _LISTENER, None
+    if listener is None:
+        return
+    logging.getLogger().removeHandler(listener.queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_queue_logging)
+
+
+# In-memory log buffer for the dashboard (keeps last 50 events)
+LOG_BUFFER = deque(maxlen=50)
+
+
+def setup_logging():
+    """Configures queued logging to file and memory buffer."""
+    from broadcaster import BROADCASTER
+    import eventlog  # imports this module
+
+    settings.initialize()  # loads config.yaml once; creates the user data dir
+
+    # 1. File Handler (app.log), rotated by size and age into gzip archives
+    # Use persistent log path from settings
+    log_file = settings.USER_DATA_DIR / "app.log"
+    file_handler = create_handler(log_file, (settings.CONFIG or {}).get("logging_settings"))
+    file_handler.setLevel(logging.INFO)
+
+    # 2. Memory Handler (for Dashboard)
+    class DequeHandler(logging.Handler):
+        def emit(self, record):
+            log_entry = self.format(record)
+            LOG_BUFFER.append(log_entry)
+            # Push to live dashboard clients (never blocks the logging thread)
+            BROADCASTER.publish(log_entry.replace("\n", " "))
+
+    mem_handler = DequeHandler()
+    mem_handler.setLevel(logging.INFO)
+
+    # Records are formatted once and queued; one listener thread writes them to both sinks
+    start_queue_logging([file_handler, mem_handler], level=logging.INFO)
+
+    # 3. Per-document event log (events.jsonl), summarized by `python eventlog.py`
+    eventlog.start()
+
+
+def get_recent_logs():
+    """Returns list of recent log entries from memory."""
+    flush_logging()
+    return list(LOG_BUFFER)
+
+
+# --- Notes-folder history ---
+NOTES_LOG_FLUSH_SECONDS = 2.0
+
+
+class NotesLog:
+    """Appends lines to history files that stay open; a background thread flushes them."""
+
+    def __init__(self, flush_interval=NOTES_LOG_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self.files = {}  # {path: open file}
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def write(self, path, line):
+        path = str(path)
+        with self.lock:
+            f = self.files.get(path)
+            if f is None:
+                f = self.files[path] = open(path, "a", encoding="utf-8")
+            f.write(line)
+            self.dirty.add(path)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="annotes-notes-log", daemon=True)
+                self.thread.start()
+
+    def flush(self):
+        with self.lock:
+            for path in self.dirty:
+                f = self.files[path]
+                f.flush()
+                if os.path.exists(path):
+                    record_io(path)
+                else:
+                    # Deleted or moved while open: reopen on the next write
+                    f.close()
+                    del self.files[path]
+            self.dirty.clear()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Flushing the notes log failed: {e}")
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
+
+
+NOTES_LOG = NotesLog()
+atexit.register(NOTES_LOG.close)
+
+
+def archive_paths(log_path):
+    """Rotated archives of `log_path`, oldest first."""
+    log_path = Path(log_path)
+    archives = []
+    for path in log_path.parent.glob(log_path.name + ".*.gz"):
+        index = path.name[len(log_path.name) + 1:-3]
+        if index.isdigit():
+            archives.append((int(index), path))
+    return [path for _, path in sorted(archives, reverse=True)]
+
+
+def read_lines_reverse(path, block_size=BLOCK_SIZE):
+    """Yields the lines of `path` (bytes, without newline) from last to first."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + remainder).split(b"\n")
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+        yield remainder
+
+
+def _parse_header(line):
+    match = RECORD_RE.match(line)
+    if not match:
+        return None, None
+    try:
+        when = datetime.strptime(match.group(1).decode("ascii"), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None, None
+    return when, match.group(2).decode("ascii")
+
+
+def parse_time(value):
+    """Accepts ISO dates/datetimes ("2026-01-31", "2026-01-31T12:00") or None."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", ""))
+
+
+def _matches(when, level, min_level, until):
+    if min_level and LEVELS.get(level, 0) < min_level:
+        return False
+    if until is not None and when is not None and when > until:
+        return False
+    return True
+
+
+def read_records_reverse(path, block_size=BLOCK_SIZE):
+    """
+    Yields (time, level, lines) records from newest to oldest. Continuation lines
+    (tracebacks) stay attached to the record they belong to.
+    """
+    continuation = []
+    for line in read_lines_reverse(path, block_size):
+        continuation.append(line)
+        when, level = _parse_header(line)
+        if when is None:
+            continue
+        yield when, level, list(reversed(continuation))
+        continuation = []
+    if continuation:
+        yield None, None, list(reversed(continuation))
+
+
+def filtered_lines(path, tail=None, level=None, since=None, until=None):
+    """
+    Returns the matching lines of the log, oldest first.
+
+    Args:
+        tail (int, optional): Keep only the last N matching records.
+        level (str, optional): Minimum level name, e.g. "WARNING".
+        since, until (datetime, optional): Inclusive time window.
+    """
+    min_level = LEVELS.get(level.upper(), 0) if level else 0
+    records = []
+    for when, record_level, lines in read_records_reverse(path):
+        if since is not None and when is not None and when < since:
+            break  # the log is chronological, everything further back is older
+        if when is None and (min_level or since is not None):
+            continue
+        if not _matches(when, record_level, min_level, until):
+            continue
+        records.append(lines)
+        if tail and len(records) >= tail:
+            break
+    return [line for lines in reversed(records) for line in lines if line]
+
+
+def since_offset(path, since, block_size=BLOCK_SIZE):
+    """
+    Byte offset of the first record at or after `since`, found by reading backwards
+    only as far as the window reaches. Returns the file size if no record qualifies.
+    """
+    end = os.path.getsize(path)
+    offset = end
+    for line in read_lines_reverse(path, block_size):
+        start = end - len(line)
+        end = start - 1  # the newline before this line
+        when, _ = _parse_header(line)
+        if when is None:
+            continue
+        if when < since:
+            break  # the log is chronological, everything further back is older
+        offset = start
+    return offset
+
+
+def iter_filtered(path, level=None, since=None, until=None):
+    """
+    Streams matching records oldest first (no tail). With `since`, only the part of
+    the log before the window is read backwards to find where to start.
+    """
+    min_level = LEVELS.get(level.upper(), 0) if level else 0
+    keep = not min_level
+    start = since_offset(path, since) if since is not None else 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            when, record_level = _parse_header(line)
+            if when is not None:
+                keep = _matches(when, record_level, min_level, until)
+            if keep:
+                yield line
+
+
+def iter_range(path, start, end, chunk_size=BLOCK_SIZE):
+    """Streams bytes start..end (inclusive) of `path`."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(header, size):
+    """
+    Parses a single "bytes=start-end" Range header.
+
+    Returns:
+        tuple or None: (start, end) inclusive, or None when the header is absent/unsupported.
+
+    Raises:
+        ValueError: The range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length <= 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_bundle(paths, chunk_size=BLOCK_SIZE):
+    """
+    Streams `paths` as an uncompressed tar (the archives are gzipped already). Each file
+    is cut at the size it had when its header was written, so a log still being appended
+    to cannot corrupt the stream.
+    """
+    for path in paths:
+        path = Path(path)
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        info = tarfile.TarInfo(name=path.name)
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+        written = 0
+        with open(path, "rb") as f:
+            while written < info.size:
+                chunk = f.read(min(chunk_size, info.size - written))
+                if not chunk:
+                    break
+                written += len(chunk)
+                yield chunk
+        if written < info.size:
+            yield b"\0" * (info.size - written)  # truncated meanwhile; keep the tar valid
+        padding = -info.size % tarfile.BLOCKSIZE
+        if padding:
+            yield b"\0" * padding
+    yield b"\0" * (tarfile.BLOCKSIZE * 2)
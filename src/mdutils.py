@@ -1,4 +1,4 @@
-import settings
+import runconfig
 
 
 class MarkdownBuilder:
@@ -9,9 +9,16 @@ class MarkdownBuilder:
         content (str): The accumulated Markdown content string.
     """
 
-    def __init__(self):
-        """Initializes the MarkdownBuilder with empty content."""
+    def __init__(self, style=None):
+        """
+        Initializes the MarkdownBuilder with empty content.
+
+        Args:
+            style (MarkdownStyle, optional): Resolved markdown settings. Defaults to the
+                style of the current configuration.
+        """
         self.content = ""
+        self.style = style or runconfig.current().markdown
 
     def add_yaml_front_matter(self, front_matter_dict):
         """
@@ -43,8 +50,7 @@ class MarkdownBuilder:
             text (str): The list item text.
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
         self.content += f"{indent}- {text}\n"
 
     def add_numbered_point(self, text, number, level=1):
@@ -56,8 +62,7 @@ class MarkdownBuilder:
             number (int): The number for the list item.
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
         self.content += f"{indent}{number}. {text}\n"
 
     def add_horizontal_rule(self):
@@ -72,8 +77,7 @@ class MarkdownBuilder:
             text (str): The quote text.
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
         self.content += f"{indent}> {text}\n\n"
 
     def add_code_block(self, code, language="", level=1):
@@ -85,8 +89,7 @@ class MarkdownBuilder:
             language (str, optional): The language for syntax highlighting. Defaults to "".
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
         self.content += f"{indent}```{language}\n{code}\n```\n\n"
 
     def add_inline_code(self, text):
@@ -107,13 +110,9 @@ class MarkdownBuilder:
             alt_text (str, optional): The alt text for the image. Defaults to "".
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
 
-        if (
-            settings.CONFIG["markdown_settings"].get("image_style", "wikilinks")
-            == "wikilinks"
-        ):
+        if self.style.image_style == "wikilinks":
             self.content += f"{indent}![[{alt_text}|{image_path}]]\n\n"
         else:
             self.content += f"{indent}![{alt_text}]({image_path})\n\n"
@@ -126,10 +125,7 @@ class MarkdownBuilder:
             text (str): The link's display text.
             url (str): The link's destination URL.
         """
-        if (
-            settings.CONFIG["markdown_settings"].get("linking_style", "wikilinks")
-            == "wikilinks"
-        ):
+        if self.style.linking_style == "wikilinks":
             self.content += f"[[{text}|{url}]]"
         else:
             self.content += f"[{text}]({url})"
@@ -170,8 +166,7 @@ class MarkdownBuilder:
                 Defaults to "note".
             level (int, optional): The indentation level. Defaults to 1.
         """
-        tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-        indent = " " * tab_size * (level - 1)
+        indent = " " * self.style.tab_size * (level - 1)
         self.content += f"{indent}![{admonition_type}] {title}\n"
         for line in text.splitlines():
             self.content += f"{indent}    {line}\n"
@@ -187,7 +182,7 @@ class MarkdownBuilder:
         self.content += "\n" * lines
 
 
-def generate_list_from_items(items, ordered=False):
+def generate_list_from_items(items, ordered=False, style=None):
     """
     Generates a Markdown list from a list of items.
 
@@ -195,10 +190,9 @@ def generate_list_from_items(items, ordered=False):
         items (list): A list of strings representing the list items.
         ordered (bool, optional): Whether to create an ordered (numbered) list.
             Defaults to False.
-        level (int, optional): The indentation level. Defaults to 1.
+        style (MarkdownStyle, optional): Defaults to the current configuration's style.
     """
-    tab_size = settings.CONFIG["markdown_settings"].get("tab_size", 4)
-    indent = " " * tab_size
+    indent = " " * (style or runconfig.current().markdown).tab_size
 
     if ordered:
         return "\n".join(f"{indent}{i + 1}. {item}" for i, item in enumerate(items))
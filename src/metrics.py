@@ -0,0 +1,239 @@
+#################################### Metrics Module ##########################################
+#
+# Tiny in-process metrics registry rendered in the Prometheus text exposition format
+# by the dashboard's `/metrics` endpoint. No external service or client library is
+# needed; recording a sample is a dict update under a lock.
+#
+##############################################################################################
+import os
+import sys
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import events
+
+# Latency buckets in seconds, from sub-millisecond page work up to very slow documents
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.values = {}
+        self.function = function  # evaluated at scrape time when set
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                return [f"{self.name} {_format_value(self.function())}"]
+            except Exception:
+                return []
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # {label_key: [bucket_counts..., sum, count]}
+        if not self.labelnames:
+            self.values[()] = [0] * (len(self.buckets) + 2)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.values.items())
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data[:len(self.buckets)] + [0]):
+                cumulative += count
+                if bound == float("inf"):
+                    cumulative = data[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(float(data[-2]))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {data[-1]}")
+        return lines
+
+
+class RateGauge(Gauge):
+    """Gauge reporting the per-second rate of `add()`ed amounts over a sliding window."""
+
+    def __init__(self, name, documentation, window=60.0):
+        super().__init__(name, documentation)
+        self.window = window
+        self.events = deque()  # (monotonic time, amount)
+        self.set_function(self.rate)
+
+    def add(self, amount):
+        now = time.monotonic()
+        with self.lock:
+            self.events.append((now, amount))
+            self._trim(now)
+
+    def _trim(self, now):
+        while self.events and self.events[0][0] < now - self.window:
+            self.events.popleft()
+
+    def rate(self):
+        with self.lock:
+            self._trim(time.monotonic())
+            return sum(amount for _, amount in self.events) / self.window
+
+
+class StageTimer:
+    """Times the pipeline stages of one document into STAGE_SECONDS and a local dict."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, stage=name)
+
+
+def process_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return 0
+
+
+def render():
+    """Returns every registered metric in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics ---
+PDFS_PROCESSED = Counter("annotes_pdfs_total", "PDFs handled by the pipeline, by outcome.", ["outcome"])
+STAGE_SECONDS = Histogram("annotes_stage_duration_seconds", "Pipeline stage latency per document.", ["stage"])
+CONNECTOR_SECONDS = Histogram("annotes_connector_duration_seconds", "Time until a connector finished, failed or timed out.", ["connector"])
+CONNECTOR_RESULTS = Counter("annotes_connector_results_total", "Connector pushes by outcome (ok, failed, timeout).", ["connector", "status"])
+NOTE_WRITES = Counter("annotes_note_writes_total", "Note files written or skipped as unchanged.", ["result"])
+WRITE_BEHIND_PENDING = Gauge("annotes_write_behind_pending", "Note writes waiting in write-behind queues.")
+WRITES_COALESCED = Counter("annotes_write_behind_coalesced_total", "Note writes replaced by newer content before reaching disk.")
+PAGES_TOTAL = Counter("annotes_pages_total", "Pages of successfully processed PDFs.")
+ANNOTATIONS_TOTAL = Counter("annotes_annotations_total", "Annotations extracted from processed PDFs.")
+PAGES_RATE = RateGauge("annotes_pages_per_second", "Pages processed per second over the last minute.")
+ANNOTATIONS_RATE = RateGauge("annotes_annotations_per_second", "Annotations extracted per second over the last minute.")
+WATCHER_QUEUE_DEPTH = Gauge("annotes_watcher_queue_depth", "Files waiting in the watcher debounce queue.", function=lambda: 0)
+WORKER_QUEUE_DEPTH = Gauge("annotes_worker_queue_depth", "Tasks waiting for a pool worker.", function=lambda: 0)
+DEBOUNCE_SECONDS = Histogram("annotes_watcher_debounce_seconds", "Time from the first file event to processing.")
+SUPPRESSED_EVENTS = Counter("annotes_watcher_suppressed_events_total", "Watcher events dropped as self-triggered.")
+PROCESS_RSS = Gauge("annotes_process_resident_memory_bytes", "Resident memory of the Annotes process.", function=process_rss_bytes)
+
+
+def record_document(pages, annotations):
+    """Counts the pages and annotations of one processed document."""
+    PAGES_TOTAL.inc(pages)
+    ANNOTATIONS_TOTAL.inc(annotations)
+    PAGES_RATE.add(pages)
+    ANNOTATIONS_RATE.add(annotations)
+
+
+events.subscribe("pipeline.result", lambda payload: PDFS_PROCESSED.inc(outcome=payload.get("outcome", "unknown")))
@@ -7,6 +7,7 @@ import pymupdf
 from datetime import datetime
 import os
 from pathlib import Path
+from ledger import record_io
 
 
 class PdfUtils:
@@ -139,13 +140,19 @@ class PdfUtils:
         except (ValueError, IndexError):
             return None
 
-    def _parse_annotations(self, document):
-        """Parses all annotations from the document."""
-        parsed_annotations = []
+    def iter_page_annotations(self, document):
+        """
+        Parses the document page by page.
+
+        Yields:
+            tuple: (page_number, list of annotation dicts on that page), 1-based pages,
+            so callers can stream results without waiting for the whole document.
+        """
         for page_num in range(len(document)):
             page = document[page_num]
-            words_on_page = self.get_wordlist(page)
+            page_annotations = []
             if page.annots():
+                words_on_page = self.get_wordlist(page)
                 sorted_annots = self._sort_annots(page)
                 for annot in sorted_annots:
                     # Highlight (8), Square (4), Circle (5)
@@ -156,7 +163,7 @@ class PdfUtils:
                         user_comment = annot.info.get("content", "")
                         mod_date = self._parse_pdf_date(annot.info.get("modDate"))
                         
-                        parsed_annotations.append(
+                        page_annotations.append(
                             {
                                 "page": page_num + 1,
                                 "type": "Highlight",
@@ -173,7 +180,7 @@ class PdfUtils:
                         user_comment = annot.info.get("content", "")
                         mod_date = self._parse_pdf_date(annot.info.get("modDate"))
                         
-                        parsed_annotations.append(
+                        page_annotations.append(
                             {
                                 "page": page_num + 1,
                                 "type": "Image",
@@ -186,6 +193,13 @@ class PdfUtils:
                                 "shape_type": "Square" if annot_type_id == 4 else "Circle",
                             }
                         )
+            yield page_num + 1, page_annotations
+
+    def _parse_annotations(self, document):
+        """Parses all annotations from the document."""
+        parsed_annotations = []
+        for _, page_annotations in self.iter_page_annotations(document):
+            parsed_annotations.extend(page_annotations)
         return parsed_annotations
 
     @staticmethod
@@ -318,5 +332,6 @@ class PdfUtils:
         image_folder = PdfUtils.get_image_folder(notes_folder, pdf_basename)
         nameImg = f"SS_{pdf_basename.replace(' ', '')}(pg{page.number + 1})_{pix_title.replace(' ', '')}.png"
         pix.save(image_folder / nameImg)
+        record_io(image_folder / nameImg)
 
         return image_counter
@@ -0,0 +1,176 @@
+################################### Profiling Module #########################################
+#
+# On-demand cProfile capture of single documents, for the one PDF that takes minutes.
+#
+# process_pdf runs under profile_document() when `profiling.enabled` is set (config,
+# dashboard toggle, or the ANNOTES_PROFILE environment variable). A run is profiled if its
+# path matches one of `profiling.paths` (glob patterns on the full path or file name), or
+# kept only if it took longer than `profiling.threshold_seconds`; with neither set every
+# run is kept. Each capture is a .prof file (for snakeviz, pstats, ...) plus a .txt with
+# the top functions by cumulative time, in ~/.annotes/profiles. Only the newest
+# `profiling.keep` captures are kept. The dashboard lists them at /profiles.
+#
+# Scope: up to Python 3.11 cProfile records only the thread that enabled it. From 3.12 on
+# it is built on sys.monitoring and records every thread, so a capture taken while other
+# PDFs are processed includes their work too. Such captures are marked "scope: process";
+# set performance_settings.max_workers to 1 (or profile a single PDF from the CLI) for a
+# clean one. Only one capture can run at a time either way.
+#
+##############################################################################################
+import cProfile
+import fnmatch
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import settings
+
+PROFILE_DIR_NAME = "profiles"
+HEADER_KEYS = ("pdf", "seconds", "reason", "created", "scope")
+# See the module header
+SCOPE = "process" if sys.version_info >= (3, 12) else "thread"
+
+_SAVE_LOCK = threading.Lock()
+
+
+def profile_dir():
+    return settings.USER_DATA_DIR / PROFILE_DIR_NAME
+
+
+def matches(spec, pdf_path):
+    """True if `pdf_path` matches one of the configured glob patterns."""
+    pdf_path = os.path.abspath(str(pdf_path))
+    name = os.path.basename(pdf_path)
+    return any(fnmatch.fnmatch(pdf_path, os.path.expanduser(p)) or fnmatch.fnmatch(name, p) for p in spec.paths)
+
+
+def _reason(spec, matched, seconds):
+    """Why a finished run is kept, or None to drop its profile."""
+    if matched:
+        return "path"
+    if spec.threshold_seconds:
+        return "threshold" if seconds >= spec.threshold_seconds else None
+    return None if spec.paths else "all"
+
+
+@contextmanager
+def profile_document(pdf_path, run_config):
+    """Profiles the enclosed block for `pdf_path` if run_config.profiling asks for it."""
+    spec = run_config.profiling
+    matched = spec.enabled and matches(spec, pdf_path)
+    if not spec.enabled or not (matched or spec.threshold_seconds or not spec.paths):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Another profiler is already active (e.g. a nested run); profile only the outer one
+        logging.debug(f"Not profiling {pdf_path}: {e}")
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - started
+        reason = _reason(spec, matched, seconds)
+        if reason:
+            try:
+                save_profile(profiler, pdf_path, seconds, reason, top=spec.top, keep=spec.keep)
+            except Exception as e:
+                logging.error(f"Could not save profile of {pdf_path}: {e}")
+
+
+def save_profile(profiler, pdf_path, seconds, reason, folder=None, top=30, keep=20):
+    """
+    Writes <name>.prof and <name>.txt (header plus the `top` functions by cumulative
+    time) and prunes the folder to the newest `keep` captures.
+
+    Returns:
+        Path: The .prof file.
+    """
+    folder = folder or profile_dir()
+    stem = re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(str(pdf_path)))[0])[:60]
+    name = f"{datetime.now():%Y%m%d-%H%M%S}-{stem}-{uuid.uuid4().hex[:6]}"
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    header = {"pdf": os.path.abspath(str(pdf_path)), "seconds": f"{seconds:.3f}", "reason": reason,
+              "created": datetime.now().isoformat(timespec="seconds"), "scope": SCOPE}
+
+    with _SAVE_LOCK:
+        folder.mkdir(parents=True, exist_ok=True)
+        prof_path = folder / f"{name}.prof"
+        stats.dump_stats(str(prof_path))
+        with open(folder / f"{name}.txt", "w", encoding="utf-8") as f:
+            f.write("".join(f"{key}: {header[key]}\n" for key in HEADER_KEYS) + "\n" + report.getvalue())
+        prune(folder, keep)
+    logging.info(f"Profiled {os.path.basename(str(pdf_path))} ({seconds:.2f}s, {reason}) -> {prof_path}")
+    return prof_path
+
+
+def prune(folder, keep):
+    """Deletes all but the newest `keep` captures."""
+    captures = sorted(folder.glob("*.prof"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for path in captures[max(0, int(keep)):]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".txt").unlink(missing_ok=True)
+
+
+def _read_header(txt_path):
+    header = {}
+    try:
+        with open(txt_path, "r", encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.rstrip("\n").partition(": ")
+                if not sep or key not in HEADER_KEYS:
+                    break
+                header[key] = value
+    except OSError:
+        pass
+    return header
+
+
+def list_profiles(folder=None):
+    """Captured profiles, newest first: name, pdf, seconds, reason, created, scope and size."""
+    folder = folder or profile_dir()
+    if not folder.is_dir():
+        return []
+    profiles = []
+    for prof_path in folder.glob("*.prof"):
+        try:
+            st = prof_path.stat()
+        except OSError:
+            continue
+        header = _read_header(prof_path.with_suffix(".txt"))
+        profiles.append((st.st_mtime_ns, {
+            "name": prof_path.stem,
+            "pdf": header.get("pdf"),
+            "seconds": float(header["seconds"]) if header.get("seconds") else None,
+            "reason": header.get("reason"),
+            "created": header.get("created"),
+            "scope": header.get("scope"),
+            "size": st.st_size,
+        }))
+    return [profile for _, profile in sorted(profiles, key=lambda item: item[0], reverse=True)]
+
+
+def profile_file(name, kind="prof", folder=None):
+    """Path of a capture's .prof or .txt file, or None if `name` is not a capture."""
+    folder = folder or profile_dir()
+    if kind not in ("prof", "txt") or not re.fullmatch(r"[\w.-]+", name or ""):
+        return None
+    path = folder / f"{name}.{kind}"
+    return path if path.is_file() else None
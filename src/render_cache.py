@@ -0,0 +1,87 @@
+################################### Render Cache Module ######################################
+#
+# LRU cache of parsed + rendered PDFs shared by dashboard previews and real syncs.
+# Entries are keyed by the PDF's fingerprint (path, size, mtime) and a hash of the
+# effective configuration, so an edited PDF or a changed setting never hits a stale
+# entry. Only the parts that do not depend on the time of the sync are cached: the
+# front matter and the (possibly date-stamped) title are built fresh every run.
+#
+##############################################################################################
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import settings
+import events
+
+DEFAULT_CACHE_SIZE = 64
+
+
+def pdf_fingerprint(pdf_path, st=None):
+    """Cheap identity of a PDF's current content; raises OSError if it is missing."""
+    st = st if st is not None else os.stat(pdf_path)
+    return (os.path.abspath(pdf_path), st.st_size, st.st_mtime_ns)
+
+
+def config_hash(config):
+    """Stable hash of a configuration dict."""
+    data = json.dumps(config or {}, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe LRU mapping (fingerprint, config hash) to a rendered PDF."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > max(0, self.maxsize):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide render cache, sized from performance_settings."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            perf = (settings.CONFIG or {}).get("performance_settings", {}) or {}
+            _CACHE = RenderCache(int(perf.get("render_cache_size", DEFAULT_CACHE_SIZE)))
+        return _CACHE
+
+
+def _on_config_changed(payload):
+    # Entries stay valid (the config hash is part of the key); only the size may change
+    if "performance_settings" in payload.get("changed", ()) and _CACHE is not None:
+        perf = payload["new"].get("performance_settings", {}) or {}
+        _CACHE.maxsize = int(perf.get("render_cache_size", DEFAULT_CACHE_SIZE))
+
+
+events.subscribe("config.changed", _on_config_changed)
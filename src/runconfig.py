@@ -0,0 +1,231 @@
+#################################### Run Config Module #######################################
+#
+# Immutable, pre-resolved view of the configuration for one pipeline run.
+#
+# settings.CONFIG is a mutable global that is replaced whenever config.yaml changes.
+# The pipeline instead takes a RunConfig, built once per run (or per config version):
+# folders, file naming, date formats, front matter, trigger tokens, markdown style,
+# connector specs and profiling options are resolved up front, so hot loops do attribute
+# reads instead of nested dict lookups, and concurrent runs with different configs cannot
+# interfere.
+#
+##############################################################################################
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import settings
+import render_cache
+
+
+def _tokens(value, default):
+    """Trigger setting -> tuple of tokens ("a, b" strings or lists)."""
+    if value is None:
+        value = default
+    if isinstance(value, str):
+        return tuple(t.strip() for t in value.split(",") if t.strip())
+    if isinstance(value, (list, tuple)):
+        return tuple(str(t) for t in value)
+    return (default,)
+
+
+def _flag(value, default=False):
+    """Config value -> bool. Values saved from the dashboard form may be "true"/"false" strings."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class TriggerMatcher:
+    """Comment prefixes that turn a highlight into a heading, quote or task."""
+
+    heading: Tuple[str, ...] = (".h1",)
+    quote: Tuple[str, ...] = (">>",)
+    todo: Tuple[str, ...] = (".todo",)
+
+    @staticmethod
+    def _match(comment, tokens):
+        return next((t for t in tokens if comment.startswith(t)), None)
+
+    def match_heading(self, comment):
+        return self._match(comment, self.heading)
+
+    def match_quote(self, comment):
+        return self._match(comment, self.quote)
+
+    def match_todo(self, comment):
+        return self._match(comment, self.todo)
+
+
+@dataclass(frozen=True)
+class ConnectorSpec:
+    """One entry of the `connectors:` list."""
+
+    name: str
+    timeout: float = 30.0
+    retries: int = 1
+    options: Dict[str, Any] = field(default_factory=dict)  # passed to the connector's constructor
+
+
+def _connector_specs(config):
+    """
+    Resolves `connectors:` (names or {type, timeout_seconds, retries, ...options} dicts).
+    The legacy `output_settings.copy_to_clipboard` and `debug_mode` flags still add the
+    clipboard and log connectors.
+    """
+    defaults = config.get("connector_settings", {}) or {}
+    timeout = float(defaults.get("timeout_seconds", 30))
+    retries = int(defaults.get("retries", 1))
+
+    specs = []
+    for entry in config.get("connectors") or ["file"]:
+        if isinstance(entry, str):
+            entry = {"type": entry}
+        if not isinstance(entry, dict) or not entry.get("type") or entry.get("enabled", True) is False:
+            continue
+        options = {k: v for k, v in entry.items() if k not in ("type", "timeout_seconds", "retries", "enabled")}
+        specs.append(ConnectorSpec(
+            name=str(entry["type"]),
+            timeout=float(entry.get("timeout_seconds", timeout)),
+            retries=int(entry.get("retries", retries)),
+            options=options,
+        ))
+
+    names = {spec.name for spec in specs}
+    if (config.get("output_settings", {}) or {}).get("copy_to_clipboard", False) and "clipboard" not in names:
+        specs.append(ConnectorSpec("clipboard", timeout, retries))
+    if config.get("debug_mode", False) and "log" not in names:
+        specs.append(ConnectorSpec("log", timeout, retries))
+    return tuple(specs)
+
+
+@dataclass(frozen=True)
+class ProfilingSpec:
+    """`profiling:` section; see the profiling module."""
+
+    enabled: bool = False
+    paths: Tuple[str, ...] = ()
+    threshold_seconds: float = 0.0
+    keep: int = 20
+    top: int = 30
+
+
+def _profiling_spec(config, environ=os.environ):
+    """
+    Resolves `profiling:`. ANNOTES_PROFILE turns profiling on without touching the config:
+    "1" uses the configured patterns, anything else is a comma-separated list of patterns.
+    """
+    section = config.get("profiling", {}) or {}
+    enabled = _flag(section.get("enabled"))
+    paths = _tokens(section.get("paths"), ())
+    env = environ.get("ANNOTES_PROFILE", "").strip()
+    if env and env.lower() not in ("0", "false", "no", "off"):
+        enabled = True
+        if env.lower() not in ("1", "true", "yes", "on"):
+            paths = _tokens(env, ())
+    return ProfilingSpec(
+        enabled=enabled,
+        paths=paths,
+        threshold_seconds=float(section.get("threshold_seconds", 0) or 0),
+        keep=int(section.get("keep", 20)),
+        top=int(section.get("top", 30)),
+    )
+
+
+@dataclass(frozen=True)
+class MarkdownStyle:
+    tab_size: int = 4
+    image_style: str = "wikilinks"
+    linking_style: str = "wikilinks"
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    pdf_folder: Optional[str] = None
+    notes_folder: Optional[str] = None
+    file_prefix: str = "Notes - "
+    file_suffix: str = ""
+    file_format: str = ".md"
+    date_format: str = "%Y-%m-%d"
+    time_format: str = "%H:%M:%S"
+    datetime_format: str = "%Y-%m-%d %H:%M:%S"
+    include_front_matter: bool = False
+    front_matter_keys: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+    include_page_links: bool = True
+    visible_page_links: bool = False
+    triggers: TriggerMatcher = field(default_factory=TriggerMatcher)
+    markdown: MarkdownStyle = field(default_factory=MarkdownStyle)
+    connectors: Tuple[ConnectorSpec, ...] = (ConnectorSpec("file"),)
+    connector_workers: int = 4
+    connector_batch_size: int = 1
+    profiling: ProfilingSpec = field(default_factory=ProfilingSpec)
+    debug_mode: bool = False
+    config_hash: str = ""
+
+    @classmethod
+    def from_config(cls, config):
+        """Resolves a settings dict (e.g. settings.CONFIG) into a RunConfig."""
+        config = config or {}
+        output = config.get("output_settings", {}) or {}
+        front_matter = output.get("yaml_front_matter_settings", {}) or {}
+        page_links = output.get("page_link_settings", {}) or {}
+        visible_flag = page_links.get("visible_links", None)
+        annotation = config.get("annotation_settings", {}) or {}
+        md = config.get("markdown_settings", {}) or {}
+
+        return cls(
+            pdf_folder=config.get("pdf_folder"),
+            notes_folder=config.get("notes_folder"),
+            file_prefix=output.get("annotated_file_prefix", "Notes - "),
+            file_suffix=output.get("annotated_file_suffix", ""),
+            file_format=output.get("annotated_file_format", ".md"),
+            date_format=output.get("date_string_format", "%Y-%m-%d"),
+            time_format=output.get("time_string_format", "%H:%M:%S"),
+            datetime_format=output.get("datetime_string_format", "%Y-%m-%d %H:%M:%S"),
+            include_front_matter=bool(front_matter.get("include_yaml_front_matter", False)),
+            front_matter_keys=tuple(front_matter.get("yaml_front_matter_keys", []) or ()),
+            tags=tuple(output.get("annotated_file_tags", []) or ()),
+            include_page_links=bool(page_links.get("include_page_links", True)),
+            visible_page_links=(
+                bool(visible_flag) if visible_flag is not None
+                else page_links.get("link_style", "hidden") == "visible"
+            ),
+            triggers=TriggerMatcher(
+                heading=_tokens(annotation.get("symbol_heading"), ".h1"),
+                quote=_tokens(annotation.get("symbol_quote"), ">>"),
+                todo=_tokens(annotation.get("symbol_todo"), ".todo"),
+            ),
+            markdown=MarkdownStyle(
+                tab_size=md.get("tab_size", 4),
+                image_style=md.get("image_style", "wikilinks"),
+                linking_style=md.get("linking_style", "wikilinks"),
+            ),
+            connectors=_connector_specs(config),
+            connector_workers=int((config.get("connector_settings", {}) or {}).get("max_workers", 4)),
+            connector_batch_size=int((config.get("connector_settings", {}) or {}).get("batch_size", 1)),
+            profiling=_profiling_spec(config),
+            debug_mode=bool(config.get("debug_mode", False)),
+            config_hash=render_cache.config_hash(config),
+        )
+
+
+_CURRENT = {"config": None, "run_config": None}
+_CURRENT_LOCK = threading.Lock()
+
+
+def current():
+    """
+    RunConfig for the current settings.CONFIG, rebuilt only when CONFIG was replaced
+    (settings.reload swaps in a new dict on every change).
+    """
+    config = settings.CONFIG
+    with _CURRENT_LOCK:
+        if _CURRENT["run_config"] is None or _CURRENT["config"] is not config:
+            _CURRENT["run_config"] = RunConfig.from_config(config)
+            _CURRENT["config"] = config  # keeps the dict alive so identity stays meaningful
+        return _CURRENT["run_config"]
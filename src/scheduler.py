@@ -1,9 +1,98 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 import yaml
+import json
+import logging
+import os
+import random
+import re
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import settings
+import events
+
+# Recent scan records shared with the dashboard
+SCAN_HISTORY_PATH = settings.USER_DATA_DIR / "scan_history.json"
+SCAN_HISTORY_LIMIT = 100
+
+# Closing line of `annotes.py` (see annotes.main), parsed in subprocess mode
+SUMMARY_LINE = re.compile(
+    r"Scanned (?P<files>\d+) PDFs: (?P<synced>\d+) synced, (?P<skipped>\d+) skipped, (?P<failed>\d+) failed; "
+    r"(?P<notes_written>\d+) notes written, (?P<notes_unchanged>\d+) unchanged, (?P<notes_queued>\d+) queued"
+)
+
+
+def load_scan_history(path=SCAN_HISTORY_PATH):
+    """Returns {"scans": [...], "next_run": iso string or None} as last saved by the scheduler."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"scans": [], "next_run": None}
+
+
+def save_scan_history(scans, next_run=None, path=SCAN_HISTORY_PATH):
+    data = {"scans": list(scans), "next_run": next_run.isoformat(timespec="seconds") if next_run else None}
+    tmp_path = Path(path).with_suffix(".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not save scan history: {e}")
+
+
+class AdaptiveIntervalPolicy:
+    """
+    Chooses the next scan interval from the observed change rate and the last scan's cost.
+
+    Libraries that keep changing are scanned more often, idle ones back off towards
+    `max_minutes`. A scan may never occupy more than `max_duty_cycle` of wall time,
+    and a little jitter keeps several instances from scanning in lockstep.
+    """
+
+    def __init__(self, min_minutes=5, max_minutes=240, jitter=0.1, max_duty_cycle=0.1,
+                 backoff=1.5, smoothing=0.5):
+        self.min_minutes = float(min_minutes)
+        self.max_minutes = max(float(max_minutes), self.min_minutes)
+        self.jitter = float(jitter)
+        self.max_duty_cycle = float(max_duty_cycle)
+        self.backoff = float(backoff)
+        self.smoothing = float(smoothing)
+        self.change_rate = 0.0  # smoothed files changed per scan
+
+    def next_interval(self, current_minutes, scan):
+        """
+        Args:
+            current_minutes (float): The interval used before this scan.
+            scan (dict): Record of the scan that just finished (duration, files_changed).
+
+        Returns:
+            float: Minutes until the next scan.
+        """
+        changed = scan.get("files_changed") or 0
+        self.change_rate = self.smoothing * changed + (1 - self.smoothing) * self.change_rate
+
+        if changed or self.change_rate >= 1:
+            interval = current_minutes / 2
+        elif self.change_rate < 0.1:
+            interval = current_minutes * self.backoff
+        else:
+            interval = current_minutes
+
+        # Expensive scans get proportionally more breathing room
+        if self.max_duty_cycle > 0:
+            interval = max(interval, scan.get("duration", 0) / 60 / self.max_duty_cycle)
+
+        interval = min(self.max_minutes, max(self.min_minutes, interval))
+        interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(self.min_minutes, min(self.max_minutes, interval))
+
 
 class TaskScheduler:
     def __init__(self, base_dir):
@@ -13,6 +102,16 @@ class TaskScheduler:
         self.scheduler = BackgroundScheduler()
         self.config = self.load_config()
 
+        # Overlap protection: at most one run at a time, extra requests coalesce into one rerun
+        self.state_lock = threading.Lock()
+        self.running = False
+        self.rerun_requested = False
+
+        # Per-scan records (duration, files changed) feed the adaptive policy and the dashboard
+        self.history = deque(load_scan_history().get("scans", []), maxlen=SCAN_HISTORY_LIMIT)
+        self.policy = self.create_policy()
+        self.current_interval = self.get_interval()
+
     def load_config(self):
         with open(self.config_path, "r") as f:
             return yaml.safe_load(f)
@@ -21,20 +120,134 @@ class TaskScheduler:
         # Looks for interval_minutes inside scheduler_settings, defaults to 60
         return self.config.get("scheduler_settings", {}).get("interval_minutes", 60)
 
+    def get_adaptive_settings(self):
+        return self.config.get("scheduler_settings", {}).get("adaptive", {}) or {}
+
+    def create_policy(self):
+        adaptive = self.get_adaptive_settings()
+        if not adaptive.get("enabled", False):
+            return None
+        return AdaptiveIntervalPolicy(
+            min_minutes=adaptive.get("min_minutes", 5),
+            max_minutes=adaptive.get("max_minutes", 240),
+            jitter=adaptive.get("jitter", 0.1),
+            max_duty_cycle=adaptive.get("max_duty_cycle", 0.1),
+        )
+
+    def get_execution_mode(self):
+        # "in_process" reuses the warm worker pool, "subprocess" isolates each run
+        return self.config.get("scheduler_settings", {}).get("execution_mode", "in_process")
+
+    def get_pdf_timeout(self):
+        return self.config.get("scheduler_settings", {}).get("pdf_timeout_seconds", 120)
+
+    def add_job(self, minutes):
+        if self.policy:
+            # Adaptive mode schedules one run at a time, re-planned after each scan finishes
+            run_date = datetime.now() + timedelta(minutes=minutes)
+            self.scheduler.add_job(
+                self.run_task_now, "date", run_date=run_date, id="annotes_task",
+                max_instances=1, coalesce=True, replace_existing=True,
+            )
+            save_scan_history(self.history, run_date)
+            return
+        self.scheduler.add_job(
+            self.run_task_now, "interval", minutes=minutes, id="annotes_task",
+            max_instances=1, coalesce=True, replace_existing=True,
+        )
+
     def reload_config(self):
         print("\n🔄 Reloading configuration...")
         self.config = self.load_config()
+        self.policy = self.create_policy()
         if self.scheduler.get_job("annotes_task"):
             self.scheduler.remove_job("annotes_task")
             print("   Removed old schedule")
         new_interval = self.get_interval()
-        self.scheduler.add_job(
-            self.run_task_now, "interval", minutes=new_interval, id="annotes_task"
-        )
+        self.current_interval = new_interval
+        self.add_job(new_interval)
         print(f"✓ Configuration reloaded!")
         print(f"✓ New schedule: running every {new_interval} minutes\n")
 
+    def on_config_changed(self, payload):
+        """Re-plans the schedule live when scheduler_settings changed in our config file."""
+        if "scheduler_settings" not in payload.get("changed", ()):
+            return
+        if self.config_path.resolve() != settings.CONFIG_PATH.resolve():
+            return
+        self.reload_config()
+
     def run_task_now(self):
+        with self.state_lock:
+            if self.running:
+                self.rerun_requested = True
+                print("⏭️  Previous run still in progress; another pass will follow it.")
+                return
+            self.running = True
+
+        try:
+            while True:
+                started = time.time()
+                if self.get_execution_mode() == "subprocess":
+                    summary = self.run_subprocess()
+                else:
+                    summary = self.run_in_process()
+                self.record_scan(started, summary)
+                with self.state_lock:
+                    if not self.rerun_requested:
+                        break
+                    self.rerun_requested = False
+        finally:
+            with self.state_lock:
+                self.running = False
+
+    def record_scan(self, started, summary):
+        """Stores the scan record and, in adaptive mode, plans the next run from it."""
+        summary = summary or {}
+        scan = {
+            "started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "duration": round(time.time() - started, 3),
+            "files": summary.get("files"),
+            # Notes actually (re)written; "synced" also counts notes that came out unchanged
+            "files_changed": (summary.get("notes_written") or 0) + (summary.get("notes_queued") or 0),
+            "failed": summary.get("failed"),
+            "mode": self.get_execution_mode(),
+        }
+        self.history.append(scan)
+
+        if self.policy and self.scheduler.running:
+            self.current_interval = self.policy.next_interval(self.current_interval, scan)
+            print(f"📅 Next scan in {self.current_interval:.1f} minutes")
+            self.add_job(self.current_interval)
+        else:
+            save_scan_history(self.history, self.next_run_time())
+
+    def next_run_time(self):
+        job = self.scheduler.get_job("annotes_task") if self.scheduler.running else None
+        return job.next_run_time if job else None
+
+    def run_in_process(self):
+        try:
+            # Imported lazily; after the first run these modules stay warm in memory
+            import annotes
+            from workers import get_pool
+
+            settings.initialize()  # no-op unless config.yaml changed
+            if not logging.getLogger().handlers:
+                annotes.setup_logging()
+
+            print("\n▶️  Running scan in-process...")
+            summary = annotes.scan_library(pool=get_pool(), pdf_timeout=self.get_pdf_timeout())
+            print(
+                f"✓ Scan completed in {summary['duration']}s: {summary['synced']} synced, "
+                f"{summary['skipped']} skipped, {summary['failed']} failed, {summary['timed_out']} timed out"
+            )
+            return summary
+        except Exception as e:
+            print(f"✗ Error running in-process scan: {e}")
+            return None
+
+    def run_subprocess(self):
         try:
             print(f"\n▶️  Executing {self.annotes_path.name}...")
             result = subprocess.run(
@@ -48,6 +261,10 @@ class TaskScheduler:
                 print("✓ Execution completed successfully")
                 if result.stdout:
                     print(result.stdout)
+                # Pick the counts out of the child's closing summary line
+                match = SUMMARY_LINE.search(result.stdout or "")
+                if match:
+                    return {key: int(value) for key, value in match.groupdict().items()}
             else:
                 print(f"✗ Execution failed with code {result.returncode}")
                 if result.stderr:
@@ -56,21 +273,28 @@ class TaskScheduler:
             print("✗ Execution timed out (5 minutes)")
         except Exception as e:
             print(f"✗ Error executing annotes.py: {e}")
+        return None
 
     def schedule_task(self):
-        interval_minutes = self.get_interval()
-        self.scheduler.add_job(
-            self.run_task_now, "interval", minutes=interval_minutes, id="annotes_task"
-        )
-        print(f"📅 Task scheduled: every {interval_minutes} minutes")
+        if self.policy:
+            self.current_interval = min(self.policy.max_minutes, max(self.policy.min_minutes, self.current_interval))
+        interval_minutes = self.current_interval if self.policy else self.get_interval()
+        self.add_job(interval_minutes)
+        if self.policy:
+            print(f"📅 Task scheduled adaptively: next run in {interval_minutes:.1f} minutes")
+        else:
+            print(f"📅 Task scheduled: every {interval_minutes} minutes")
+        save_scan_history(self.history, self.next_run_time())
 
     def start(self):
         print("🚀 Running initial task on startup...")
         self.run_task_now()
-        self.schedule_task()
         self.scheduler.start()
+        self.schedule_task()
+        events.subscribe("config.changed", self.on_config_changed)
         print("✓ Scheduler started\n")
 
     def stop(self):
+        events.unsubscribe("config.changed", self.on_config_changed)
         self.scheduler.shutdown()
         print("🛑 Scheduler stopped")
@@ -3,20 +3,31 @@
 # This module provides a global, application-wide configuration object.
 # It should be initialized once at the start of the application.
 #
+# The config is cached: `reload()` only re-parses config.yaml when the file's mtime or
+# size changed, so it is cheap to call before every request. A real change replaces
+# CONFIG with a new dict and publishes "config.changed" {"changed", "old", "new"} so the
+# watcher, scheduler and worker pool can reconfigure while running.
+#
 ######################################################################################
 
-import yaml
 import sys
 import os
 import shutil
+import threading
 from pathlib import Path
 
+import events
+
 # This will be the global CONFIG object. It's None until initialized.
 CONFIG = None
 
 # Global paths
 APP_NAME = "annotes"
 USER_DATA_DIR = Path.home() / f".{APP_NAME}"
+CONFIG_PATH = USER_DATA_DIR / "config.yaml"
+
+_STATE = {"signature": None, "ensured": False}  # config.yaml (mtime_ns, size) CONFIG was loaded from
+_RELOAD_LOCK = threading.RLock()
 
 def get_resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -28,18 +39,12 @@ def get_resource_path(relative_path):
 
     return Path(base_path) / relative_path
 
-def initialize():
-    """
-    Loads the configuration from config.yaml into the global 'CONFIG' variable.
-    Ensures a user-writable config file exists.
-    """
-    global CONFIG
-    from utils import load_config
-
+def _ensure_user_config():
+    """Creates the user data dir and copies the default config on first use."""
     # Ensure user data directory exists
     USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
     
-    config_path = USER_DATA_DIR / "config.yaml"
+    config_path = CONFIG_PATH
     
     # If config doesn't exist in user dir, try to copy from default
     if not config_path.exists():
@@ -56,28 +61,105 @@ def initialize():
         else:
             print(f"❌ Default config not found at resource path: {default_config_path}")
 
-    # Load the config (either existing or newly created)
-    CONFIG = load_config(config_path)
+def _config_signature():
+    try:
+        st = os.stat(CONFIG_PATH)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
-    # Fallback: If loading failed (e.g. permission error), try loading default direct from bundle
-    if CONFIG is None:
-        print("⚠️ Failed to load user config. Falling back to internal defaults (read-only mode).")
-        default_config_path = get_resource_path("config.default.yaml")
-        CONFIG = load_config(default_config_path)
-    
-    # --- AUTO-CREATE FOLDERS & EXPAND PATHS ---
-    if CONFIG:
-        for key in ["pdf_folder", "notes_folder"]:
-            path_str = CONFIG.get(key)
-            if path_str:
-                # Expand ~ if present
-                expanded_path = Path(path_str).expanduser()
-                CONFIG[key] = str(expanded_path)
-                
-                # Ensure the folder exists
-                if not expanded_path.exists():
-                    try:
-                        expanded_path.mkdir(parents=True, exist_ok=True)
-                        print(f"📁 Created missing {key}: {expanded_path}")
-                    except Exception as e:
-                        print(f"❌ Could not create {key} at {expanded_path}: {e}")
+def _prepare_folders(config, previous):
+    """Expands ~ in the folder settings and creates folders that are new or missing."""
+    for key in ["pdf_folder", "notes_folder"]:
+        path_str = config.get(key)
+        if path_str:
+            # Expand ~ if present
+            expanded_path = Path(path_str).expanduser()
+            config[key] = str(expanded_path)
+            if previous and previous.get(key) == config[key]:
+                continue  # unchanged folder, already ensured by an earlier load
+            
+            # Ensure the folder exists
+            if not expanded_path.exists():
+                try:
+                    expanded_path.mkdir(parents=True, exist_ok=True)
+                    print(f"📁 Created missing {key}: {expanded_path}")
+                except Exception as e:
+                    print(f"❌ Could not create {key} at {expanded_path}: {e}")
+
+def reload(force=False):
+    """
+    Loads config.yaml into CONFIG if it changed on disk since the last load.
+
+    Args:
+        force (bool): Re-read even if the file looks unchanged.
+
+    Returns:
+        bool: True if CONFIG was (re)loaded.
+    """
+    global CONFIG
+    from utils import load_config
+
+    with _RELOAD_LOCK:
+        if not _STATE["ensured"]:
+            _ensure_user_config()
+            _STATE["ensured"] = True
+        signature = _config_signature()
+        if CONFIG is not None and not force and signature is not None and signature == _STATE["signature"]:
+            return False
+
+        # Load the config (either existing or newly created)
+        new_config = load_config(CONFIG_PATH)
+
+        # Fallback: If loading failed (e.g. permission error), try loading default direct from bundle
+        if new_config is None:
+            if CONFIG is not None:
+                print("⚠️ Failed to reload user config. Keeping the current configuration.")
+                _STATE["signature"] = signature
+                return False
+            print("⚠️ Failed to load user config. Falling back to internal defaults (read-only mode).")
+            new_config = load_config(get_resource_path("config.default.yaml"))
+
+        # --- AUTO-CREATE FOLDERS & EXPAND PATHS ---
+        if new_config:
+            _prepare_folders(new_config, CONFIG)
+
+        old_config, CONFIG = CONFIG, new_config
+        _STATE["signature"] = signature
+
+    if old_config is not None and new_config != old_config:
+        old, new = old_config or {}, new_config or {}
+        changed = sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+        events.publish("config.changed", changed=changed, old=old, new=new)
+    return True
+
+def initialize():
+    """
+    Loads the configuration from config.yaml into the global 'CONFIG' variable.
+    Ensures a user-writable config file exists. Cheap when nothing changed (see reload).
+    """
+    reload()
+
+def get_config():
+    """Returns CONFIG, loading or refreshing it from disk when config.yaml changed."""
+    reload()
+    return CONFIG
+
+def watch(interval=5.0):
+    """
+    Polls config.yaml's mtime in a daemon thread so hand edits are picked up live.
+
+    Returns:
+        threading.Event: Set it to stop watching.
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                reload()
+            except Exception as e:
+                print(f"❌ Config reload failed: {e}")
+
+    threading.Thread(target=loop, name="annotes-config-watch", daemon=True).start()
+    return stop
@@ -7,7 +7,6 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 import settings
-import annotes
 from watcher import SystemWatcher
 
 def main():
@@ -34,6 +33,8 @@ def main():
     def on_file_change(file_path):
         logging.info(f"Detected change in: {file_path}. Processing...")
         try:
+            # The pipeline (PyMuPDF) loads with the first change, not at service start
+            import annotes
             annotes.process_pdf(file_path)
             logging.info(f"Successfully processed: {file_path}")
         except Exception as e:
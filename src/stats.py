@@ -0,0 +1,137 @@
+##################################### Stats Service Module ####################################
+#
+# Keeps the dashboard counters in memory. Counts are maintained incrementally from
+# watcher and pipeline events, with a periodic full recount (run in the background)
+# as a safety net for anything the events missed. Serving `/stats` is a dict copy.
+#
+##############################################################################################
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+
+import settings
+import events
+import runconfig
+
+RECOUNT_TTL = 300  # seconds between background full recounts
+
+
+class StatsService:
+    """In-memory, event-driven counters for the dashboard."""
+
+    def __init__(self, recount_ttl=RECOUNT_TTL):
+        self.recount_ttl = recount_ttl
+        self.lock = threading.Lock()
+        self.pdf_folder = None
+        self.notes_folder = None
+        self.note_format = ".md"
+        self.pdf_names = set()
+        self.note_names = set()
+        self.syncs = 0
+        self.errors = 0
+        self.last_recount = 0.0
+        self.recounting = False
+
+        events.subscribe("pdf.created", self._on_pdf_created)
+        events.subscribe("pdf.deleted", self._on_pdf_deleted)
+        events.subscribe("note.written", self._on_note_written)
+        events.subscribe("pipeline.result", self._on_pipeline_result)
+        events.subscribe("config.changed", self._on_config_changed)
+
+    # --- Event handlers ---
+    def _in_folder(self, path, folder):
+        return folder is not None and os.path.dirname(os.path.abspath(path)) == folder
+
+    def _on_pdf_created(self, payload):
+        path = payload["path"]
+        with self.lock:
+            if self._in_folder(path, self.pdf_folder):
+                self.pdf_names.add(os.path.basename(path))
+
+    def _on_pdf_deleted(self, payload):
+        path = payload["path"]
+        with self.lock:
+            if self._in_folder(path, self.pdf_folder):
+                self.pdf_names.discard(os.path.basename(path))
+
+    def _on_note_written(self, payload):
+        path = str(payload["path"])
+        with self.lock:
+            if path.endswith(self.note_format) and self._in_folder(path, self.notes_folder):
+                self.note_names.add(os.path.basename(path))
+
+    def _on_pipeline_result(self, payload):
+        with self.lock:
+            if payload.get("outcome") == "synced":
+                self.syncs += 1
+            elif payload.get("outcome") == "failed":
+                self.errors += 1
+
+    # --- Full recount ---
+    def _list_names(self, folder, suffix):
+        if not folder or not os.path.isdir(folder):
+            return set()
+        with os.scandir(folder) as entries:
+            return {e.name for e in entries if e.name.endswith(suffix)}
+
+    def recount(self):
+        """Recounts PDFs and notes from disk (the TTL fallback)."""
+        config = settings.CONFIG or {}
+        pdf_folder = os.path.abspath(Path(config.get("pdf_folder", ".")).expanduser())
+        notes_folder = os.path.abspath(Path(config.get("notes_folder", ".")).expanduser())
+        note_format = runconfig.current().file_format
+        try:
+            pdf_names = self._list_names(pdf_folder, ".pdf")
+            note_names = self._list_names(notes_folder, note_format)
+        except OSError as e:
+            logging.warning(f"Stats recount failed: {e}")
+            pdf_names, note_names = None, None
+
+        with self.lock:
+            self.pdf_folder, self.notes_folder, self.note_format = pdf_folder, notes_folder, note_format
+            if pdf_names is not None:
+                self.pdf_names, self.note_names = pdf_names, note_names
+            self.last_recount = time.monotonic()
+            self.recounting = False
+
+    def _recount_in_background(self):
+        with self.lock:
+            if self.recounting:
+                return
+            self.recounting = True
+        threading.Thread(target=self.recount, daemon=True).start()
+
+    def _on_config_changed(self, payload):
+        if {"pdf_folder", "notes_folder", "output_settings"} & set(payload.get("changed", ())):
+            self.invalidate()
+
+    def invalidate(self):
+        """Forces a recount on the next snapshot, e.g. after the folders changed."""
+        with self.lock:
+            self.last_recount = 0.0
+
+    def snapshot(self):
+        """
+        Returns the current counters without touching the disk.
+
+        The very first call counts synchronously; afterwards stale counts are refreshed
+        in the background while the cached values are served.
+        """
+        if not self.last_recount:
+            self.recount()
+        elif time.monotonic() - self.last_recount > self.recount_ttl:
+            self._recount_in_background()
+
+        with self.lock:
+            return {
+                "pdfs": len(self.pdf_names),
+                "notes": len(self.note_names),
+                "syncs": self.syncs,
+                "errors": self.errors,
+            }
+
+
+# Shared instance used by the dashboard
+SERVICE = StatsService()
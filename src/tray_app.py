@@ -6,23 +6,23 @@ import webbrowser
 from pathlib import Path
 import signal
 
-from PIL import Image, ImageDraw
-import pystray
-from pystray import MenuItem as item
-
 # Add local src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# The dashboard (FastAPI, uvicorn, Jinja2) is imported on the web server thread,
+# pystray/PIL only when the icon is built and the PDF pipeline (annotes, jobs, PyMuPDF)
+# with the first change or scan, so a second instance exits before loading them and
+# the watcher starts without waiting for either.
 import settings
-import annotes
-import web_ui
+import events
+import logfiles
 from watcher import SystemWatcher
 
 class TrayApp:
     def __init__(self):
         # Initialize Settings & Logging FIRST to ensure paths are set
         settings.initialize()
-        annotes.setup_logging()
+        logfiles.setup_logging()
 
         # Use User Data Dir for lock file (persistent path), not temp bundle path
         self.lock_file = settings.USER_DATA_DIR / "annotes.lock"
@@ -34,15 +34,24 @@ class TrayApp:
             sys.exit(0)
         
         self.watcher = None
+        self.watcher_lock = threading.Lock()
         self.icon = None
 
         # Start Web Server Thread
-        self.web_server_thread = threading.Thread(target=web_ui.run_server, daemon=True)
+        self.web_server_thread = threading.Thread(target=self.run_web_server, daemon=True)
         self.web_server_thread.start()
         
         # Start Watcher
         self.start_watcher()
 
+        # Apply config.yaml changes (dashboard saves or hand edits) without a restart
+        events.subscribe("config.changed", self.on_config_changed)
+        self.config_watch = settings.watch()
+
+    def run_web_server(self):
+        import web_ui
+        web_ui.run_server()
+
     def get_lock_pid(self):
         try: return self.lock_file.read_text().strip()
         except: return "?"
@@ -69,6 +78,7 @@ class TrayApp:
 
     def create_image(self):
         """Load icon or generate default, ensured for tray sizes."""
+        from PIL import Image, ImageDraw
         icon_path = settings.get_resource_path("app_icon.png")
         icon_path_alt = settings.get_resource_path("logo.png")
         
@@ -119,9 +129,23 @@ class TrayApp:
         else:
             print(f"⚠️ Watcher not started: Invalid or missing PDF folder ('{pdf_folder}')")
 
+    def on_config_changed(self, payload):
+        if {"pdf_folder", "watcher_settings"} & set(payload.get("changed", ())):
+            # Restarting joins the observer thread; keep it off the publishing thread
+            threading.Thread(target=self.restart_watcher, daemon=True).start()
+
+    def restart_watcher(self):
+        with self.watcher_lock:
+            if self.watcher:
+                self.watcher.stop()
+                self.watcher = None
+            print("🔄 Configuration changed; restarting watcher...")
+            self.start_watcher()
+
     def on_file_changed(self, file_path):
         """Callback from Watchdog thread."""
         try:
+            import annotes
             status = annotes.process_pdf(file_path)
             basename = os.path.basename(file_path)
             print(f"Sync complete: {basename} ({status or 'Done'})")
@@ -141,14 +165,19 @@ class TrayApp:
         threading.Thread(target=self._run_scan, daemon=True).start()
 
     def _run_scan(self):
-        try:
-            annotes.main()
-            self.send_notification("Annotes", "Manual Scan Complete")
-        except Exception as e:
-            print(f"Scan failed: {e}")
+        # Runs as a job on the shared worker pool; progress streams to the dashboard
+        import jobs
+        job = jobs.MANAGER.submit_scan(source="tray")
+        job.wait()
+        if job.status == jobs.DONE:
+            summary = job.result
+            self.send_notification("Annotes", f"Manual Scan Complete: {summary['synced']} synced, {summary['failed']} failed")
+        else:
+            print(f"Scan failed: {job.error or job.status}")
 
     def open_dashboard(self, icon=None, item=None):
         print("🌐 Opening Dashboard...")
+        import web_ui
         web_ui.open_dashboard()
 
     def open_help(self, icon=None, item=None):
@@ -157,13 +186,21 @@ class TrayApp:
     def quit_app(self, icon, item):
         print("🛑 Shutting down Annotes...")
         self.remove_lock()
+        self.config_watch.set()
         if self.watcher:
             self.watcher.stop()
+        import writebehind
+        from connectors import ConnectorFactory
+        writebehind.flush_all()
+        ConnectorFactory.close_all()  # spills the HTTP backlog, closes pooled connections
         if self.icon:
             self.icon.stop()
         sys.exit(0)
 
     def run(self):
+        import pystray
+        from pystray import MenuItem as item
+
         # Define menu items
         menu = pystray.Menu(
             item('Scan Now', self.scan_now),
@@ -2,9 +2,12 @@ import yaml
 import glob
 import os
 from pathlib import Path
-import settings
+import runconfig
 import datetime
 
+# C-accelerated (libyaml) loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 # Loads the YAML configuration file
 def load_config(config_path="config.yaml"):
@@ -21,7 +24,8 @@ def load_config(config_path="config.yaml"):
     """
     try:
         with open(config_path, "r") as f:
-            config_data = yaml.safe_load(f)
+            # The libyaml-backed loader is several times faster when available
+            config_data = yaml.load(f, Loader=YAML_LOADER)
         return config_data
     except FileNotFoundError:
         print(f"Error: Configuration file not found at '{config_path}'")
@@ -45,18 +49,22 @@ def get_pdf_files(folder_path):
     return pdf_files
 
 
-def annotation_filename(pdf_basename):
+def annotation_filename(pdf_basename, run_config=None):
     """
     Constructs the name and full path for an annotation file based on config.
     Supports placeholders: {date}, {time}, {pdf_name}, {pdf_stem}
+
+    Args:
+        pdf_basename (str): File name of the PDF.
+        run_config (RunConfig, optional): Defaults to the current configuration.
     """
+    rc = run_config or runconfig.current()
     # ensure pdf_basename does not include file extension
     pdf_stem = Path(pdf_basename).stem
 
-    prefix = settings.CONFIG["output_settings"].get("annotated_file_prefix", "Notes - ")
-    suffix = settings.CONFIG["output_settings"].get("annotated_file_suffix", "")
-    file_format = settings.CONFIG["output_settings"].get("annotated_file_format", ".md")
-    notes_folder = Path(settings.CONFIG.get("notes_folder"))
+    prefix = rc.file_prefix
+    suffix = rc.file_suffix
+    notes_folder = Path(rc.notes_folder)
 
     # Dynamic Placeholder Replacement
     now = datetime.datetime.now()
@@ -71,54 +79,48 @@ def annotation_filename(pdf_basename):
         prefix = prefix.replace(placeholder, val)
         suffix = suffix.replace(placeholder, val)
 
-    apath = notes_folder / f"{prefix}{pdf_stem}{suffix}{file_format}"
+    apath = notes_folder / f"{prefix}{pdf_stem}{suffix}{rc.file_format}"
     aname = f"{prefix}{pdf_stem}{suffix}"
 
     return aname, apath
 
 
-def get_datestr():
+def get_datestr(run_config=None):
     """Generates a date string based on the configuration settings.
 
     Returns:
         str: The formatted date string.
     """
 
-    date_format = settings.CONFIG["output_settings"].get(
-        "date_string_format", "%Y-%m-%d"
-    )
+    date_format = (run_config or runconfig.current()).date_format
 
     current_date = datetime.datetime.now()
 
     return current_date.strftime(date_format)
 
 
-def get_timestr():
+def get_timestr(run_config=None):
     """Generates a time string based on the configuration settings.
 
     Returns:
         str: The formatted time string.
     """
 
-    time_format = settings.CONFIG["output_settings"].get(
-        "time_string_format", "%H:%M:%S"
-    )
+    time_format = (run_config or runconfig.current()).time_format
 
     current_time = datetime.datetime.now()
 
     return current_time.strftime(time_format)
 
 
-def get_datetime_str():
+def get_datetime_str(run_config=None):
     """Generates a date-time string based on the configuration settings.
 
     Returns:
         str: The formatted date-time string.
     """
 
-    datetime_format = settings.CONFIG["output_settings"].get(
-        "datetime_string_format", "%Y-%m-%d %H:%M:%S"
-    )
+    datetime_format = (run_config or runconfig.current()).datetime_format
 
     current_datetime = datetime.datetime.now()
 
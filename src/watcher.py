@@ -1,9 +1,91 @@
+import os
+import json
 import time
 import logging
 from pathlib import Path
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import FileSystemEventHandler, FileCreatedEvent, FileModifiedEvent, FileDeletedEvent
+from collections import deque
 import threading
+import weakref
+import settings
+import ledger
+import writebehind
+import events
+import metrics
+
+# Persisted folder snapshot used to catch up on changes made while we were not running
+SNAPSHOT_FILENAME = "watch_snapshot.json"
+SNAPSHOT_SAVE_INTERVAL = 60.0  # seconds between snapshot saves while running
+
+
+def is_watched_pdf(filename):
+    """Returns True for PDF paths we care about (ignores office lock files)."""
+    return filename.lower().endswith(".pdf") and not Path(filename).name.startswith(".~lock")
+
+
+def scan_folder(folder):
+    """
+    Takes a cheap snapshot of the PDFs directly inside `folder`.
+
+    Only directory entries and their stat data are read; no PDF is opened.
+
+    Args:
+        folder (str or Path): Folder to scan.
+
+    Returns:
+        dict: {file_path: [size, mtime_ns]}
+    """
+    snapshot = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not is_watched_pdf(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = [st.st_size, st.st_mtime_ns]
+    return snapshot
+
+
+def load_snapshot(snapshot_path, folder):
+    """Returns the persisted snapshot for `folder`, or None if there is none."""
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read watch snapshot {snapshot_path}: {e}")
+        return None
+    return data.get("folders", {}).get(str(folder))
+
+
+def save_snapshot(snapshot_path, folder, files):
+    """Persists the snapshot for `folder`, keeping entries of other folders intact."""
+    snapshot_path = Path(snapshot_path)
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+
+    data.setdefault("folders", {})[str(folder)] = files
+    tmp_path = snapshot_path.with_suffix(".tmp")
+    try:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        logging.warning(f"Could not save watch snapshot {snapshot_path}: {e}")
+
+# Live handlers, so the metrics endpoint can report the debounce queue depth
+_HANDLERS = weakref.WeakSet()
+metrics.WATCHER_QUEUE_DEPTH.set_function(lambda: sum(len(h.pending_files) for h in list(_HANDLERS)))
 
 class PDFHandler(FileSystemEventHandler):
     def __init__(self, callback, debounce_interval=2.0):
@@ -15,12 +97,15 @@ class PDFHandler(FileSystemEventHandler):
         self.callback = callback
         self.debounce_interval = debounce_interval
         self.pending_files = {} # {file_path: last_event_time}
+        self.first_seen = {} # {file_path: first_event_time}, for the debounce latency metric
+        self.suppressed_events = 0 # events dropped because they match our own I/O
         self.lock = threading.Lock()
         self.running = True
         
         # Start a single worker thread to check for stable files
         self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
         self.worker_thread.start()
+        _HANDLERS.add(self)
 
     def _process_queue(self):
         """Periodically checks pending files to see if they are ready to be processed."""
@@ -35,6 +120,7 @@ class PDFHandler(FileSystemEventHandler):
                     if now - last_time >= self.debounce_interval:
                         files_to_process.append(file_path)
                         del self.pending_files[file_path]
+                        metrics.DEBOUNCE_SECONDS.observe(now - self.first_seen.pop(file_path, last_time))
             
             # Process outside the lock
             for file_path in files_to_process:
@@ -47,64 +133,371 @@ class PDFHandler(FileSystemEventHandler):
         except Exception as e:
             logging.exception(f"Error processing {file_path}: {e}")
 
+    def _is_self_triggered(self, filename):
+        """Drops events for files that still match what we last read or wrote."""
+        if ledger.LEDGER.matches(filename):
+            self.suppressed_events += 1
+            metrics.SUPPRESSED_EVENTS.inc()
+            logging.debug(f"Ignoring self-triggered event for: {filename}")
+            return True
+        return False
+
+    def _touch(self, file_path, now):
+        """Records an event for `file_path`; caller holds the lock."""
+        self.pending_files[file_path] = now
+        self.first_seen.setdefault(file_path, now)
+
+    def enqueue(self, file_paths):
+        """Adds files to the debounce queue as if an event had been seen for each."""
+        now = time.time()
+        with self.lock:
+            for file_path in file_paths:
+                self._touch(file_path, now)
+
     def on_modified(self, event):
         if event.is_directory:
             return
         
         filename = event.src_path
-        if not filename.lower().endswith('.pdf'):
+        # Ignore non-PDFs and temp files (libreoffice lock files, etc.)
+        if not is_watched_pdf(filename):
             return
-            
-        # Ignore temp files (libreoffice lock files, etc.)
-        if Path(filename).name.startswith('.~lock'):
+
+        if self._is_self_triggered(filename):
             return
 
         logging.info(f"File modified detected: {filename}")
         
         with self.lock:
-            self.pending_files[filename] = time.time() # Update timestamp
+            self._touch(filename, time.time()) # Update timestamp
 
     def on_created(self, event):
+        if not event.is_directory and is_watched_pdf(event.src_path):
+            events.publish("pdf.created", path=event.src_path)
         # Treat creation same as modification for our purposes
         self.on_modified(event)
 
+    def on_deleted(self, event):
+        if not event.is_directory and is_watched_pdf(event.src_path):
+            events.publish("pdf.deleted", path=event.src_path)
+
     def on_moved(self, event):
         if event.is_directory:
             return
-        
+
+        if is_watched_pdf(event.src_path):
+            events.publish("pdf.deleted", path=event.src_path)
+
         filename = event.dest_path
-        if not filename.lower().endswith('.pdf'):
+        if not is_watched_pdf(filename):
             return
-            
-        if Path(filename).name.startswith('.~lock'):
+        events.publish("pdf.created", path=filename)
+
+        if self._is_self_triggered(filename):
             return
 
         logging.info(f"File moved/renamed detected: {filename}")
         with self.lock:
-            self.pending_files[filename] = time.time()
+            self._touch(filename, time.time())
             
     def stop(self):
         self.running = False
 
 
+class SnapshotPoller(threading.Thread):
+    """
+    Polling observer for network and FUSE mounts where inotify events never arrive.
+
+    Keeps an incremental index of directories and PDFs. A directory is only re-listed
+    when its own mtime changed (files were added, removed or renamed); in-place edits
+    are found by re-stating known files round-robin. Every stat counts against a
+    per-cycle budget, and the poll interval shrinks after changes and backs off when idle.
+
+    Implements the subset of the watchdog Observer interface used by SystemWatcher.
+    """
+
+    def __init__(self, min_interval=2.0, max_interval=60.0, backoff=1.5, max_stats_per_cycle=2000):
+        super().__init__(daemon=True)
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.backoff = float(backoff)
+        self.max_stats_per_cycle = int(max_stats_per_cycle)
+        self.interval = self.min_interval
+
+        self.handler = None
+        self.root = None
+        self.recursive = False
+        self.dirs = {}   # {dir_path: [mtime_ns, set(pdf_names), set(subdir_names)]}
+        self.files = {}  # {file_path: [size, mtime_ns] or None if not yet stated}
+        self.seeded_names = {}  # {dir_path: set(pdf_names)} from seed(), used on first listing
+        self.pending_dirs = deque()  # dirs left over when a cycle ran out of budget
+        self.restat_queue = deque()  # round-robin order for re-stating known files
+        self.stop_event = threading.Event()
+
+    def schedule(self, handler, path, recursive=False):
+        self.handler = handler
+        self.root = str(path)
+        self.recursive = recursive
+
+    def seed(self, files):
+        """Pre-populates the file index from a snapshot so no startup events are emitted."""
+        for path, sig in files.items():
+            self.files[path] = list(sig) if sig else None
+            self.seeded_names.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+
+    def run(self):
+        # Without a seed the first pass only builds the index; with one it reports drift
+        self.poll_once(emit=bool(self.files))
+        while not self.stop_event.wait(self.interval):
+            try:
+                changes = self.poll_once()
+            except Exception as e:
+                logging.exception(f"Polling cycle failed for {self.root}: {e}")
+                changes = 0
+            if changes:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        if self.is_alive():
+            super().join(timeout)
+
+    def _emit(self, event, emit):
+        if emit and self.handler:
+            self.handler.dispatch(event)
+
+    def poll_once(self, emit=True):
+        """
+        Runs one polling cycle within the stat budget.
+
+        Returns:
+            int: Number of changes detected.
+        """
+        budget = self.max_stats_per_cycle
+        changes = 0
+
+        if not self.pending_dirs:
+            self.pending_dirs.append(self.root)
+
+        # 1. Directories: re-list only those whose mtime moved
+        while self.pending_dirs and budget > 0:
+            dir_path = self.pending_dirs.popleft()
+            budget -= 1
+            try:
+                dir_mtime = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                self._forget_dir(dir_path, emit)
+                continue
+
+            known = self.dirs.get(dir_path)
+            if known is None or known[0] != dir_mtime:
+                names, subdirs = self._list_dir(dir_path)
+                old_names = known[1] if known else self.seeded_names.pop(dir_path, set())
+                for name in names - old_names:
+                    path = os.path.join(dir_path, name)
+                    if path not in self.files:
+                        self.files[path] = None
+                        self.restat_queue.appendleft(path)
+                        self._emit(FileCreatedEvent(path), emit)
+                        changes += 1
+                for name in old_names - names:
+                    path = os.path.join(dir_path, name)
+                    self.files.pop(path, None)
+                    self._emit(FileDeletedEvent(path), emit)
+                    changes += 1
+                for name in (known[2] if known else set()) - subdirs:
+                    self._forget_dir(os.path.join(dir_path, name), emit)
+                self.dirs[dir_path] = [dir_mtime, names, subdirs]
+            else:
+                subdirs = known[2]
+
+            if self.recursive:
+                self.pending_dirs.extend(os.path.join(dir_path, d) for d in subdirs)
+
+        # 2. Files: re-stat known files round-robin with whatever budget is left
+        if not self.restat_queue:
+            self.restat_queue.extend(self.files)
+        while self.restat_queue and budget > 0:
+            path = self.restat_queue.popleft()
+            if path not in self.files:
+                continue
+            budget -= 1
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # removal is picked up through the directory mtime
+            sig = [st.st_size, st.st_mtime_ns]
+            previous = self.files[path]
+            self.files[path] = sig
+            if previous is not None and previous != sig:
+                self._emit(FileModifiedEvent(path), emit)
+                changes += 1
+
+        return changes
+
+    def _list_dir(self, dir_path):
+        names, subdirs = set(), set()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.add(entry.name)
+                        elif is_watched_pdf(entry.name):
+                            names.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.warning(f"Could not list {dir_path}: {e}")
+        return names, subdirs
+
+    def _forget_dir(self, dir_path, emit):
+        known = self.dirs.pop(dir_path, None)
+        if not known:
+            return
+        for name in known[1]:
+            path = os.path.join(dir_path, name)
+            self.files.pop(path, None)
+            self._emit(FileDeletedEvent(path), emit)
+        for name in known[2]:
+            self._forget_dir(os.path.join(dir_path, name), emit)
+
+
 class SystemWatcher:
-    def __init__(self, pdf_folder, callback):
+    def __init__(self, pdf_folder, callback, snapshot_path=None):
         self.pdf_folder = pdf_folder
         self.callback = callback
-        self.observer = Observer()
-        self.handler = PDFHandler(callback)
+        self.handler = PDFHandler(self._on_file_ready)
+
+        watcher_settings = (settings.CONFIG or {}).get("watcher_settings", {}) or {}
+        self.root_settings = self._root_settings(watcher_settings)
+        self.mode = self.root_settings.get("mode", "native")
+        self.observer = self._create_observer()
+        self.reconcile_on_start = self.root_settings.get("reconcile_on_start", True)
+        ledger.LEDGER.ttl = self.root_settings.get("self_event_ttl_seconds", ledger.LEDGER.ttl)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else settings.USER_DATA_DIR / SNAPSHOT_FILENAME
+        self.snapshot = {}  # {file_path: [size, mtime_ns]} of files known to be processed
+        self.snapshot_lock = threading.Lock()
+        self.last_snapshot_save = 0.0
+        self.snapshot_ready = False  # only persist once the snapshot reflects the folder
+
+    def _root_settings(self, watcher_settings):
+        """Merges global watcher settings with overrides for this root under `roots:`."""
+        merged = {k: v for k, v in watcher_settings.items() if k != "roots"}
+        here = Path(self.pdf_folder).expanduser().resolve()
+        for root, overrides in (watcher_settings.get("roots") or {}).items():
+            if Path(root).expanduser().resolve() == here:
+                merged.update(overrides or {})
+        return merged
+
+    def _create_observer(self):
+        if self.mode == "polling":
+            polling = self.root_settings.get("polling", {}) or {}
+            return SnapshotPoller(
+                min_interval=polling.get("min_interval_seconds", 2.0),
+                max_interval=polling.get("max_interval_seconds", 60.0),
+                backoff=polling.get("backoff_factor", 1.5),
+                max_stats_per_cycle=polling.get("max_stats_per_cycle", 2000),
+            )
+        if self.mode != "native":
+            logging.warning(f"Unknown watcher mode '{self.mode}' for {self.pdf_folder}; using native events.")
+        return Observer()
+
+    def _on_file_ready(self, file_path):
+        """Runs the user callback, then records the file as processed in the snapshot."""
+        self.callback(file_path)
+        if not self.snapshot_ready:
+            return
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        with self.snapshot_lock:
+            self.snapshot[file_path] = [st.st_size, st.st_mtime_ns]
+        if time.time() - self.last_snapshot_save >= SNAPSHOT_SAVE_INTERVAL:
+            self.save_snapshot()
+
+    def save_snapshot(self):
+        with self.snapshot_lock:
+            files = dict(self.snapshot)
+        self.last_snapshot_save = time.time()
+        save_snapshot(self.snapshot_path, self.pdf_folder, files)
+
+    def reconcile(self):
+        """
+        Catches up on changes made while the watcher was not running.
+
+        Diffs the current folder listing (paths, sizes, mtimes) against the snapshot
+        persisted by the last run and enqueues new or changed files into the normal
+        debounce queue. Unchanged files are never opened.
+
+        Returns:
+            list: The file paths that were enqueued.
+        """
+        started = time.time()
+        previous = load_snapshot(self.snapshot_path, self.pdf_folder)
+        try:
+            current = scan_folder(self.pdf_folder)
+        except OSError as e:
+            logging.warning(f"Startup reconciliation skipped, cannot list {self.pdf_folder}: {e}")
+            return []
+
+        if isinstance(self.observer, SnapshotPoller):
+            self.observer.seed(current)
+
+        if previous is None:
+            # First run: record a baseline instead of reprocessing the whole library
+            with self.snapshot_lock:
+                self.snapshot = current
+            self.snapshot_ready = True
+            self.save_snapshot()
+            logging.info(f"No previous watch snapshot; recorded baseline of {len(current)} PDFs.")
+            return []
+
+        changed = [path for path, sig in current.items() if previous.get(path) != sig]
+        changed_set = set(changed)
+        with self.snapshot_lock:
+            # Changed files are only recorded once processed, so a crash retries them
+            self.snapshot = {p: sig for p, sig in current.items() if p not in changed_set}
+        self.snapshot_ready = True
+        self.save_snapshot()
+
+        self.handler.enqueue(changed)
+        logging.info(
+            f"Startup reconciliation: {len(changed)} of {len(current)} PDFs changed "
+            f"({time.time() - started:.2f}s)"
+        )
+        return changed
 
     def start(self):
         if not Path(self.pdf_folder).exists():
             logging.warning(f"Watch folder does not exist: {self.pdf_folder}")
             return
 
-        logging.info(f"Starting SystemWatcher on: {self.pdf_folder}")
+        logging.info(f"Starting SystemWatcher ({self.mode}) on: {self.pdf_folder}")
         self.observer.schedule(self.handler, self.pdf_folder, recursive=False)
+
+        if isinstance(self.observer, SnapshotPoller):
+            # The poller diffs against its seeded index, so reconcile first to seed it
+            if self.reconcile_on_start:
+                self.reconcile()
+            self.observer.start()
+            return
+
         self.observer.start()
+        # Reconcile after subscribing so nothing slips between the scan and the first event
+        if self.reconcile_on_start:
+            self.reconcile()
 
     def stop(self):
         logging.info("Stopping SystemWatcher...")
         self.handler.stop()
         self.observer.stop()
         self.observer.join()
+        writebehind.flush_all()
+        if self.snapshot_ready:
+            self.save_snapshot()
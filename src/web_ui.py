@@ -1,30 +1,38 @@
 import os
+import gzip
+import json
 import yaml
+import hashlib
 import logging
 import time
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, ValidationError
-import uvicorn
 import webbrowser
 import threading
 import asyncio
 
 # Import project modules
+# (uvicorn, markdown, the search index and the scheduler are imported on first use, so
+# importing web_ui stays cheap for the tray app and the tests)
 import settings
 import annotes
-import markdown
+import stats
+import jobs
+import metrics
+import logfiles
+import runconfig
+import profiling
+from workers import PRIORITY_MANUAL, PRIORITY_SCAN
+from broadcaster import BROADCASTER
 
 # --- Path Setup ---
-# Initialize settings to ensure USER_DATA_DIR is available
-settings.initialize()
-
-# Config & Data live in User Data Dir (Persistent)
-CONFIG_PATH = settings.USER_DATA_DIR / "config.yaml"
+# Config & Data live in User Data Dir (Persistent); config.yaml is loaded on first use
+CONFIG_PATH = settings.CONFIG_PATH
 LOG_PATH = settings.USER_DATA_DIR / "app.log"
 
 # Static Assets live in Resource Path (Bundled)
@@ -37,16 +45,113 @@ app = FastAPI(title="Annotes | Pro Dashboard")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 # --- Simple Caching ---
-STATS_CACHE = {
-    "data": None,
-    "last_fetched": 0
-}
-CACHE_TTL = 10  # seconds
+# {path: (mtime_ns, value)} for small files re-read only when they change on disk
+_FILE_CACHE: Dict[str, Any] = {}
+
+def cached_by_mtime(path: Path, loader, default=None):
+    """Returns loader(path), re-running it only when the file's mtime changes."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return default
+    cached = _FILE_CACHE.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    value = loader(path)
+    _FILE_CACHE[str(path)] = (mtime, value)
+    return value
+
+def file_mtime(path: Path) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+def refresh_settings():
+    """Reloads settings only when config.yaml changed on disk (not on every request)."""
+    settings.reload()
+
+# --- Rendered Pages & Conditional Responses ---
+# The dashboard shares a process with the watcher: render pages once per source change
+# and let browsers revalidate with ETag / Last-Modified instead of re-downloading.
+GZIP_MIN_SIZE = 1024  # bytes; smaller bodies are not worth compressing
+_PAGE_CACHE: Dict[str, Dict[str, Any]] = {}
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+def render_cached(template_name: str, sources: List[Path], context_factory) -> Dict[str, Any]:
+    """
+    Renders a template once per change of its source files.
+
+    Args:
+        template_name: Template file in TEMPLATES_DIR.
+        sources: Files the page is built from; their mtimes form the cache key.
+        context_factory: Called to build the template context on a cache miss.
+    """
+    sources = [TEMPLATES_DIR / template_name] + list(sources)
+    mtimes = tuple(file_mtime(p) for p in sources)
+    cached = _PAGE_CACHE.get(template_name)
+    if cached and cached["key"] == mtimes:
+        return cached
+    body = templates.get_template(template_name).render(**context_factory()).encode("utf-8")
+    entry = {"key": mtimes, "body": body, "etag": make_etag(body), "last_modified": max(mtimes), "gzip": None}
+    _PAGE_CACHE[template_name] = entry
+    return entry
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def conditional_response(request: Request, body: bytes, media_type: str, etag: Optional[str] = None,
+                         last_modified: Optional[float] = None, entry: Optional[Dict[str, Any]] = None) -> Response:
+    """
+    Builds a response honouring If-None-Match / If-Modified-Since and gzip Accept-Encoding.
+
+    Pass a `render_cached` entry to reuse its ETag and memoized gzip body.
+    """
+    if entry is not None:
+        body, etag, last_modified = entry["body"], entry["etag"], entry["last_modified"]
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        if entry is not None:
+            if entry["gzip"] is None:
+                entry["gzip"] = gzip.compress(body, compresslevel=6)
+            body = entry["gzip"]
+        else:
+            body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def json_response(request: Request, data: Any) -> Response:
+    body = json.dumps(data, default=str).encode("utf-8")
+    return conditional_response(request, body, "application/json")
 
 # --- Pydantic Models ---
 class OutputSettings(BaseModel):
     annotated_file_tags: List[str] = Field(default_factory=list)
 
+class JobRequest(BaseModel):
+    path: Optional[str] = None
+    scan: bool = False
+    priority: Optional[int] = None
+
 class AppSettings(BaseModel):
     pdf_folder: str
     notes_folder: str
@@ -74,90 +179,217 @@ async def get_logo():
 @app.get("/settings", response_class=HTMLResponse)
 async def root(request: Request):
     """Dashboard Settings Page."""
-    settings.initialize()
-    config = settings.CONFIG
-    docs = load_yaml(DOCS_PATH)
-    return templates.TemplateResponse("settings.html", {
-        "request": request,
-        "config": config,
-        "docs": docs
+    refresh_settings()
+    page = render_cached("settings.html", [CONFIG_PATH, DOCS_PATH], lambda: {
+        "config": settings.CONFIG,
+        "docs": cached_by_mtime(DOCS_PATH, load_yaml, default={}),
     })
+    return conditional_response(request, b"", "text/html; charset=utf-8", entry=page)
 
 @app.get("/stats")
-async def get_stats():
-    settings.initialize()
-    
-    pdf_folder = Path(settings.CONFIG.get("pdf_folder", "."))
-    notes_folder = Path(settings.CONFIG.get("notes_folder", "."))
-    
-    stats = {
-        "pdfs": 0,
-        "notes": 0,
-        "syncs": 0,
-        "errors": 0,
-    }
-    
-    try:
-        if pdf_folder.exists():
-            stats["pdfs"] = len(list(pdf_folder.glob("*.pdf")))
-    except: pass
-        
-    try:
-        if notes_folder.exists():
-            stats["notes"] = len(list(notes_folder.glob("*.md")))
-    except: pass
-        
-    recent_logs = annotes.get_recent_logs()
-    stats["recent_logs"] = recent_logs
-    stats["syncs"] = sum(1 for line in recent_logs if "Synced:" in line)
-    stats["errors"] = sum(1 for line in recent_logs if "ERROR" in line or "Exception" in line)
-            
-    return JSONResponse(content=stats)
+async def get_stats(request: Request):
+    # Counters are kept in memory from watcher/pipeline events; no disk scan per request
+    refresh_settings()
+    stats_data = stats.SERVICE.snapshot()
+    stats_data["recent_logs"] = annotes.get_recent_logs()
+
+    # Scan records written by the scheduler (duration, files changed, next planned run)
+    from scheduler import load_scan_history, SCAN_HISTORY_PATH
+    history = cached_by_mtime(SCAN_HISTORY_PATH, load_scan_history, default={})
+    stats_data["last_scan"] = history["scans"][-1] if history.get("scans") else None
+    stats_data["next_scan"] = history.get("next_run")
+
+    return json_response(request, stats_data)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Pipeline, watcher and process metrics in Prometheus text format."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8",
+                    headers={"Cache-Control": "no-cache"})
+
+SSE_HEARTBEAT = 15  # seconds between keep-alive comments
+
+def format_sse(seq: int, event: Optional[str], data: str) -> str:
+    lines = [f"id: {seq}"]
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
 
 @app.get("/events")
 async def sse_endpoint(request: Request):
-    """Server-Sent Events for real-time log streaming."""
+    """Server-Sent Events for real-time log streaming, resumable via Last-Event-ID."""
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscription = BROADCASTER.subscribe(last_event_id)
+
     async def event_generator():
-        yield f"data: Connected to log stream\n\n"
-        last_index = len(annotes.LOG_BUFFER)
-        
-        while True:
-            if await request.is_disconnected():
-                break
-            current_buffer = list(annotes.LOG_BUFFER)
-            if len(current_buffer) > last_index:
-                new_logs = current_buffer[last_index:]
-                for log in new_logs:
-                    clean_log = log.replace("\n", " ")
-                    yield f"data: {clean_log}\n\n"
-                last_index = len(current_buffer)
-            if len(current_buffer) < last_index:
-                last_index = 0
-            await asyncio.sleep(0.5)
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id is None:
+                yield "data: Connected to log stream\n\n"
+            while True:
+                try:
+                    item = await subscription.get(SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    # Dropped as a slow consumer; the browser reconnects and resumes
+                    break
+                yield format_sse(*item)
+        finally:
+            BROADCASTER.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def render_markdown(text: str) -> str:
+    import markdown
+    return markdown.markdown(text, extensions=['tables', 'fenced_code'])
+
+def render_manual(path: Path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return render_markdown(f.read())
 
 @app.get("/help", response_class=HTMLResponse)
 async def help_page(request: Request):
-    html_content = ""
-    if MANUAL_PATH.exists():
-        with open(MANUAL_PATH, "r", encoding="utf-8") as f:
-            text = f.read()
-            html_body = markdown.markdown(text, extensions=['tables', 'fenced_code'])
-            html_content = html_body
+    def context():
+        html_content = cached_by_mtime(MANUAL_PATH, render_manual)
+        if html_content is None:
+            html_content = "<h1>Usage Manual Not Found</h1><p>Ensure USER_MANUAL.md is bundled correctly.</p>"
+        return {"content": html_content}
+    page = render_cached("help.html", [MANUAL_PATH], context)
+    return conditional_response(request, b"", "text/html; charset=utf-8", entry=page)
+
+@app.get("/preview")
+def preview(request: Request, path: str, format: str = "markdown"):
+    """
+    Renders the note a PDF would produce without writing anything (`format=markdown|html`).
+    Unchanged PDFs are served from the render cache.
+    """
+    pdf_path = Path(path).expanduser()
+    if pdf_path.suffix.lower() != ".pdf" or not pdf_path.is_file():
+        return JSONResponse({"error": f"Not a PDF file: {path}"}, status_code=400)
+    if format not in ("markdown", "html"):
+        return JSONResponse({"error": "format must be 'markdown' or 'html'"}, status_code=400)
+
+    rendered, note = annotes.preview_pdf(str(pdf_path))
+    if note is None:
+        return JSONResponse({"error": rendered["status"], "status": rendered["status"]}, status_code=422)
+    if format == "html":
+        body = render_markdown(note)
+        media_type = "text/html; charset=utf-8"
     else:
-        html_content = "<h1>Usage Manual Not Found</h1><p>Ensure USER_MANUAL.md is bundled correctly.</p>"
-    return templates.TemplateResponse("help.html", {"request": request, "content": html_content})
+        body, media_type = note, "text/markdown; charset=utf-8"
+    response = conditional_response(request, body.encode("utf-8"), media_type)
+    response.headers["X-Render-Cache"] = "hit" if rendered["cached"] else "miss"
+    return response
+
+@app.get("/search")
+def search(request: Request, q: str, page: int = 1, per_page: int = 20):
+    """
+    Ranked full-text search over every indexed highlight and comment (see annotation_index).
+    Uses the database of the configured "index" connector, or the default one.
+    """
+    import annotation_index
+    if page < 1 or not 1 <= per_page <= 100:
+        return JSONResponse({"error": "page must be >= 1 and per_page between 1 and 100"}, status_code=400)
+    spec = next((s for s in runconfig.current().connectors if s.name == "index"), None)
+    db_path = spec.options.get("db_path") if spec else None
+    if not Path(db_path or annotation_index.default_db_path()).expanduser().exists():
+        return JSONResponse({"error": "No annotation index yet; add the 'index' connector and sync."}, status_code=404)
+
+    started = time.perf_counter()
+    try:
+        found = annotation_index.get_index(db_path).search(q, limit=per_page, offset=(page - 1) * per_page)
+    except Exception as e:
+        logging.error(f"Search for {q!r} failed: {e}")
+        return JSONResponse({"error": f"Search failed: {e}"}, status_code=400)
+    return JSONResponse({
+        "query": q,
+        "page": page,
+        "per_page": per_page,
+        "has_more": found["has_more"],
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": found["results"],
+    })
+
+@app.get("/profiles")
+def list_profiles():
+    """Captured per-document profiles (see profiling), newest first."""
+    return JSONResponse({"enabled": runconfig.current().profiling.enabled, "profiles": profiling.list_profiles()})
+
+@app.get("/profiles/{name}")
+def download_profile(name: str, format: str = "prof"):
+    """A capture's .prof (for pstats/snakeviz) or, with ?format=txt, its text summary."""
+    path = profiling.profile_file(name, format)
+    if path is None:
+        return JSONResponse({"error": "Profile not found"}, status_code=404)
+    if format == "txt":
+        return FileResponse(path, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
 
 @app.get("/export-logs")
-async def export_logs():
-    if LOG_PATH.exists():
-        return FileResponse(
-            path=LOG_PATH,
-            filename=f"annotes_debug_{int(time.time())}.log",
-            media_type="text/plain"
+def export_logs(request: Request, tail: Optional[int] = None, level: Optional[str] = None,
+                since: Optional[str] = None, until: Optional[str] = None, bundle: bool = False):
+    """
+    Streams app.log from disk. Supports `?tail=N`, `?level=WARNING`, `?since=`/`?until=`
+    (ISO times), byte `Range` requests, and `?bundle=1` for a tar of the log plus its
+    rotated archives.
+    """
+    stamp = int(time.time())
+    if bundle:
+        paths = logfiles.archive_paths(LOG_PATH) + ([LOG_PATH] if LOG_PATH.exists() else [])
+        if not paths:
+            return JSONResponse({"error": "Log file not found"}, status_code=404)
+        return StreamingResponse(
+            logfiles.iter_bundle(paths),
+            media_type="application/x-tar",
+            headers={"Content-Disposition": f'attachment; filename="annotes_logs_{stamp}.tar"'},
         )
-    return JSONResponse({"error": "Log file not found"}, status_code=404)
+
+    if not LOG_PATH.exists():
+        return JSONResponse({"error": "Log file not found"}, status_code=404)
+    headers = {"Content-Disposition": f'attachment; filename="annotes_debug_{stamp}.log"'}
+
+    if tail or level or since or until:
+        try:
+            since_dt, until_dt = logfiles.parse_time(since), logfiles.parse_time(until)
+        except ValueError:
+            return JSONResponse({"error": "since/until must be ISO dates"}, status_code=400)
+        if tail:
+            # Newest records are found by reading backwards; only the last `tail` are kept
+            lines = logfiles.filtered_lines(LOG_PATH, tail=tail, level=level, since=since_dt, until=until_dt)
+            body = (line + b"\n" for line in lines)
+        else:
+            body = logfiles.iter_filtered(LOG_PATH, level=level, since=since_dt, until=until_dt)
+        return StreamingResponse(body, media_type="text/plain; charset=utf-8", headers=headers)
+
+    size = LOG_PATH.stat().st_size
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = logfiles.parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(logfiles.iter_range(LOG_PATH, 0, size - 1),
+                                 media_type="text/plain; charset=utf-8", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(logfiles.iter_range(LOG_PATH, start, end), status_code=206,
+                             media_type="text/plain; charset=utf-8", headers=headers)
 
 @app.post("/save")
 async def save_settings(request: Request):
@@ -180,7 +412,8 @@ async def save_settings(request: Request):
             if value == "" and orig_val is not None and not isinstance(orig_val, (str, list)):
                 continue 
                 
-            if isinstance(orig_val, bool):
+            if isinstance(orig_val, bool) or (orig_val is None and str(value).lower() in ('true', 'false')):
+                # Toggles of sections missing from an older config.yaml are stored as booleans too
                 ptr[field] = (str(value).lower() in ['true', 'on', '1', 'yes'])
             elif isinstance(orig_val, int):
                 try: ptr[field] = int(value)
@@ -203,15 +436,55 @@ async def save_settings(request: Request):
         return JSONResponse({"status": "error", "message": f"Validation Error: {str(e)}"}, status_code=400)
 
     save_yaml(CONFIG_PATH, new_config)
-    settings.initialize()
+    # Publishes "config.changed": the watcher, scheduler and pool pick the change up live
+    settings.reload(force=True)
     
     return JSONResponse({"status": "success", "message": "Configuration synchronized successfully."})
 
-class Server(uvicorn.Server):
-    def install_signal_handlers(self):
-        pass
+# --- Jobs ---
+@app.post("/jobs")
+async def create_job(job_request: JobRequest):
+    """Queues processing of one PDF (`path`) or a full library scan (`scan: true`)."""
+    if job_request.scan:
+        priority = PRIORITY_SCAN if job_request.priority is None else job_request.priority
+        job = jobs.MANAGER.submit_scan(priority=priority)
+    elif job_request.path:
+        pdf_path = Path(job_request.path).expanduser()
+        if pdf_path.suffix.lower() != ".pdf" or not pdf_path.is_file():
+            return JSONResponse({"error": f"Not a PDF file: {job_request.path}"}, status_code=400)
+        priority = PRIORITY_MANUAL if job_request.priority is None else job_request.priority
+        job = jobs.MANAGER.submit_pdf(str(pdf_path), priority=priority)
+    else:
+        return JSONResponse({"error": "Provide either 'path' or 'scan': true"}, status_code=400)
+    return JSONResponse(job.to_dict(), status_code=202, headers={"Location": f"/jobs/{job.id}"})
+
+@app.get("/jobs")
+async def list_jobs():
+    return JSONResponse([job.to_dict() for job in reversed(jobs.MANAGER.list())])
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.MANAGER.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = jobs.MANAGER.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    cancelled = jobs.MANAGER.cancel(job_id)
+    return JSONResponse({"cancelled": cancelled, **job.to_dict()}, status_code=200 if cancelled else 409)
 
 def run_server(port: int = 8080):
+    import uvicorn
+
+    class Server(uvicorn.Server):
+        def install_signal_handlers(self):
+            pass
+
+    settings.initialize()
     config = uvicorn.Config(
         app=app, 
         host="127.0.0.1", 
@@ -0,0 +1,150 @@
+################################### Worker Pool Module #######################################
+#
+# A single long-lived pool of worker threads shared by the scheduler, the tray app and
+# the dashboard. Keeping the pool (and the interpreter) warm avoids paying interpreter
+# startup, pymupdf/yaml imports and config loading for every scan.
+#
+# Work is taken from a priority queue, so a PDF the user asked for explicitly runs
+# ahead of the remaining files of a full library scan.
+#
+##############################################################################################
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+import settings
+import metrics
+import events
+
+DEFAULT_MAX_WORKERS = 2
+
+# Lower values run first
+PRIORITY_RETIRE = -1  # internal: tells one worker thread to exit
+PRIORITY_MANUAL = 0
+PRIORITY_NORMAL = 5
+PRIORITY_SCAN = 10
+PRIORITY_IDLE = 20  # housekeeping that may wait for everything else
+
+
+class WorkerPool:
+    """Priority-ordered thread pool that can be resized at runtime."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()  # FIFO order within a priority
+        self.lock = threading.Lock()
+        self.threads = []
+        self.abandoned = set()  # running futures whose thread exits once they return
+        self.max_workers = 0
+        self.resize(max_workers)
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """
+        Schedules `fn(*args, **kwargs)`.
+
+        Returns:
+            concurrent.futures.Future: Cancellable until a worker picks the task up.
+        """
+        future = Future()
+        self.queue.put((priority, next(self.counter), future, fn, args, kwargs))
+        return future
+
+    def _worker(self):
+        while True:
+            _, _, future, fn, args, kwargs = self.queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            with self.lock:
+                if future in self.abandoned:
+                    self.abandoned.discard(future)
+                    return  # a replacement worker already took this thread's place
+
+    def _spawn(self):
+        thread = threading.Thread(target=self._worker, name="annotes-worker", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def _retire(self, count):
+        for _ in range(count):
+            self.queue.put((PRIORITY_RETIRE, next(self.counter), None, None, None, None))
+
+    def resize(self, max_workers):
+        """Grows or shrinks the pool; retiring workers finish their current task first."""
+        max_workers = max(1, int(max_workers))
+        with self.lock:
+            if max_workers == self.max_workers:
+                return
+            if max_workers > self.max_workers:
+                self.threads = [t for t in self.threads if t.is_alive()]
+                for _ in range(max_workers - self.max_workers):
+                    self._spawn()
+            else:
+                self._retire(self.max_workers - max_workers)
+            previous, self.max_workers = self.max_workers, max_workers
+        if previous:
+            logging.info(f"Worker pool resized to {max_workers} workers")
+
+    def abandon(self, future):
+        """
+        Gives up on a running task without losing its worker slot.
+
+        Threads cannot be interrupted, so the task keeps running; a fresh worker starts
+        in its place and the stuck thread exits when the task eventually returns.
+
+        Returns:
+            bool: False if the task already finished or the pool is shut down.
+        """
+        with self.lock:
+            if future.done() or future in self.abandoned or not self.max_workers:
+                return False
+            self.abandoned.add(future)
+            self.threads = [t for t in self.threads if t.is_alive()]
+            self._spawn()
+        logging.info("Replaced a worker stuck on an abandoned task")
+        return True
+
+    def pending(self):
+        """Approximate number of queued tasks."""
+        return self.queue.qsize()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            count, self.max_workers = self.max_workers, 0
+        self._retire(count)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            perf = (settings.CONFIG or {}).get("performance_settings", {}) or {}
+            _POOL = WorkerPool(perf.get("max_workers", DEFAULT_MAX_WORKERS))
+        return _POOL
+
+
+def _on_config_changed(payload):
+    """Applies a changed performance_settings.max_workers to the running pool."""
+    if "performance_settings" not in payload.get("changed", ()) or _POOL is None:
+        return
+    perf = payload["new"].get("performance_settings", {}) or {}
+    _POOL.resize(perf.get("max_workers", DEFAULT_MAX_WORKERS))
+
+
+events.subscribe("config.changed", _on_config_changed)
+metrics.WORKER_QUEUE_DEPTH.set_function(lambda: _POOL.pending() if _POOL else 0)
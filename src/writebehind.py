@@ -0,0 +1,118 @@
+################################## Write-Behind Module ######################################
+#
+# Delays note writes briefly and coalesces them per output path.
+#
+# While a PDF is being annotated, every save re-renders its note; with a write-behind
+# queue only the latest content for a path reaches the disk once the delay expires.
+# Pending writes are flushed on shutdown (TrayApp.quit_app, SystemWatcher.stop, exit).
+#
+##############################################################################################
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import metrics
+
+
+class WriteBehindQueue:
+    """Bounded, per-path coalescing queue in front of a write function."""
+
+    def __init__(self, write, delay=2.0, max_pending=256):
+        """
+        Args:
+            write (func): Called as write(path, title, content) to perform a write.
+            delay (float): Seconds a write waits for newer content for the same path.
+            max_pending (int): Paths held at most; beyond that the oldest is written at once.
+        """
+        self.write = write
+        self.delay = float(delay)
+        self.max_pending = max(1, int(max_pending))
+        self.pending = OrderedDict()  # {path: (title, content, due)}, oldest first
+        self.cond = threading.Condition()
+        # Held from taking an item off `pending` until it is written, so an older write can't
+        # land after a newer one and flush() can't return while a write is in flight.
+        # Lock order: write_lock, then cond.
+        self.write_lock = threading.Lock()
+        self.thread = None
+        self.coalesced = 0
+        _QUEUES.add(self)
+
+    def put(self, path, title, content):
+        """Queues the content for `path`, replacing any write still pending for it."""
+        overflow = False
+        with self.cond:
+            if path in self.pending:
+                # Keep the original due time so a steady stream of saves still gets written
+                self.pending[path] = (title, content, self.pending[path][2])
+                self.coalesced += 1
+                metrics.WRITES_COALESCED.inc()
+            else:
+                self.pending[path] = (title, content, time.monotonic() + self.delay)
+                overflow = len(self.pending) > self.max_pending
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="annotes-write-behind", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+        if overflow:
+            # Over the bound: the oldest pending note is written straight away
+            with self.write_lock:
+                with self.cond:
+                    item = self.pending.popitem(last=False) if len(self.pending) > self.max_pending else None
+                if item is not None:
+                    self._write(item[0], *item[1][:2])
+
+    def _write(self, path, title, content):
+        """Performs one write; the caller holds write_lock."""
+        try:
+            self.write(path, title, content)
+        except Exception as e:
+            logging.error(f"Delayed write of {path} failed: {e}")
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                wait = next(iter(self.pending.values()))[2] - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+            with self.write_lock:
+                with self.cond:
+                    # Re-checked: a flush may have taken it meanwhile
+                    if not self.pending or next(iter(self.pending.values()))[2] > time.monotonic():
+                        continue
+                    path, (title, content, _) = self.pending.popitem(last=False)
+                self._write(path, title, content)
+
+    def flush(self):
+        """Writes everything still pending right away, after any write already in flight."""
+        with self.write_lock:
+            with self.cond:
+                items = list(self.pending.items())
+                self.pending.clear()
+            for path, (title, content, _) in items:
+                self._write(path, title, content)
+        return len(items)
+
+    def __len__(self):
+        with self.cond:
+            return len(self.pending)
+
+
+_QUEUES = weakref.WeakSet()
+
+
+def flush_all():
+    """Flushes every write-behind queue; called on shutdown."""
+    flushed = sum(queue.flush() for queue in list(_QUEUES))
+    if flushed:
+        logging.info(f"Flushed {flushed} delayed note writes")
+    return flushed
+
+
+atexit.register(flush_all)
+metrics.WRITE_BEHIND_PENDING.set_function(lambda: sum(len(q) for q in list(_QUEUES)))
@@ -0,0 +1,75 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import events
+from annotation_index import AnnotationIndex, IndexConnector, fts_query
+
+
+def highlight(page, text, comment="", rect=(0, 0, 10, 10)):
+    return {"page": page, "type": "Highlight", "highlight_text": text, "comment": comment,
+            "colors": {"stroke": (1.0, 1.0, 0.0)}, "modDate": datetime(2024, 5, 1, 12, 0), "rect": rect}
+
+
+def test_incremental_reindex_and_ranked_search(tmp_path):
+    index = AnnotationIndex(tmp_path / "annotations.db")
+    first = [highlight(1, "Caching reduces latency"), highlight(2, "Unrelated remark", "about caching")]
+    assert index.index_document("/lib/a.pdf", first, title="Notes - a") == {"added": 2, "removed": 0, "unchanged": 0}
+    index.index_document("/lib/b.pdf", [highlight(3, "Latency budgets", rect=(1, 1, 2, 2))])
+
+    # Re-sync with one highlight replaced: only that row changes
+    second = [first[0], highlight(4, "Write-behind queues")]
+    assert index.index_document("/lib/a.pdf", second) == {"added": 1, "removed": 1, "unchanged": 1}
+
+    found = index.search("latency")
+    assert [(r["pdf_path"], r["page"]) for r in found["results"]] == [("/lib/a.pdf", 1), ("/lib/b.pdf", 3)] or \
+        [(r["pdf_path"], r["page"]) for r in found["results"]] == [("/lib/b.pdf", 3), ("/lib/a.pdf", 1)]
+    assert found["results"][0]["color"] == "#ffff00"
+    assert "<mark>" in found["results"][0]["snippet"]
+    assert index.search("remark")["results"] == []
+
+    page1 = index.search("latenc*", limit=1)
+    page2 = index.search("latenc*", limit=1, offset=1)
+    assert page1["has_more"] and not page2["has_more"]
+    assert page1["results"][0]["page"] != page2["results"][0]["page"]
+
+
+def test_connector_indexes_pipeline_notes(tmp_path):
+    connector = IndexConnector(db_path=str(tmp_path / "annotations.db"))
+    note = {"title": "Notes - a", "content": "", "output_path": "/notes/a.md",
+            "pdf_path": "/lib/a.pdf", "annotations": [highlight(1, "Spill to disk")]}
+
+    assert connector.push_notes([note]) == ["indexed"]
+    assert connector.push_note("Notes - a", "") == "skipped"
+    assert connector.index.search("spill")["results"][0]["note_path"] == "/notes/a.md"
+
+
+def test_fts_query_escapes_syntax():
+    assert fts_query('foo "bar" NEAR(x) pre*') == '"foo" """bar""" "NEAR(x)" "pre"*'
+
+
+def test_deleted_pdfs_leave_the_index(tmp_path):
+    connector = IndexConnector(db_path=str(tmp_path / "annotations.db"))
+    pdfs = {name: tmp_path / f"{name}.pdf" for name in ("kept", "deleted", "offline")}
+    for name, pdf in pdfs.items():
+        pdf.write_bytes(b"%PDF")
+        connector.index.index_document(pdf, [highlight(1, f"{name} highlight")])
+    try:
+        # Watcher: a real delete, and a replace-on-save that only looks like one
+        pdfs["deleted"].unlink()
+        events.publish("pdf.deleted", path=str(pdfs["deleted"]))
+        events.publish("pdf.deleted", path=str(pdfs["kept"]))
+        assert connector.index.search("deleted")["results"] == []
+        assert len(connector.index.search("kept")["results"]) == 1
+
+        # Removed while nothing was watching: pruned in the background after a full scan
+        pdfs["offline"].unlink()
+        events.publish("scan.finished", files=[str(pdfs["kept"])], summary={}, full=False)
+        assert connector.pruning is None
+        events.publish("scan.finished", files=[str(pdfs["kept"])], summary={}, full=True)
+        assert connector.pruning.result(timeout=5) == 1
+        assert connector.index.search("offline")["results"] == []
+        assert len(connector.index.search("kept")["results"]) == 1
+    finally:
+        connector.close()
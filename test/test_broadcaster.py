@@ -0,0 +1,41 @@
+import sys
+import asyncio
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from broadcaster import Broadcaster
+
+
+def test_resume_from_last_event_id():
+    async def scenario():
+        broadcaster = Broadcaster(history_size=10, queue_size=10)
+        for i in range(5):
+            broadcaster.publish(f"line {i}")
+
+        subscription = broadcaster.subscribe(last_event_id=3)
+        # Published from another thread, as the logging handler does
+        thread = threading.Thread(target=broadcaster.publish, args=("line 5",))
+        thread.start()
+        thread.join()
+
+        received = [await subscription.get(1) for _ in range(3)]
+        assert [seq for seq, _, _ in received] == [4, 5, 6]
+        assert received[-1][2] == "line 5"
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_is_dropped_without_blocking_publisher():
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=2)
+        subscription = broadcaster.subscribe()
+        for i in range(5):
+            broadcaster.publish(f"line {i}")
+        await asyncio.sleep(0)  # let the loop deliver the queued items
+
+        assert subscription.dropped
+        assert subscription not in broadcaster.subscribers
+        assert await subscription.get(1) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,232 @@
+import dataclasses
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pymupdf
+
+import annotes
+import connectors
+import events
+from connectors import ConnectorFactory, NoteConnector, push_to_connectors
+from runconfig import ConnectorSpec, RunConfig
+
+
+class SlowConnector(NoteConnector):
+    release = threading.Event()
+
+    def push_note(self, title, content, output_path=None):
+        self.release.wait(5)
+
+
+class FlakyConnector(NoteConnector):
+    calls = 0
+
+    def push_note(self, title, content, output_path=None):
+        FlakyConnector.calls += 1
+        if FlakyConnector.calls == 1:
+            raise OSError("temporarily unavailable")
+
+
+class RecordingConnector(NoteConnector):
+    batches = []
+
+    def push_note(self, title, content, output_path=None):
+        raise AssertionError("scans push whole batches")
+
+    def push_notes(self, batch):
+        RecordingConnector.batches.append([note["title"] for note in batch])
+        return ["recorded"] * len(batch)
+
+
+class SlowBatchConnector(NoteConnector):
+    def push_note(self, title, content, output_path=None):
+        raise AssertionError("scans push whole batches")
+
+    def push_notes(self, batch):
+        time.sleep(0.4)
+        return ["recorded"] * len(batch)
+
+
+class BrokenConnector(NoteConnector):
+    def push_note(self, title, content, output_path=None):
+        raise RuntimeError("boom")
+
+
+def test_fanout_isolates_slow_and_failing_connectors(tmp_path, monkeypatch):
+    for name, cls in (("slow", SlowConnector), ("flaky", FlakyConnector), ("broken", BrokenConnector)):
+        monkeypatch.setitem(ConnectorFactory.REGISTRY, name, cls)
+    monkeypatch.setattr(connectors, "RETRY_DELAY", 0.01)
+    run_config = RunConfig(connectors=(
+        ConnectorSpec("slow", timeout=0.2),
+        ConnectorSpec("flaky", retries=1),
+        ConnectorSpec("broken", retries=0),
+        ConnectorSpec("file"),
+    ))
+    output_path = tmp_path / "notes" / "Notes - paper.md"
+
+    try:
+        results = push_to_connectors(run_config, "paper", "# Notes\n", str(output_path))
+    finally:
+        SlowConnector.release.set()
+
+    by_name = {r["connector"]: r for r in results}
+    assert by_name["slow"]["status"] == "timeout"
+    assert by_name["flaky"]["status"] == "ok" and by_name["flaky"]["attempts"] == 2
+    assert by_name["broken"]["status"] == "failed" and by_name["broken"]["error"] == "boom"
+    assert by_name["file"]["status"] == "ok"
+    assert output_path.read_text() == "# Notes\n"
+
+
+class HungConnector(NoteConnector):
+    release = threading.Event()
+
+    def push_note(self, title, content, output_path=None):
+        self.release.wait(5)
+        return "late"
+
+
+def test_hung_connector_only_uses_up_its_own_threads(tmp_path, monkeypatch):
+    monkeypatch.setitem(ConnectorFactory.REGISTRY, "hung", HungConnector)
+    run_config = RunConfig(connector_workers=1, connectors=(
+        ConnectorSpec("hung", timeout=0.2, retries=0),
+        ConnectorSpec("file", timeout=0.2),
+    ))
+    output_path = tmp_path / "notes" / "Notes - paper.md"
+
+    try:
+        first = push_to_connectors(run_config, "paper", "# v1\n", str(output_path))
+        started = time.monotonic()
+        second = push_to_connectors(run_config, "paper", "# v2\n", str(output_path))
+        elapsed = time.monotonic() - started
+    finally:
+        HungConnector.release.set()
+
+    assert [r["status"] for r in first] == ["timeout", "ok"]
+    # The hung push still holds the connector's only thread: fail fast, the file still gets written
+    assert [r["status"] for r in second] == ["busy", "ok"] and elapsed < 0.2
+    assert output_path.read_text() == "# v2\n"
+
+    # A changed max_workers takes effect on the next push
+    wider = dataclasses.replace(run_config, connector_workers=3)
+    push_to_connectors(wider, "paper", "# v3\n", str(output_path))
+    hung = ConnectorFactory.get_connector(run_config.connectors[0])
+    assert connectors._LANES[hung].workers == 3
+    ConnectorFactory.close_all()
+
+
+def test_file_connector_skips_identical_notes(tmp_path):
+    connector = connectors.FileConnector(fsync=True)
+    output_path = tmp_path / "notes" / "Notes - paper.md"
+
+    assert connector.push_note("paper", "# Notes\n", str(output_path)) == "written"
+    assert output_path.stat().st_mode & 0o777 == 0o666 & ~connectors._UMASK
+    mtime = output_path.stat().st_mtime_ns
+    assert connector.push_note("paper", "# Notes\n", str(output_path)) == "unchanged"
+    assert output_path.stat().st_mtime_ns == mtime
+
+    assert connector.push_note("paper", "# Notes v2\n", str(output_path)) == "written"
+    assert output_path.read_text() == "# Notes v2\n"
+    assert (connector.written, connector.skipped) == (2, 1)
+    assert [p.name for p in output_path.parent.iterdir()] == ["Notes - paper.md"]
+
+
+def test_scan_hands_connectors_batches(tmp_path, monkeypatch):
+    monkeypatch.setitem(ConnectorFactory.REGISTRY, "recording", RecordingConnector)
+    pdf_files = []
+    for name in ("a", "b", "c"):
+        doc = pymupdf.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "Important sentence")
+        page.add_highlight_annot(page.search_for("Important")[0])
+        pdf_files.append(str(tmp_path / f"{name}.pdf"))
+        doc.save(pdf_files[-1])
+        doc.close()
+    run_config = RunConfig(
+        notes_folder=str(tmp_path / "notes"),
+        connectors=(ConnectorSpec("recording"), ConnectorSpec("file")),
+        connector_batch_size=2,
+    )
+
+    summary = annotes.scan_library(pdf_files=pdf_files, run_config=run_config)
+
+    assert RecordingConnector.batches == [["Notes - a", "Notes - b"], ["Notes - c"]]
+    assert summary["synced"] == 3 and summary["notes_written"] == 3
+    assert sorted(p.name for p in (tmp_path / "notes").glob("*.md")) == \
+        ["Notes - a.md", "Notes - b.md", "Notes - c.md"]
+
+
+def test_resync_with_default_template_keeps_unchanged_note(tmp_path, monkeypatch):
+    import yaml
+
+    with open(Path(__file__).parent.parent / "src" / "config.default.yaml") as f:
+        config = yaml.safe_load(f)
+    run_config = dataclasses.replace(RunConfig.from_config(config), notes_folder=str(tmp_path / "notes"))
+    assert {"created", "modified"} <= set(run_config.front_matter_keys)
+    pdf_path = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Important sentence")
+    page.add_highlight_annot(page.search_for("Important")[0])
+    doc.save(pdf_path)
+    doc.close()
+
+    now = ["2026-01-01 09:00:00"]
+    monkeypatch.setattr(annotes, "get_datetime_str", lambda run_config=None: now[0])
+
+    report = {}
+    assert annotes.process_pdf(str(pdf_path), run_config, report) is None
+    note_path = tmp_path / "notes" / "Notes -paper.md"
+    mtime = note_path.stat().st_mtime_ns
+
+    # A later sync of the same annotations only differs in its timestamps
+    now[0] = "2026-01-01 09:00:07"
+    report = {}
+    annotes.process_pdf(str(pdf_path), run_config, report)
+    assert [r["outcome"] for r in report["connectors"]] == ["unchanged"]
+    assert note_path.stat().st_mtime_ns == mtime
+
+    # New annotations rewrite the note but keep its creation time
+    doc = pymupdf.open(pdf_path)
+    doc[0].add_highlight_annot(doc[0].search_for("sentence")[0])
+    doc.saveIncr()
+    doc.close()
+    now[0] = "2026-01-02 10:30:00"
+    report = {}
+    annotes.process_pdf(str(pdf_path), run_config, report)
+    assert [r["outcome"] for r in report["connectors"]] == ["written"]
+    text = note_path.read_text()
+    assert "created: 2026-01-01 09:00:00" in text and "modified: 2026-01-02 10:30:00" in text
+
+
+def test_batch_connector_time_is_split_across_its_notes(tmp_path, monkeypatch):
+    monkeypatch.setitem(ConnectorFactory.REGISTRY, "slowbatch", SlowBatchConnector)
+    pdf_files = []
+    for name in ("a", "b"):
+        doc = pymupdf.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "Important sentence")
+        page.add_highlight_annot(page.search_for("Important")[0])
+        pdf_files.append(str(tmp_path / f"{name}.pdf"))
+        doc.save(pdf_files[-1])
+        doc.close()
+    run_config = RunConfig(
+        notes_folder=str(tmp_path / "notes"),
+        connectors=(ConnectorSpec("slowbatch"),),
+        connector_batch_size=2,
+    )
+    timings = []
+
+    def collect(payload):
+        timings.append(payload["timings"]["connector"])
+
+    events.subscribe("pipeline.result", collect)
+    try:
+        annotes.scan_library(pdf_files=pdf_files, run_config=run_config)
+    finally:
+        events.unsubscribe("pipeline.result", collect)
+
+    assert len(timings) == 2
+    assert all(0.15 < seconds < 0.35 for seconds in timings)
@@ -0,0 +1,57 @@
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import events
+import eventlog
+
+
+def test_pipeline_results_become_one_record_per_document(tmp_path):
+    log = tmp_path / "events.jsonl"
+    eventlog.start(log, {"event_log": True})
+    try:
+        events.publish("pipeline.result", path="/pdfs/a.pdf", outcome="synced", status=None,
+                       timings={"parse": 0.25, "render": 0.5}, fingerprint="10:20", pages=12,
+                       annotation_count=7, images=1, bytes_written=2048, cached=False,
+                       connectors=[{"connector": "file", "status": "ok", "outcome": "written", "duration": 0.1}])
+        events.publish("pipeline.result", path="/pdfs/b.pdf", outcome="skipped",
+                       status="skipped: no annotations", timings={"parse": 0.01})
+    finally:
+        eventlog.stop()
+
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r["path"] for r in records] == ["/pdfs/a.pdf", "/pdfs/b.pdf"]
+    assert records[0]["seconds"] == 0.75
+    assert records[0]["pages"] == 12 and records[0]["annotations"] == 7 and records[0]["bytes_written"] == 2048
+    assert records[0]["connectors"] == [{"connector": "file", "status": "ok", "outcome": "written"}]
+    assert records[1]["outcome"] == "skipped" and records[1]["pages"] == 0
+
+
+def test_disabled_event_log_records_nothing(tmp_path):
+    log = tmp_path / "events.jsonl"
+    assert eventlog.start(log, {"event_log": False}) is None
+    events.publish("pipeline.result", path="/pdfs/a.pdf", outcome="synced", status=None)
+    assert not log.exists()
+
+
+def test_summary_lists_slowest_documents_and_throughput(tmp_path):
+    records = [
+        {"time": "2026-03-01T10:00:00", "path": "fast.pdf", "outcome": "synced", "seconds": 0.5,
+         "timings": {"parse": 0.5}, "pages": 10},
+        {"time": "2026-03-01T11:00:00", "path": "slow.pdf", "outcome": "synced", "seconds": 4.5,
+         "timings": {"parse": 0.5, "render": 4.0}, "pages": 40},
+        {"time": "2026-03-02T09:00:00", "path": "broken.pdf", "outcome": "failed", "seconds": 0.1,
+         "timings": {"open": 0.1}},
+    ]
+    log = tmp_path / "events.jsonl"
+    log.write_text("".join(json.dumps(r) + "\n" for r in records) + "not json\n")
+
+    summary = eventlog.summarize(eventlog.iter_records(log), top=2)
+
+    assert [r["path"] for r in summary["slowest"]] == ["slow.pdf", "fast.pdf"]
+    assert summary["totals"]["documents"] == 3 and summary["totals"]["failed"] == 1
+    assert summary["trend"]["2026-03-01"]["pages_per_second"] == 10.0
+    assert summary["trend"]["2026-03-02"]["failed"] == 1
+    assert summary["stages"]["parse"] == {"total": 1.0, "mean": 0.5}
+    assert "slow.pdf" in eventlog.format_summary(summary)
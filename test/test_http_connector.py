@@ -0,0 +1,146 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+
+from connectors import ConnectorFactory, push_to_connectors
+from http_connector import HttpConnector
+from runconfig import ConnectorSpec, RunConfig
+
+
+class NoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), NoteHandler)
+        self.notes = []
+        self.clients = set()
+        self.status = 201
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/notes"
+
+
+class NoteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.clients.add(self.client_address)
+        self.server.requests += 1
+        status = self.server.status
+        if status < 300:
+            self.server.notes.append(json.loads(body))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = NoteServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_posts_notes_over_one_keepalive_connection(server, tmp_path):
+    connector = HttpConnector(server.url, concurrency=1, spill_folder=str(tmp_path / "spill"))
+    try:
+        assert connector.push_note("a", "# A", "/notes/a.md") == "sent"
+        assert connector.push_notes([{"title": t, "content": t, "output_path": None} for t in "bc"]) == ["sent", "sent"]
+    finally:
+        connector.close()
+
+    assert [n["title"] for n in server.notes] == ["a", "b", "c"]
+    assert server.notes[0] == {"title": "a", "content": "# A", "path": "/notes/a.md"}
+    assert len(server.clients) == 1 and connector.pool.created == 1
+
+
+def test_backlogs_and_spills_while_endpoint_is_down(server, tmp_path):
+    server.status = 503
+    spill = tmp_path / "spill"
+    connector = HttpConnector(server.url, max_retries=1, backoff_seconds=0.01, max_backoff_seconds=0.05,
+                              backlog_size=1, spill_folder=str(spill))
+    try:
+        assert connector.push_note("a", "v1", "/notes/a.md") == "backlogged"
+        assert connector.push_note("b", "v1", "/notes/b.md") == "backlogged"
+        assert connector.push_note("b", "v2", "/notes/b.md") == "backlogged"
+        # Backlog holds one note in memory; the older one went to disk
+        assert len(list(spill.glob("*.json"))) == 1 and len(connector.spilled) == 1
+
+        server.status = 201
+        assert wait_for(lambda: len(server.notes) == 2)
+        assert not connector.spilled
+    finally:
+        connector.close()
+
+    assert [(n["title"], n["content"]) for n in server.notes] == [("a", "v1"), ("b", "v2")]
+    assert list(spill.glob("*.json")) == []
+
+
+def test_retries_stop_within_the_budget(server, tmp_path):
+    server.status = 503
+    connector = HttpConnector(server.url, request_timeout=0.2, max_retries=50, backoff_seconds=0.05,
+                              max_backoff_seconds=0.05, retry_budget_seconds=0.5, spill_folder=str(tmp_path / "spill"))
+    try:
+        started = time.monotonic()
+        assert connector.push_note("a", "# A", "/notes/a.md") == "backlogged"
+        assert time.monotonic() - started < 0.5
+        assert 1 < server.requests < 50
+    finally:
+        connector.close()
+
+
+def test_pipeline_does_not_retry_the_http_connector(server, tmp_path):
+    server.status = 400
+    options = {"url": server.url, "spill_folder": str(tmp_path / "spill")}
+    run_config = RunConfig(connectors=(ConnectorSpec("http", timeout=5, retries=3, options=options),))
+    try:
+        [result] = push_to_connectors(run_config, "a", "# A", "/notes/a.md")
+    finally:
+        ConnectorFactory.close_all()
+
+    assert result["status"] == "failed" and result["attempts"] == 1
+    assert server.requests == 1
+
+
+def test_spilled_backlog_drains_in_order_without_relisting(server, tmp_path):
+    server.status = 503
+    spill = tmp_path / "spill"
+    connector = HttpConnector(server.url, max_retries=0, backoff_seconds=0.01, max_backoff_seconds=0.05,
+                              backlog_size=0, spill_folder=str(spill))
+    try:
+        for i in range(5):
+            assert connector.push_note(f"n{i}", "x", f"/notes/n{i}.md") == "backlogged"
+        assert list(connector.spilled) == [HttpConnector._key({"output_path": f"/notes/n{i}.md"}) for i in range(5)]
+
+        def no_listing():
+            raise AssertionError("spill folder listed while draining")
+        connector._spilled_files = no_listing
+        server.status = 201
+        assert wait_for(lambda: len(server.notes) == 5)
+    finally:
+        connector.close()
+
+    assert [n["title"] for n in server.notes] == [f"n{i}" for i in range(5)]
+    assert not connector.spilled and list(spill.glob("*.json")) == []
@@ -0,0 +1,47 @@
+import io
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pymupdf
+
+import jsonl_export
+
+
+class FlushCounter(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+def make_pdf(path, pages):
+    doc = pymupdf.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+        annot = page.add_highlight_annot(page.search_for(text.split()[0])[0])
+        annot.set_info(content=f"note on {text}")
+        annot.update()
+    doc.save(path)
+    doc.close()
+
+
+def test_streams_one_record_per_annotation_page_by_page(tmp_path):
+    make_pdf(tmp_path / "b.pdf", ["Alpha words", "Beta words"])
+    (tmp_path / "sub").mkdir()
+    make_pdf(tmp_path / "sub" / "a.pdf", ["Gamma words"])
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    out = FlushCounter()
+
+    pdf_files = jsonl_export.collect_pdf_files([tmp_path])
+    summary = jsonl_export.export_files(pdf_files, out)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert summary == {"files": 3, "records": 3, "failed": 1}
+    assert [(Path(r["pdf"]).name, r["page"], r["highlight_text"]) for r in records] == [
+        ("b.pdf", 1, "Alpha"), ("b.pdf", 2, "Beta"), ("a.pdf", 1, "Gamma")]
+    assert records[0]["comment"] == "note on Alpha words" and records[0]["type"] == "Highlight"
+    assert out.flushes == 3  # once per page with annotations
@@ -0,0 +1,107 @@
+import sys
+import logging
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import logfiles
+
+
+LOG = (
+    "2026-01-01 10:00:00,000 - INFO - first\n"
+    "2026-01-01 11:00:00,000 - ERROR - failed\n"
+    "Traceback (most recent call last):\n"
+    "ValueError: bad pdf\n"
+    "2026-01-02 09:00:00,000 - INFO - second\n"
+    "2026-01-03 09:00:00,000 - WARNING - third\n"
+)
+
+
+def test_reverse_reader_handles_lines_across_blocks(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text(LOG)
+
+    lines = list(logfiles.read_lines_reverse(log, block_size=7))
+
+    assert [l.decode() for l in reversed(lines)] == LOG.split("\n")
+
+
+def test_filters_keep_tracebacks_with_their_record(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text(LOG)
+
+    assert [l.decode()[-5:] for l in logfiles.filtered_lines(log, tail=2)] == ["econd", "third"]
+    errors = logfiles.filtered_lines(log, level="error")
+    assert [l.decode() for l in errors][1:] == ["Traceback (most recent call last):", "ValueError: bad pdf"]
+    since = logfiles.filtered_lines(log, since=logfiles.parse_time("2026-01-02"))
+    assert len(since) == 2
+
+
+def test_since_window_streams_from_its_start_offset(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text(LOG)
+    since = logfiles.parse_time("2026-01-01T10:30")
+
+    offset = logfiles.since_offset(log, since, block_size=7)
+    assert LOG.encode()[offset:].startswith(b"2026-01-01 11:00:00,000 - ERROR")
+    assert logfiles.since_offset(log, logfiles.parse_time("2026-02-01")) == len(LOG)
+
+    window = logfiles.iter_filtered(log, since=since, until=logfiles.parse_time("2026-01-02T12:00"))
+    assert b"".join(window).decode() == LOG.split("\n", 1)[1].rsplit("2026-01-03", 1)[0]
+    warnings = logfiles.iter_filtered(log, level="warning", since=logfiles.parse_time("2026-01-02"))
+    assert [l.decode() for l in warnings] == ["2026-01-03 09:00:00,000 - WARNING - third\n"]
+
+
+def test_queue_logging_formats_once_for_all_sinks(tmp_path):
+    class Recorder(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.lines = []
+
+        def emit(self, record):
+            self.lines.append(self.format(record))
+
+    sinks = [Recorder(), Recorder()]
+    sinks[1].setLevel(logging.WARNING)
+    logfiles.start_queue_logging(sinks, level=logging.INFO)
+    try:
+        logging.info("queued %s", "record")
+        logging.warning("second")
+        assert logfiles.flush_logging()
+    finally:
+        logfiles.stop_queue_logging()
+
+    assert [line.split(" - ", 1)[1] for line in sinks[0].lines] == ["INFO - queued record", "WARNING - second"]
+    assert sinks[1].lines == sinks[0].lines[1:]
+
+
+def test_notes_log_stays_open_and_flushes(tmp_path):
+    notes_log = logfiles.NotesLog(flush_interval=60)
+    path = tmp_path / "annotes.log"
+    notes_log.write(path, "one\n")
+    notes_log.write(path, "two\n")
+    handle = notes_log.files[str(path)]
+
+    notes_log.flush()
+    assert path.read_text() == "one\ntwo\n"
+    notes_log.write(path, "three\n")
+    assert notes_log.files[str(path)] is handle
+
+    notes_log.close()
+    assert path.read_text() == "one\ntwo\nthree\n"
+
+
+def test_age_rotation_survives_restarts(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text(LOG)  # first record 2026-01-01; the file was written to just now
+
+    handler = logfiles.CompressingRotatingFileHandler(str(log), backup_count=2, rotate_seconds=7 * 86400)
+    handler.setFormatter(logging.Formatter(logfiles.LOG_FORMAT))
+    try:
+        record = logging.LogRecord("annotes", logging.INFO, __file__, 1, "after restart", None, None)
+        assert handler.rollover_at < logfiles.datetime(2026, 1, 9).timestamp()
+        handler.emit(record)
+    finally:
+        handler.close()
+
+    assert (tmp_path / "app.log.1.gz").exists()
+    assert log.read_text().endswith("after restart\n")
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import events
+import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_latency_seconds", "Test latency.", ["stage"], buckets=(0.1, 1.0))
+    try:
+        histogram.observe(0.05, stage="open")
+        histogram.observe(0.5, stage="open")
+        histogram.observe(5.0, stage="open")
+        lines = histogram.render()
+    finally:
+        metrics.REGISTRY.remove(histogram)
+
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{stage="open",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="open",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="open",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="open"} 3' in lines
+
+
+def test_pipeline_results_are_counted_by_outcome():
+    before = metrics.PDFS_PROCESSED.values.get(("skipped",), 0)
+    events.publish("pipeline.result", path="a.pdf", outcome="skipped", status="skipped: no annotations")
+
+    assert metrics.PDFS_PROCESSED.values[("skipped",)] == before + 1
+    assert 'annotes_pdfs_total{outcome="skipped"}' in metrics.render()
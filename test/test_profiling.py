@@ -0,0 +1,72 @@
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import profiling
+import runconfig
+from runconfig import ProfilingSpec, RunConfig
+
+
+def run(pdf_path, spec, folder, seconds=0.0):
+    run_config = RunConfig(profiling=spec)
+    original = profiling.profile_dir
+    profiling.profile_dir = lambda: folder
+    try:
+        with profiling.profile_document(pdf_path, run_config):
+            time.sleep(seconds)
+    finally:
+        profiling.profile_dir = original
+    return profiling.list_profiles(folder)
+
+
+def test_matching_paths_are_profiled_and_listed(tmp_path):
+    spec = ProfilingSpec(enabled=True, paths=("*big*.pdf",), top=5)
+
+    assert run("/library/small.pdf", spec, tmp_path) == []
+    profiles = run("/library/big book.pdf", spec, tmp_path)
+
+    assert len(profiles) == 1
+    assert profiles[0]["pdf"].endswith("big book.pdf") and profiles[0]["reason"] == "path"
+    summary = profiling.profile_file(profiles[0]["name"], "txt", tmp_path).read_text()
+    assert "cumulative" in summary
+    assert profiling.profile_file(profiles[0]["name"], "prof", tmp_path).stat().st_size > 0
+
+
+def test_threshold_keeps_only_slow_runs_and_retention_prunes(tmp_path):
+    spec = ProfilingSpec(enabled=True, threshold_seconds=0.05, keep=2)
+
+    assert run("/library/fast.pdf", spec, tmp_path) == []
+    for name in ("a", "b", "c"):
+        profiles = run(f"/library/{name}.pdf", spec, tmp_path, seconds=0.06)
+        time.sleep(0.01)
+
+    assert [p["pdf"][-5:] for p in profiles] == ["c.pdf", "b.pdf"]
+    assert len(list(tmp_path.glob("*.txt"))) == 2
+
+
+def test_disabled_profiling_and_bad_names(tmp_path):
+    assert run("/library/a.pdf", ProfilingSpec(), tmp_path) == []
+    assert profiling.profile_file("../config", "txt", tmp_path) is None
+    assert profiling.profile_file("x", "py", tmp_path) is None
+
+
+def test_environment_variable_enables_profiling():
+    config = {"profiling": {"enabled": False, "paths": ["*.pdf"], "threshold_seconds": 5}}
+
+    assert runconfig._profiling_spec(config, {}).enabled is False
+    assert runconfig._profiling_spec(config, {"ANNOTES_PROFILE": "1"}).paths == ("*.pdf",)
+    spec = runconfig._profiling_spec(config, {"ANNOTES_PROFILE": "*huge*, *slow*"})
+    assert spec.enabled and spec.paths == ("*huge*", "*slow*") and spec.threshold_seconds == 5
+
+
+def test_enabled_flag_saved_as_string_is_parsed():
+    # The dashboard stores toggles of a section missing from config.yaml as strings
+    for value, expected in (("false", False), ("False", False), ("0", False), ("no", False),
+                            ("true", True), ("1", True), ("yes", True), (None, False), (True, True)):
+        assert runconfig._profiling_spec({"profiling": {"enabled": value}}, {}).enabled is expected
+
+
+def test_captures_record_their_scope(tmp_path):
+    profiles = run("/library/a.pdf", ProfilingSpec(enabled=True), tmp_path)
+    assert profiles[0]["scope"] == ("process" if sys.version_info >= (3, 12) else "thread")
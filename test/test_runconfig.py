@@ -0,0 +1,51 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pymupdf
+
+import annotes
+from runconfig import RunConfig
+
+
+def make_config(notes_folder, prefix):
+    return {
+        "notes_folder": str(notes_folder),
+        "output_settings": {
+            "annotated_file_prefix": prefix,
+            "annotated_file_format": ".md",
+            "yaml_front_matter_settings": {"include_yaml_front_matter": False},
+        },
+        "annotation_settings": {"symbol_heading": ".h1, #"},
+        "markdown_settings": {"tab_size": 2},
+    }
+
+
+def test_from_config_resolves_settings_once():
+    rc = RunConfig.from_config(make_config("/notes", "N - ") | {"debug_mode": True})
+
+    assert rc.triggers.match_heading("# Title") == "#"
+    assert rc.markdown.tab_size == 2
+    assert [spec.name for spec in rc.connectors] == ["file", "log"]
+    assert rc.config_hash == RunConfig.from_config(make_config("/notes", "N - ") | {"debug_mode": True}).config_hash
+
+
+def test_concurrent_runs_with_different_configs(tmp_path):
+    pdf_path = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Important sentence")
+    annot = page.add_highlight_annot(page.search_for("Important")[0])
+    annot.set_info(content="# Key idea")
+    annot.update()
+    doc.save(pdf_path)
+    doc.close()
+
+    configs = [RunConfig.from_config(make_config(tmp_path / name, f"{name} - ")) for name in ("a", "b")]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        statuses = list(executor.map(lambda rc: annotes.process_pdf(str(pdf_path), rc), configs))
+
+    assert statuses == [None, None]
+    assert "# Key idea" in (tmp_path / "a" / "a - paper.md").read_text()
+    assert "# Key idea" in (tmp_path / "b" / "b - paper.md").read_text()
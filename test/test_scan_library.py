@@ -0,0 +1,103 @@
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pymupdf
+
+import annotes
+from runconfig import RunConfig
+from workers import WorkerPool
+
+
+def make_pdf(path, text="Important sentence"):
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    page.add_highlight_annot(page.search_for("Important")[0]).update()
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_in_process_scan_skips_a_pdf_that_is_already_being_processed(tmp_path):
+    run_config = RunConfig(notes_folder=str(tmp_path / "notes"))
+    busy = make_pdf(tmp_path / "busy.pdf")
+    free = make_pdf(tmp_path / "free.pdf")
+
+    assert annotes._claim(busy, run_config)  # e.g. a run a previous scan gave up waiting for
+    try:
+        summary = annotes.scan_library(pdf_files=[busy, free], run_config=run_config)
+    finally:
+        annotes._release(busy, run_config, {})
+
+    assert (summary["synced"], summary["skipped"], summary["failed"]) == (1, 1, 0)
+    assert annotes.scan_library(pdf_files=[busy], run_config=run_config)["synced"] == 1
+
+
+def test_timed_out_pdf_is_not_processed_concurrently(tmp_path, monkeypatch):
+    run_config = RunConfig(notes_folder=str(tmp_path / "notes"))
+    pdf = make_pdf(tmp_path / "slow.pdf")
+    gate = threading.Event()
+    runs = []
+    process = annotes._process_pdf
+
+    def slow_process(pdf_path, run_config, report):
+        runs.append(pdf_path)
+        status = process(pdf_path, run_config, report)
+        if len(runs) == 1:
+            gate.wait(10)
+        return status
+
+    monkeypatch.setattr(annotes, "_process_pdf", slow_process)
+    pool = WorkerPool(2)
+    try:
+        summary = annotes.scan_library(pdf_files=[pdf], pool=pool, pdf_timeout=0.2, run_config=run_config)
+        assert summary["timed_out"] == 1
+
+        # The abandoned run still owns the PDF: a later scan or watcher event skips it
+        assert annotes.scan_library(pdf_files=[pdf], pool=pool, run_config=run_config)["skipped"] == 1
+        assert annotes.process_pdf(pdf, run_config) == annotes.BUSY_STATUS
+
+        # Edited meanwhile: the owner processes it once more when it finishes
+        with open(pdf, "ab") as f:
+            f.write(b"\n% edited")
+        gate.set()
+        deadline = time.monotonic() + 10
+        while annotes._IN_FLIGHT and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        gate.set()
+        pool.shutdown()
+
+    assert not annotes._IN_FLIGHT
+    assert runs == [pdf, pdf]
+
+
+def test_stuck_pdfs_do_not_starve_the_pool(tmp_path, monkeypatch):
+    run_config = RunConfig(notes_folder=str(tmp_path / "notes"))
+    stuck = [make_pdf(tmp_path / f"stuck{i}.pdf") for i in range(2)]
+    rest = [make_pdf(tmp_path / f"ok{i}.pdf") for i in range(3)]
+    gate = threading.Event()
+    process = annotes._process_pdf
+
+    def maybe_hang(pdf_path, run_config, report):
+        if pdf_path in stuck:
+            gate.wait(30)
+        return process(pdf_path, run_config, report)
+
+    monkeypatch.setattr(annotes, "_process_pdf", maybe_hang)
+    pool = WorkerPool(2)
+    try:
+        started = time.monotonic()
+        summary = annotes.scan_library(pdf_files=stuck + rest, pool=pool, pdf_timeout=0.2, run_config=run_config)
+        assert time.monotonic() - started < 10
+        assert (summary["timed_out"], summary["synced"]) == (2, 3)
+    finally:
+        gate.set()
+        pool.shutdown()
+
+    # The stuck threads exit once their PDFs return instead of growing the pool for good
+    assert not pool.abandoned
+    assert not [t for t in pool.threads if t.is_alive()]
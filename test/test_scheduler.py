@@ -0,0 +1,93 @@
+import sys
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import yaml
+
+import scheduler
+from scheduler import AdaptiveIntervalPolicy, TaskScheduler, SUMMARY_LINE
+
+
+def make_policy(**kwargs):
+    kwargs = dict(dict(min_minutes=5, max_minutes=240, jitter=0, max_duty_cycle=0), **kwargs)
+    return AdaptiveIntervalPolicy(**kwargs)
+
+
+def test_policy_backs_off_while_idle_and_speeds_up_on_changes():
+    policy = make_policy()
+    assert policy.next_interval(60, {"files_changed": 0, "duration": 1}) == 90
+    assert policy.next_interval(90, {"files_changed": 0, "duration": 1}) == 135
+
+    policy = make_policy()
+    assert policy.next_interval(60, {"files_changed": 3, "duration": 1}) == 30
+    # Recent changes keep the interval where it is until the smoothed rate decays
+    assert policy.next_interval(30, {"files_changed": 0, "duration": 1}) == 30
+    assert policy.next_interval(30, {"files_changed": 0, "duration": 1}) == 30
+    assert policy.next_interval(30, {"files_changed": 0, "duration": 1}) == 30
+    assert policy.next_interval(30, {"files_changed": 0, "duration": 1}) == 45
+
+
+def test_policy_clamps_to_bounds_and_duty_cycle():
+    policy = make_policy()
+    assert policy.next_interval(200, {"files_changed": 0}) == 240
+    assert policy.next_interval(6, {"files_changed": 10}) == 5
+
+    # A 3 minute scan at a 10% duty cycle needs at least 30 minutes between runs
+    policy = make_policy(max_duty_cycle=0.1)
+    assert policy.next_interval(20, {"files_changed": 10, "duration": 180}) == 30
+
+    policy = make_policy(jitter=0.5)
+    for _ in range(50):
+        assert 5 <= policy.next_interval(6, {"files_changed": 0}) <= 240
+
+
+def make_scheduler(tmp_path, monkeypatch, adaptive=True):
+    monkeypatch.setattr(scheduler, "load_scan_history", lambda: {"scans": []})
+    monkeypatch.setattr(scheduler, "save_scan_history", lambda *args, **kwargs: None)
+    config = {"scheduler_settings": {"interval_minutes": 60, "adaptive": {"enabled": adaptive}}}
+    (tmp_path / "config.yaml").write_text(yaml.safe_dump(config))
+    return TaskScheduler(tmp_path)
+
+
+def test_scan_record_counts_rewritten_notes_not_synced_pdfs(tmp_path, monkeypatch):
+    task_scheduler = make_scheduler(tmp_path, monkeypatch)
+    task_scheduler.record_scan(0, {"files": 20, "synced": 20, "notes_written": 0, "notes_unchanged": 20})
+    task_scheduler.record_scan(0, {"files": 20, "synced": 20, "notes_written": 2, "notes_queued": 1})
+    assert [scan["files_changed"] for scan in task_scheduler.history] == [0, 3]
+
+
+def test_subprocess_summary_line_is_parsed():
+    line = "Scanned 12 PDFs: 10 synced, 1 skipped, 1 failed; 3 notes written, 7 unchanged, 0 queued."
+    assert {key: int(value) for key, value in SUMMARY_LINE.search(line).groupdict().items()} == {
+        "files": 12, "synced": 10, "skipped": 1, "failed": 1,
+        "notes_written": 3, "notes_unchanged": 7, "notes_queued": 0,
+    }
+
+
+def test_overlapping_runs_coalesce_into_one_rerun(tmp_path, monkeypatch):
+    task_scheduler = make_scheduler(tmp_path, monkeypatch, adaptive=False)
+    started = threading.Event()
+    gate = threading.Event()
+    runs = []
+
+    def run_in_process():
+        runs.append(len(runs))
+        started.set()
+        gate.wait(10)
+        return {"files": 1, "synced": 1, "notes_written": 1}
+
+    monkeypatch.setattr(task_scheduler, "run_in_process", run_in_process)
+    first = threading.Thread(target=task_scheduler.run_task_now)
+    first.start()
+    assert started.wait(10)
+
+    # Requests arriving while a run is in progress return at once and fold into one rerun
+    for _ in range(3):
+        task_scheduler.run_task_now()
+    gate.set()
+    first.join(10)
+
+    assert runs == [0, 1]
+    assert not task_scheduler.running
+    assert len(task_scheduler.history) == 2
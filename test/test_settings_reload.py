@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import events
+import settings
+
+
+def test_reload_only_on_change_and_notifies(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(f"pdf_folder: {tmp_path / 'pdfs'}\nnotes_folder: {tmp_path / 'notes'}\n")
+    monkeypatch.setattr(settings, "USER_DATA_DIR", tmp_path)
+    monkeypatch.setattr(settings, "CONFIG_PATH", config_path)
+    monkeypatch.setattr(settings, "CONFIG", None)
+    monkeypatch.setattr(settings, "_STATE", {"signature": None, "ensured": False})
+    received = []
+    events.subscribe("config.changed", received.append)
+    try:
+        assert settings.reload() is True
+        first = settings.CONFIG
+        assert (tmp_path / "pdfs").is_dir()
+
+        # Unchanged file: nothing is re-read and no event fires
+        assert settings.reload() is False
+        assert settings.CONFIG is first and received == []
+
+        config_path.write_text(f"pdf_folder: {tmp_path / 'other'}\nnotes_folder: {tmp_path / 'notes'}\n")
+        os.utime(config_path, ns=(0, os.stat(config_path).st_mtime_ns + 10**9))
+        assert settings.reload() is True
+    finally:
+        events.unsubscribe("config.changed", received.append)
+
+    assert [p["changed"] for p in received] == [["pdf_folder"]]
+    assert received[0]["new"]["pdf_folder"] == str(tmp_path / "other")
+    assert (tmp_path / "other").is_dir()
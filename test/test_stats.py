@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import settings
+import events
+from stats import StatsService
+
+
+def test_stats_follow_events_without_rescanning(tmp_path, monkeypatch):
+    pdf_dir = tmp_path / "pdfs"
+    notes_dir = tmp_path / "notes"
+    pdf_dir.mkdir()
+    notes_dir.mkdir()
+    (pdf_dir / "a.pdf").write_bytes(b"a")
+    monkeypatch.setattr(settings, "CONFIG", {"pdf_folder": str(pdf_dir), "notes_folder": str(notes_dir)})
+
+    service = StatsService(recount_ttl=3600)
+    assert service.snapshot()["pdfs"] == 1
+
+    # Files appearing on disk are only picked up through events until the next recount
+    (pdf_dir / "b.pdf").write_bytes(b"b")
+    events.publish("pdf.created", path=str(pdf_dir / "b.pdf"))
+    events.publish("pdf.created", path=str(tmp_path / "elsewhere.pdf"))
+    events.publish("note.written", path=str(notes_dir / "Notes - b.md"), created=True)
+    events.publish("pipeline.result", path=str(pdf_dir / "b.pdf"), outcome="synced", status=None)
+    events.publish("pipeline.result", path=str(pdf_dir / "a.pdf"), outcome="failed", status="failed: x")
+
+    counts = service.snapshot()
+    assert counts == {"pdfs": 2, "notes": 1, "syncs": 1, "errors": 1}
+
+    events.publish("pdf.deleted", path=str(pdf_dir / "a.pdf"))
+    assert service.snapshot()["pdfs"] == 1
+
+
+def test_stats_count_notes_in_the_configured_format(tmp_path, monkeypatch):
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    (notes_dir / "Notes - a.txt").write_text("a")
+    (notes_dir / "Notes - old.md").write_text("old")
+    monkeypatch.setattr(settings, "CONFIG", {"pdf_folder": str(tmp_path), "notes_folder": str(notes_dir),
+                                             "output_settings": {"annotated_file_format": ".txt"}})
+
+    service = StatsService(recount_ttl=3600)
+    assert service.snapshot()["notes"] == 1
+
+    events.publish("note.written", path=str(notes_dir / "Notes - b.txt"), created=True)
+    events.publish("note.written", path=str(notes_dir / "Notes - c.md"), created=True)
+    assert service.snapshot()["notes"] == 2
@@ -0,0 +1,139 @@
+import os
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from watcher import SystemWatcher, SnapshotPoller, scan_folder
+
+
+def make_watcher(folder, snapshot_path):
+    processed = []
+    watcher = SystemWatcher(str(folder), processed.append, snapshot_path=snapshot_path)
+    return watcher, processed
+
+
+def test_reconcile_enqueues_only_changed_files(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    snapshot_path = tmp_path / "snapshot.json"
+    (pdf_dir / "a.pdf").write_bytes(b"a")
+    (pdf_dir / "b.pdf").write_bytes(b"b")
+    (pdf_dir / "notes.txt").write_text("ignored")
+
+    # First run only records a baseline
+    watcher, _ = make_watcher(pdf_dir, snapshot_path)
+    assert watcher.reconcile() == []
+    assert len(scan_folder(pdf_dir)) == 2
+    watcher.handler.stop()
+
+    # Changes made while "offline"
+    (pdf_dir / "b.pdf").write_bytes(b"b changed")
+    (pdf_dir / "c.pdf").write_bytes(b"c")
+
+    watcher, _ = make_watcher(pdf_dir, snapshot_path)
+    changed = watcher.reconcile()
+    watcher.handler.stop()
+
+    assert sorted(os.path.basename(p) for p in changed) == ["b.pdf", "c.pdf"]
+    assert set(watcher.handler.pending_files) == set(changed)
+
+
+def test_processed_files_are_not_reenqueued(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    snapshot_path = tmp_path / "snapshot.json"
+    (pdf_dir / "a.pdf").write_bytes(b"a")
+
+    watcher, _ = make_watcher(pdf_dir, snapshot_path)
+    watcher.reconcile()
+    (pdf_dir / "a.pdf").write_bytes(b"a changed")
+    watcher._on_file_ready(str(pdf_dir / "a.pdf"))
+    watcher.save_snapshot()
+    watcher.handler.stop()
+
+    watcher, _ = make_watcher(pdf_dir, snapshot_path)
+    assert watcher.reconcile() == []
+    watcher.handler.stop()
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.events = []
+
+    def dispatch(self, event):
+        self.events.append((event.event_type, os.path.basename(event.src_path)))
+
+
+def test_snapshot_poller_detects_changes_within_budget(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"a")
+    (tmp_path / "b.pdf").write_bytes(b"b")
+    handler = RecordingHandler()
+    poller = SnapshotPoller(max_stats_per_cycle=2)
+    poller.schedule(handler, str(tmp_path))
+
+    poller.poll_once(emit=False)
+    poller.poll_once(emit=False)  # second pass stats the files the first one could not afford
+    assert handler.events == []
+
+    os.utime(tmp_path / "a.pdf", ns=(1, 1))
+    (tmp_path / "c.pdf").write_bytes(b"c")
+    changes = 0
+    for _ in range(3):
+        changes += poller.poll_once()
+
+    assert ("created", "c.pdf") in handler.events
+    assert ("modified", "a.pdf") in handler.events
+    assert changes == 2
+
+    (tmp_path / "b.pdf").unlink()
+    poller.poll_once()
+    assert ("deleted", "b.pdf") in handler.events
+
+
+def test_self_triggered_events_are_suppressed(tmp_path):
+    from watchdog.events import FileModifiedEvent
+    from ledger import record_io
+
+    pdf = tmp_path / "read.pdf"
+    pdf.write_bytes(b"pdf")
+    watcher, _ = make_watcher(tmp_path, tmp_path / "snapshot.json")
+    handler = watcher.handler
+
+    record_io(pdf)
+    handler.dispatch(FileModifiedEvent(str(pdf)))
+    assert handler.suppressed_events == 1
+    assert handler.pending_files == {}
+
+    # A real edit changes size/mtime and gets through
+    pdf.write_bytes(b"pdf with annotations")
+    handler.dispatch(FileModifiedEvent(str(pdf)))
+    handler.stop()
+    assert str(pdf) in handler.pending_files
+
+
+def test_edit_during_processing_is_not_recorded_as_ours(tmp_path, monkeypatch):
+    import pymupdf
+    import annotes
+    from ledger import LEDGER
+    from runconfig import RunConfig
+
+    pdf = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Important sentence")
+    page.add_highlight_annot(page.search_for("Important")[0]).update()
+    doc.save(pdf)
+    doc.close()
+
+    render_doc = annotes._render_doc
+
+    def render_and_edit(*args):
+        rendered = render_doc(*args)
+        # The user saves new annotations while we are still working on the old content
+        with open(pdf, "ab") as f:
+            f.write(b"\n% edited")
+        return rendered
+
+    monkeypatch.setattr(annotes, "_render_doc", render_and_edit)
+    assert annotes.process_pdf(str(pdf), RunConfig(notes_folder=str(tmp_path / "notes"))) is None
+    assert not LEDGER.matches(pdf)
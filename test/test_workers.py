@@ -0,0 +1,25 @@
+import sys
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from workers import WorkerPool, PRIORITY_MANUAL, PRIORITY_SCAN
+
+
+def test_manual_work_overtakes_queued_scan_work():
+    pool = WorkerPool(1)
+    gate = threading.Event()
+    order = []
+
+    blocker = pool.submit(gate.wait, priority=PRIORITY_SCAN)
+    scan_tasks = [pool.submit(order.append, f"scan {i}", priority=PRIORITY_SCAN) for i in range(3)]
+    manual = pool.submit(order.append, "manual", priority=PRIORITY_MANUAL)
+    cancelled = pool.submit(order.append, "cancelled", priority=PRIORITY_SCAN)
+    assert cancelled.cancel()
+
+    gate.set()
+    for future in [blocker, manual] + scan_tasks:
+        future.result(timeout=5)
+    pool.shutdown()
+
+    assert order == ["manual", "scan 0", "scan 1", "scan 2"]
@@ -0,0 +1,85 @@
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from writebehind import WriteBehindQueue, flush_all
+from connectors import FileConnector
+
+
+def test_coalesces_writes_per_path():
+    writes = []
+    queue = WriteBehindQueue(lambda path, title, content: writes.append((path, content)), delay=0.2)
+
+    for version in range(5):
+        queue.put("a.md", "a", f"v{version}")
+    queue.put("b.md", "b", "only")
+
+    deadline = time.monotonic() + 5
+    while len(writes) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert writes == [("a.md", "v4"), ("b.md", "only")]
+    assert queue.coalesced == 4 and len(queue) == 0
+
+
+def test_bounded_queue_writes_oldest_and_flushes_on_shutdown(tmp_path):
+    connector = FileConnector(write_behind_seconds=60, write_behind_max_pending=2)
+    paths = [tmp_path / f"note{i}.md" for i in range(3)]
+
+    for path in paths:
+        assert connector.push_note(path.stem, f"# {path.stem}\n", str(path)) == "queued"
+    # Over the bound: the oldest pending note was written straight away
+    assert paths[0].exists() and not paths[1].exists()
+
+    flush_all()
+    assert [p.read_text() for p in paths] == ["# note0\n", "# note1\n", "# note2\n"]
+
+
+class SlowBackgroundLock:
+    """write_lock that makes the background thread lose the race to a concurrent flush."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        if threading.current_thread().name == "annotes-write-behind":
+            time.sleep(0.2)
+        self.lock.acquire()
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+def test_flush_during_background_write_keeps_newest_content():
+    writes = []
+    started, gate = threading.Event(), threading.Event()
+
+    def write(path, title, content):
+        writes.append(content)
+        if content == "slow":
+            started.set()
+            gate.wait(5)
+
+    queue = WriteBehindQueue(write, delay=0)
+    queue.write_lock = SlowBackgroundLock()
+
+    # The background thread picks "v1" up while the note is updated and flushed
+    queue.put("a.md", "a", "v1")
+    time.sleep(0.05)
+    queue.put("a.md", "a", "v2")
+    queue.flush()
+    time.sleep(0.3)
+    assert writes[-1] == "v2"
+
+    # flush() returns only once a write in flight has finished
+    queue.write_lock = threading.Lock()
+    queue.put("b.md", "b", "slow")
+    assert started.wait(5)
+    flusher = threading.Thread(target=queue.flush)
+    flusher.start()
+    flusher.join(0.2)
+    assert flusher.is_alive()
+    gate.set()
+    flusher.join(5)
+    assert not flusher.is_alive() and writes[-1] == "slow"